@@ -0,0 +1,100 @@
+"""Concurrent processing of many chat turns, for offline evaluation and bulk jobs."""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Sequence
+from typing import TYPE_CHECKING, Any
+
+from config.schemas import UserInput
+from config.state import SessionState, UserProfile
+from core.metrics import BATCH_ITEMS
+from core.scheduler import Priority, priority_floor
+from core.tracing import new_trace_id
+
+if TYPE_CHECKING:
+    from agent.orchestration import Orchestrator
+
+LOGGER = logging.getLogger("agent")
+LOGGER.setLevel(logging.INFO)
+
+
+class BatchRunner:
+    """Runs many turns concurrently, yielding each result as it completes.
+
+    Turns of one session run one after another in input order, since each builds on the last,
+    and up to `max_concurrency` sessions run at once. The states and profiles of every session
+    and user in the batch are loaded in one query up front, which serves the first turn of each
+    session; later turns load the state their predecessor saved. A state loaded up front can be
+    stale if someone else chats in the session meanwhile, so batches should use their own
+    sessions.
+
+    Every LLM call of the batch goes through the shared scheduler in the batch lane, so a batch
+    takes up whatever provider capacity interactive turns leave unused.
+    """
+
+    def __init__(self, orchestrator: "Orchestrator", max_concurrency: int) -> None:
+        self.orchestrator = orchestrator
+        self.max_concurrency = max_concurrency
+
+    async def run(self, items: Sequence[UserInput]) -> AsyncIterator[dict[str, Any]]:
+        """Yield one result per item, in completion order, each carrying the item's index."""
+        sessions: dict[str, list[int]] = {}
+        for index, item in enumerate(items):
+            sessions.setdefault(item.session_id, []).append(index)
+        states, profiles = await self.orchestrator.postgres_client.get_states_and_profiles(
+            list(sessions), list({item.user_id for item in items})
+        )
+
+        results: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_session(indexes: list[int]) -> None:
+            async with semaphore:
+                first = items[indexes[0]]
+                prefetched: tuple[SessionState | None, UserProfile | None] | None = (
+                    states.get(first.session_id),
+                    profiles.get(first.user_id),
+                )
+                for index in indexes:
+                    await results.put(await self._run_item(index, items[index], prefetched))
+                    prefetched = None
+
+        # Tasks copy the context they are created in, so every call they make keeps the floor
+        with priority_floor(Priority.BATCH):
+            tasks = [asyncio.create_task(run_session(indexes)) for indexes in sessions.values()]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # The client may disconnect before the batch finishes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_item(
+        self,
+        index: int,
+        item: UserInput,
+        prefetched: tuple[SessionState | None, UserProfile | None] | None,
+    ) -> dict[str, Any]:
+        trace_id = new_trace_id()
+        record = {
+            "index": index,
+            "session_id": item.session_id,
+            "user_id": item.user_id,
+            "trace_id": trace_id,
+        }
+        try:
+            result = await self.orchestrator.run(
+                item.session_id,
+                item.user_id,
+                item.user_input,
+                trace_id=trace_id,
+                prefetched=prefetched,
+            )
+        except Exception as e:
+            LOGGER.exception(f"Batch item {index} failed.")
+            BATCH_ITEMS.inc(outcome="error")
+            return {**record, "status": "error", "error": str(e)}
+        BATCH_ITEMS.inc(outcome="ok")
+        return {**record, "status": "ok", "result": result}
@@ -0,0 +1,68 @@
+"""Per-turn deadline budget for the specialist fan-out."""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, cast
+
+from langgraph.runtime import Runtime
+
+from agent.speculation import ContextSpecialistNode, SpecialistNode
+from config.settings import settings
+from config.state import Context, SessionState
+from core.metrics import SPECIALIST_TIMEOUTS
+
+LOGGER = logging.getLogger("agent")
+LOGGER.setLevel(logging.INFO)
+
+# State field each specialist writes its perspective to
+SPECIALIST_ADVICE = {
+    "allopathy_agent": "allopathy_advice",
+    "tcm_kampo_agent": "tcm_advice",
+    "ayurveda_agent": "ayurveda_advice",
+    "lifestyle_agent": "lifestyle_advice",
+}
+
+
+def turn_deadline() -> float | None:
+    """Monotonic time by which a turn started now should have its response."""
+    if not settings.TURN_DEADLINE_SECONDS:
+        return None
+    return time.monotonic() + settings.TURN_DEADLINE_SECONDS
+
+
+def specialist_budget(name: str, deadline: float | None) -> float:
+    """Seconds a specialist may run: its own timeout, capped by what is left of the turn.
+
+    The turn's remaining time keeps `DEADLINE_RESERVE_SECONDS` back for synthesis, the safety
+    check and the final response, which run after the fan-out.
+    """
+    budget = settings.SPECIALIST_TIMEOUTS.get(name, settings.SPECIALIST_TIMEOUT_SECONDS)
+    if deadline is not None:
+        budget = min(budget, deadline - time.monotonic() - settings.DEADLINE_RESERVE_SECONDS)
+    return max(budget, 0.0)
+
+
+def deadline_node(name: str, node: SpecialistNode | ContextSpecialistNode) -> ContextSpecialistNode:
+    """Wrap a specialist so it gives up, writing nothing, when its budget runs out.
+
+    Synthesis then goes ahead with the perspectives that did arrive (see `SynthesisNode`).
+    """
+    takes_runtime = "runtime" in inspect.signature(node).parameters
+
+    async def run(state: SessionState, runtime: Runtime[Context]) -> dict[str, Any]:
+        deadline = runtime.context.deadline if runtime.context else None
+        budget = specialist_budget(name, deadline)
+        if takes_runtime:
+            call = cast(ContextSpecialistNode, node)(state, runtime=runtime)
+        else:
+            call = cast(SpecialistNode, node)(state)
+        try:
+            return await asyncio.wait_for(call, budget)
+        except TimeoutError:
+            LOGGER.warning(f"{name} missed its {budget:.1f}s budget, dropping its perspective")
+            SPECIALIST_TIMEOUTS.inc(specialist=name)
+            return {}
+
+    return run
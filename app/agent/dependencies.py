@@ -3,17 +3,62 @@
 from functools import lru_cache
 
 from agent.orchestration import Orchestrator
-from core.llm import LLMClient
+from config.settings import settings
+from core.cache import CacheBackend, CachedLLMClient, InMemoryLRUCache, PostgresLLMCache
+from core.llm import BaseLLMClient, LLMClient
+from core.router import LLMRouter
+from core.scheduler import LLMScheduler
+from core.singleflight import SingleFlightLLMClient
 from memory.postgres import PostgresClient
 
 
 @lru_cache
-def get_llm_client() -> LLMClient:
-    """Get or create the singleton LLMClient instance.
+def get_llm_scheduler() -> LLMScheduler:
+    """Get or create the singleton LLMScheduler shared by every LLM backend."""
+    return LLMScheduler(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        provider_max_concurrency=settings.LLM_PROVIDER_MAX_CONCURRENCY,
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        expected_completion_tokens=settings.LLM_EXPECTED_COMPLETION_TOKENS,
+    )
 
-    :return: The singleton LLMClient instance.
+
+@lru_cache
+def get_llm_client() -> BaseLLMClient:
+    """Get or create the singleton LLM client instance.
+
+    Each backend goes through the shared scheduler, backends are routed across when fallbacks
+    are configured, identical in-flight calls are coalesced, and the result is wrapped with the
+    response cache tiers enabled in settings.
+
+    :return: The singleton LLM client instance.
     """
-    return LLMClient()
+    scheduler = get_llm_scheduler()
+    client: BaseLLMClient = scheduler.wrap(LLMClient())
+    if settings.LLM_FALLBACK_MODELS:
+        client = LLMRouter(
+            [
+                client,
+                *(
+                    scheduler.wrap(LLMClient.from_spec(spec))
+                    for spec in settings.LLM_FALLBACK_MODELS
+                ),
+            ],
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+        )
+    if settings.LLM_SINGLE_FLIGHT_ENABLED:
+        client = SingleFlightLLMClient(client)
+    if settings.LLM_CACHE_ENABLED:
+        tiers: list[CacheBackend] = [
+            InMemoryLRUCache(settings.LLM_CACHE_MAX_SIZE, settings.LLM_CACHE_TTL_SECONDS)
+        ]
+        if settings.LLM_CACHE_POSTGRES_ENABLED:
+            tiers.append(PostgresLLMCache(get_postgres_client(), settings.LLM_CACHE_TTL_SECONDS))
+        client = CachedLLMClient(client, tiers)
+    return client
 
 
 @lru_cache
@@ -26,8 +71,9 @@ def get_postgres_client() -> PostgresClient:
 def get_orchestrator() -> Orchestrator:
     """Get or create the singleton Orchestrator instance.
 
-    This ensures that the same Orchestrator instance (with its MemorySaver checkpointer)
-    is reused across requests, allowing session state to persist.
+    The orchestrator holds the compiled graph and the background profile extraction pool,
+    which every request of this worker shares. Session state is loaded from and saved to
+    Postgres on each turn, so nothing here needs to outlive the process.
 
     :return: The singleton Orchestrator instance.
     """
@@ -1,16 +1,49 @@
 """LangGraph orchestration graph builder."""
 
-from typing import TYPE_CHECKING
+import functools
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
 
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
-from config.state import SessionState
+from agent.speculation import SPECIALISTS
+from config.settings import settings
+from config.state import Context, SessionState
+from core.metrics import instrument_node
+from memory.checkpointer import BoundedMemorySaver
 
 if TYPE_CHECKING:
     from agent.orchestration import Orchestrator
 
+# Runs take the state's fields as a plain dict (see `orchestration.graph_input`), so the input
+# type is left open
+SessionGraph = StateGraph[SessionState, Context, Any, SessionState]
+CompiledSessionGraph = CompiledStateGraph[SessionState, Context, Any, SessionState]
+
+
+def changed_fields_only(node: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a node that returns the state it was given so it writes only the fields it changed.
+
+    LangGraph writes every field of a returned `SessionState`, and the checkpointer serializes
+    each write, so unchanged fields such as the conversation history would be encoded again
+    after every node. Lists are compared against a shallow copy, so in-place appends count.
+    """
+
+    # functools.wraps keeps the node signature, so LangGraph still injects `runtime`
+    @functools.wraps(node)
+    async def wrapper(state: Any, **kwargs: Any) -> Any:
+        if not isinstance(state, SessionState):
+            return await node(state, **kwargs)
+        before = {name: list(value) if isinstance(value, list) else value for name, value in state}
+        result = await node(state, **kwargs)
+        if result is not state:
+            return result
+        return {name: value for name, value in state if value != before[name]}
+
+    return wrapper
+
 
 class GraphBuilder:
     """Builds the LangGraph state graph structure."""
@@ -23,86 +56,113 @@ class GraphBuilder:
         """
         self.orchestrator = orchestrator
 
-    def build(self) -> CompiledStateGraph:
+    def build(self, checkpointer: BaseCheckpointSaver | None = None) -> CompiledSessionGraph:
         """Build and compile the LangGraph state graph.
 
+        Args:
+            checkpointer: Saver for the graph's checkpoints. Defaults to a bounded in-process
+                saver when `CHECKPOINTER` is "memory" and to none otherwise; session state is
+                loaded from and saved to Postgres on every turn either way.
+
         Returns:
-            Compiled LangGraph instance with checkpointing enabled.
+            Compiled LangGraph instance.
         """
-        memory = MemorySaver()
-        graph = StateGraph(SessionState)
+        if checkpointer is None and settings.CHECKPOINTER == "memory":
+            checkpointer = BoundedMemorySaver(
+                max_threads=settings.CHECKPOINT_MAX_THREADS,
+                ttl_seconds=settings.CHECKPOINT_TTL_SECONDS,
+                keep_latest_only=settings.CHECKPOINT_KEEP_LATEST_ONLY,
+            )
+        graph: SessionGraph = StateGraph(SessionState, context_schema=Context)
         self._add_nodes(graph)
         self._add_edges(graph)
         self._add_conditional_edges(graph)
-        return graph.compile(checkpointer=memory)
+        return graph.compile(checkpointer=checkpointer)
 
-    def _add_nodes(self, graph: StateGraph) -> None:
+    def _add_nodes(self, graph: SessionGraph) -> None:
         """Add all nodes to the graph.
 
         Args:
             graph: The StateGraph instance.
         """
-        graph.add_node("input_guardrail", self.orchestrator.nodes.input_guardrail)
-        graph.add_node("response", self.orchestrator.nodes.response)
-        graph.add_node("general_agent", self.orchestrator.nodes.general_agent)
-        graph.add_node("ensure_details", self.orchestrator.nodes.ensure_details)
-        graph.add_node(
-            "ancient_knowledge_router", self.orchestrator.edges.route_ancient_knowledge_router
+        if settings.FUSED_TRIAGE:
+            self._add_node(graph, "triage", self.orchestrator.nodes.triage)
+        else:
+            self._add_node(graph, "input_guardrail", self.orchestrator.nodes.input_guardrail)
+            self._add_node(graph, "ensure_details", self.orchestrator.nodes.ensure_details)
+        self._add_node(graph, "response", self.orchestrator.nodes.response)
+        self._add_node(graph, "general_agent", self.orchestrator.nodes.general_agent)
+        self._add_node(
+            graph, "ancient_knowledge_router", self.orchestrator.nodes.ancient_knowledge_router
+        )
+        self._add_node(graph, "ancient_knowledge", self.orchestrator.nodes.ancient_knowledge)
+        self._add_node(graph, "allopathy_agent", self.orchestrator.nodes.allopathy_agent)
+        self._add_node(graph, "emergency_response", self.orchestrator.nodes.emergency_response)
+        self._add_node(graph, "tcm_kampo_agent", self.orchestrator.nodes.tcm_kampo_agent)
+        self._add_node(graph, "ayurveda_agent", self.orchestrator.nodes.ayurveda_agent)
+        self._add_node(graph, "lifestyle_agent", self.orchestrator.nodes.lifestyle_agent)
+        self._add_node(graph, "synthesis_node", self.orchestrator.nodes.synthesis_node)
+        self._add_node(
+            graph, "contraindication_check", self.orchestrator.nodes.contraindication_check
         )
-        graph.add_node("ancient_knowledge", self.orchestrator.nodes.ancient_knowledge)
-        graph.add_node("allopathy_agent", self.orchestrator.nodes.allopathy_agent)
-        graph.add_node("emergency_response", self.orchestrator.nodes.emergency_response)
-        graph.add_node("tcm_kampo_agent", self.orchestrator.nodes.tcm_kampo_agent)
-        graph.add_node("ayurveda_agent", self.orchestrator.nodes.ayurveda_agent)
-        graph.add_node("lifestyle_agent", self.orchestrator.nodes.lifestyle_agent)
-        graph.add_node("synthesis_node", self.orchestrator.nodes.synthesis_node)
-        graph.add_node("contraindication_check", self.orchestrator.nodes.contraindication_check)
-        graph.add_node("adjustment_node", self.orchestrator.nodes.adjustment_node)
-        graph.add_node("response_generator", self.orchestrator.nodes.response_generator)
-
-    def _add_edges(self, graph: StateGraph) -> None:
+        self._add_node(graph, "adjustment_node", self.orchestrator.nodes.adjustment_node)
+        self._add_node(graph, "response_generator", self.orchestrator.nodes.response_generator)
+
+    @staticmethod
+    def _add_node(graph: SessionGraph, name: str, node: Callable[..., Awaitable[Any]]) -> None:
+        """Add a node wrapped with latency and error metrics, writing only what it changed."""
+        graph.add_node(name, instrument_node(name, changed_fields_only(node)))
+
+    def _add_edges(self, graph: SessionGraph) -> None:
         """Add static edges to the graph.
 
         Args:
             graph: The StateGraph instance.
         """
-        graph.add_edge(START, "input_guardrail")
-        graph.add_edge("ancient_knowledge", "allopathy_agent")
-        graph.add_edge("ancient_knowledge", "tcm_kampo_agent")
-        graph.add_edge("ancient_knowledge", "ayurveda_agent")
-        graph.add_edge("ancient_knowledge", "lifestyle_agent")
+        graph.add_edge(START, "triage" if settings.FUSED_TRIAGE else "input_guardrail")
         graph.add_edge("allopathy_agent", "synthesis_node")
         graph.add_edge("tcm_kampo_agent", "synthesis_node")
         graph.add_edge("ayurveda_agent", "synthesis_node")
         graph.add_edge("lifestyle_agent", "synthesis_node")
         graph.add_edge("synthesis_node", "contraindication_check")
-        graph.add_edge("contraindication_check", "adjustment_node")
         graph.add_edge("adjustment_node", "response_generator")
         graph.add_edge("response_generator", "response")
         graph.add_edge("general_agent", "response")
         graph.add_edge("emergency_response", "response")
         graph.add_edge("response", END)
 
-    def _add_conditional_edges(self, graph: StateGraph) -> None:
+    def _add_conditional_edges(self, graph: SessionGraph) -> None:
         """Add conditional edges with routing logic to the graph.
 
         Args:
             graph: The StateGraph instance.
         """
-        graph.add_conditional_edges(
-            "input_guardrail",
-            self.orchestrator.edges.route_input_guardrail,
-            {
-                "emergency_response": "emergency_response",
-                "ensure_details": "ensure_details",
-                "general_agent": "general_agent",
-            },
-        )
-        graph.add_conditional_edges(
-            "ensure_details",
-            self.orchestrator.edges.route_ensure_details,
-            {"ancient_knowledge_router": "ancient_knowledge_router", "response": "response"},
-        )
+        if settings.FUSED_TRIAGE:
+            graph.add_conditional_edges(
+                "triage",
+                self.orchestrator.edges.route_triage,
+                {
+                    "emergency_response": "emergency_response",
+                    "general_agent": "general_agent",
+                    "ancient_knowledge_router": "ancient_knowledge_router",
+                    "response": "response",
+                },
+            )
+        else:
+            graph.add_conditional_edges(
+                "input_guardrail",
+                self.orchestrator.edges.route_input_guardrail,
+                {
+                    "emergency_response": "emergency_response",
+                    "ensure_details": "ensure_details",
+                    "general_agent": "general_agent",
+                },
+            )
+            graph.add_conditional_edges(
+                "ensure_details",
+                self.orchestrator.edges.route_ensure_details,
+                {"ancient_knowledge_router": "ancient_knowledge_router", "response": "response"},
+            )
 
         graph.add_conditional_edges(
             "ancient_knowledge_router",
@@ -110,6 +170,10 @@ class GraphBuilder:
             {"response": "response", "ancient_knowledge": "ancient_knowledge"},
         )
 
+        graph.add_conditional_edges(
+            "ancient_knowledge", self.orchestrator.edges.route_specialists, list(SPECIALISTS)
+        )
+
         graph.add_conditional_edges(
             "contraindication_check",
             self.orchestrator.edges.route_contraindication_check,
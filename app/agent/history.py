@@ -0,0 +1,102 @@
+"""Token-budgeted conversation history windowing and compaction."""
+
+import re
+from typing import Any
+
+from config.settings import settings
+from config.state import SessionState
+from core.tokens import estimate_tokens
+
+# Role markers and separators that chat templates wrap around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+_FOLDED_MESSAGE_MAX_CHARS = 200
+
+
+def estimate_message_tokens(message: dict[str, Any]) -> int:
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(str(message.get("content") or ""))
+
+
+def _clip(text: str) -> str:
+    """Keep the first sentence of a message, bounded in length."""
+    text = " ".join(text.split())
+    sentence_end = re.search(r"[.!?](\s|$)", text)
+    if sentence_end:
+        text = text[: sentence_end.end()].strip()
+    if len(text) > _FOLDED_MESSAGE_MAX_CHARS:
+        text = text[:_FOLDED_MESSAGE_MAX_CHARS].rstrip() + "..."
+    return text
+
+
+class HistoryManager:
+    """Keeps prompt size flat as sessions grow.
+
+    The most recent messages are kept verbatim, older ones are folded into a rolling
+    summary stored on `SessionState.history_summary`.
+    """
+
+    def __init__(self, max_tokens: int, keep_recent_messages: int, summary_max_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self.keep_recent_messages = keep_recent_messages
+        self.summary_max_tokens = summary_max_tokens
+
+    @classmethod
+    def from_settings(cls) -> "HistoryManager":
+        return cls(
+            max_tokens=settings.HISTORY_MAX_TOKENS,
+            keep_recent_messages=settings.HISTORY_KEEP_RECENT_MESSAGES,
+            summary_max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+        )
+
+    def window(self, state: SessionState, token_budget: int) -> list[dict[str, Any]]:
+        """Select the summary and the most recent messages that fit in the token budget."""
+        remaining = token_budget
+        prefix: list[dict[str, Any]] = []
+        if state.history_summary:
+            summary_message = {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{state.history_summary}",
+            }
+            remaining -= estimate_message_tokens(summary_message)
+            if remaining >= 0:
+                prefix.append(summary_message)
+            else:
+                remaining = token_budget
+
+        recent: list[dict[str, Any]] = []
+        for message in reversed(state.conversation_history):
+            remaining -= estimate_message_tokens(message)
+            if remaining < 0:
+                break
+            recent.append(message)
+        recent.reverse()
+        return prefix + recent
+
+    def compact(self, state: SessionState) -> None:
+        """Fold messages older than the recent window into the rolling summary.
+
+        Compaction only kicks in once the stored history exceeds `max_tokens`. Messages not yet
+        saved to the session's message log are kept until the next turn, so the log stays whole.
+        """
+        history = state.conversation_history
+        unsaved = state.message_count - state.saved_message_count
+        split = len(history) - max(self.keep_recent_messages, unsaved)
+        if split <= 0:
+            return
+        if sum(estimate_message_tokens(m) for m in history) <= self.max_tokens:
+            return
+
+        folded, kept = history[:split], history[split:]
+        state.history_summary = self.fold(state.history_summary, folded)
+        state.conversation_history = kept
+
+    def fold(self, summary: str, messages: list[dict[str, Any]]) -> str:
+        """Append clipped messages to the summary, dropping the oldest lines over budget."""
+        lines = summary.splitlines() if summary else []
+        for message in messages:
+            content = _clip(str(message.get("content") or ""))
+            if content:
+                lines.append(f"{message.get('role', 'user')}: {content}")
+
+        while lines and estimate_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+"""Local drug-herb-food interaction index used ahead of the LLM contraindication check."""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from config.state import UserProfile
+from core.matcher import PhraseMatcher
+
+INTERACTIONS_PATH = Path(__file__).parent.parent / "data" / "interactions.json"
+
+SEVERITIES = ("major", "moderate", "minor")
+
+
+class Interaction(NamedTuple):
+    first: str
+    second: str
+    severity: str
+    description: str
+
+
+@dataclass(frozen=True)
+class InteractionMatch:
+    """An interaction between a substance named in the draft and another candidate."""
+
+    substance: str
+    other: str
+    interaction: Interaction
+
+    def describe(self) -> str:
+        return (
+            f"{self.substance} + {self.other} ({self.interaction.severity}): "
+            f"{self.interaction.description}"
+        )
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, unify apostrophes and hyphens and collapse whitespace."""
+    name = name.lower().replace("’", "'").replace("-", " ")
+    return re.sub(r"\s+", " ", name).strip()
+
+
+class InteractionIndex:
+    """Interaction records indexed by substance pair.
+
+    Substances are canonical names. Synonyms (brand names, regional names) map onto them and
+    groups (drug classes) let one record cover every member, so a record on "nsaid" applies
+    to ibuprofen as well.
+    """
+
+    def __init__(
+        self,
+        interactions: list[Interaction],
+        synonyms: dict[str, list[str]] | None = None,
+        groups: dict[str, list[str]] | None = None,
+    ) -> None:
+        self.aliases: dict[str, str] = {}
+        for canonical, names in (synonyms or {}).items():
+            canonical = normalize_name(canonical)
+            self.aliases[canonical] = canonical
+            for name in names:
+                self.aliases[normalize_name(name)] = canonical
+
+        self.groups: dict[str, set[str]] = {}
+        for group, members in (groups or {}).items():
+            for member in members:
+                self.groups.setdefault(normalize_name(member), set()).add(normalize_name(group))
+
+        self.pairs: dict[frozenset[str], list[Interaction]] = {}
+        self.by_substance: dict[str, list[Interaction]] = {}
+        for record in interactions:
+            if record.severity not in SEVERITIES:
+                raise ValueError(f"Unknown severity {record.severity!r} for {record}")
+            record = record._replace(
+                first=normalize_name(record.first), second=normalize_name(record.second)
+            )
+            self.aliases.setdefault(record.first, record.first)
+            self.aliases.setdefault(record.second, record.second)
+            self.pairs.setdefault(frozenset((record.first, record.second)), []).append(record)
+            self.by_substance.setdefault(record.first, []).append(record)
+            self.by_substance.setdefault(record.second, []).append(record)
+
+        self.matcher = PhraseMatcher(dict.fromkeys(self.aliases, "substance"))
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "InteractionIndex":
+        return cls(
+            [Interaction(*record) for record in data.get("interactions", [])],
+            synonyms=data.get("synonyms"),
+            groups=data.get("groups"),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path = INTERACTIONS_PATH) -> "InteractionIndex":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    def extract(self, text: str) -> set[str]:
+        """Return the canonical substances mentioned in text."""
+        normalized = normalize_name(text)
+        return {self.aliases[normalized[m.start : m.end]] for m in self.matcher.find(normalized)}
+
+    def profile_substances(self, profile: UserProfile | None) -> set[str]:
+        """Return the substances and conditions listed in the user's medical history."""
+        if profile is None:
+            return set()
+        history = profile.medical_history
+        entries = [
+            *(history.medications or []),
+            *(history.supplements or []),
+            *(history.medical_conditions or []),
+        ]
+        return self.extract("\n".join(entries))
+
+    def needs_check(self, draft: str, profile: UserProfile | None) -> bool:
+        """Whether the draft could interact with anything, known to the table or not.
+
+        The table is small, so only a draft naming none of its substances, for a user with no
+        medications, supplements, conditions or allergies on record, is safe to pass unchecked.
+        """
+        if self.extract(draft):
+            return True
+        if profile is None:
+            return False
+        history = profile.medical_history
+        return bool(
+            history.medications
+            or history.supplements
+            or history.medical_conditions
+            or profile.allergies
+        )
+
+    def _expand(self, substance: str) -> set[str]:
+        return {substance, *self.groups.get(substance, ())}
+
+    def lookup(self, first: str, second: str) -> list[Interaction]:
+        """Return the records between two canonical substances, including group records."""
+        records: list[Interaction] = []
+        for pair in product(self._expand(first), self._expand(second)):
+            records.extend(self.pairs.get(frozenset(pair), ()))
+        return records
+
+    def check(self, draft: str, profile: UserProfile | None) -> list[InteractionMatch]:
+        """Find interactions between what the draft recommends and what the user already has.
+
+        Pairs among the draft's own substances are checked too; pairs within the profile are
+        not, since the draft did not introduce them.
+        """
+        in_draft = self.extract(draft)
+        if not in_draft:
+            return []
+        candidates = in_draft | self.profile_substances(profile)
+        matches: dict[Interaction, InteractionMatch] = {}
+        for substance in sorted(in_draft):
+            if not any(name in self.by_substance for name in self._expand(substance)):
+                continue
+            for other in sorted(candidates - {substance}):
+                for record in self.lookup(substance, other):
+                    matches.setdefault(record, InteractionMatch(substance, other, record))
+        return sorted(matches.values(), key=lambda m: SEVERITIES.index(m.interaction.severity))
+
+
+@lru_cache
+def default_interaction_index() -> InteractionIndex:
+    return InteractionIndex.from_file()
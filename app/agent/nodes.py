@@ -1,13 +1,25 @@
 """Orchestrator nodes."""
 
-import json
 import logging
 from abc import ABC, abstractmethod
 from typing import Any
 
-from agent.utils import configure_logging, load_prompt, parse_json_response
+from langgraph.config import get_config, get_stream_writer
+
+from agent.deadlines import SPECIALIST_ADVICE
+from agent.history import HistoryManager
+from agent.interactions import InteractionIndex
+from agent.preclassifier import Preclassifier, Verdict
+from agent.profile import ProfileGate, apply_profile_patch, profile_patch
+from agent.prompts import PROFILE_BLOCKS, load_template
+from agent.selector import SpecialistSelector
+from agent.speculation import SPECIALISTS
+from agent.utils import configure_logging, parse_json_response
+from config.settings import settings
 from config.state import SessionState, UserProfile
-from core.llm import LLMClient
+from core.llm import BaseLLMClient
+from core.metrics import CONTRAINDICATION_CHECKS, DEGRADED_RESPONSES, PROFILE_EXTRACTIONS
+from core.scheduler import Priority, priority_scope
 
 configure_logging()
 LOGGER = logging.getLogger("nodes")
@@ -16,35 +28,17 @@ LOGGER.setLevel(logging.INFO)
 
 class BaseNode(ABC):
     @abstractmethod
-    async def run(self, state: SessionState) -> SessionState:
+    async def run(self, state: SessionState) -> SessionState | dict[str, Any]:
         pass
 
+    @staticmethod
+    def current_profile(state: SessionState) -> UserProfile:
+        return state.user_profile or UserProfile(user_id=state.user_id or "")
+
     @staticmethod
     def update_profile(state: SessionState, updates: dict[str, Any]) -> SessionState:
-        attributes_dict = state.user_profile.model_dump()
-
-        def clean_updates(d: dict[str, Any]) -> dict[str, Any]:
-            cleaned = {}
-            for k, v in d.items():
-                if isinstance(v, dict):
-                    nested = clean_updates(v)
-                    if nested:
-                        cleaned[k] = nested
-                elif v not in [None, "", [], {}]:
-                    cleaned[k] = v
-            return cleaned
-
-        cleaned_updates = clean_updates(updates)
-
-        for key, value in cleaned_updates.items():
-            if key in attributes_dict:
-                if isinstance(attributes_dict[key], dict) and isinstance(value, dict):
-                    attributes_dict[key].update(value)
-                else:
-                    attributes_dict[key] = value
-            else:
-                LOGGER.warning(f"Attempted to set invalid UserProfile field: {key}")
-        state.user_profile = UserProfile(**attributes_dict)
+        profile = BaseNode.current_profile(state)
+        state.user_profile = apply_profile_patch(profile, profile_patch(profile, updates))
         return state
 
 
@@ -56,20 +50,25 @@ class InputNode(BaseNode):
 class AgentNode(BaseNode):
     """Base class for nodes that interact with LLM."""
 
-    system_prompt_template = load_prompt("system_prompt.md")
+    system_prompt_template = load_template("system_prompt.md")
+    # Tokens of conversation history sent with each call; None falls back to settings
+    history_token_budget: int | None = None
+    # Scheduling lane for this node's LLM calls
+    priority = Priority.INTERACTIVE
 
-    def __init__(self, model: LLMClient) -> None:
+    def __init__(self, model: BaseLLMClient, history_manager: HistoryManager | None = None) -> None:
         self.model = model
+        self.history_manager = history_manager or HistoryManager.from_settings()
 
     def prepare_system_prompt(self, state: SessionState) -> str:
-        """Prepare system prompt with user profile context."""
-        user_profile_str = ""
-        if state.user_profile:
-            user_profile_str = state.user_profile.model_dump_json(indent=2, exclude_none=True)
-        else:
-            user_profile_str = "No user profile available yet."
+        """Prepare system prompt with user profile context.
 
-        return self.system_prompt_template.format(user_profile=user_profile_str)
+        The template keeps the profile at the end, so everything before it is a static prefix
+        shared by every call and user, which lets provider-side prefix caching apply.
+        """
+        return self.system_prompt_template.render(
+            user_profile=PROFILE_BLOCKS.render(state.user_profile)
+        )
 
     def prepare_messages(self, state: SessionState, current_prompt: str) -> list[dict[str, Any]]:
         """Build LLM-formatted messages list from system prompt, conversation history and current prompt."""
@@ -78,8 +77,9 @@ class AgentNode(BaseNode):
         system_prompt = self.prepare_system_prompt(state)
         messages.append({"role": "system", "content": system_prompt})
 
-        if state.conversation_history:
-            messages.extend(state.conversation_history)
+        if state.conversation_history or state.history_summary:
+            token_budget = self.history_token_budget or settings.HISTORY_NODE_TOKEN_BUDGET
+            messages.extend(self.history_manager.window(state, token_budget))
 
         messages.append({"role": "user", "content": current_prompt})
 
@@ -95,21 +95,71 @@ class AgentNode(BaseNode):
 
         state.conversation_history.append({"role": "user", "content": user_prompt})
         state.conversation_history.append({"role": "assistant", "content": assistant_response})
+        state.message_count += 2
+        self.history_manager.compact(state)
 
     async def invoke_llm(self, messages: list[dict[str, Any]]) -> str:
-        response = await self.model.ainvoke(messages)
+        with priority_scope(self.priority):
+            response = await self.model.ainvoke(messages)
         return response
 
+    async def stream_llm(self, messages: list[dict[str, Any]]) -> str:
+        """Invoke the LLM, forwarding tokens to the graph's custom stream as they arrive.
 
-class InputGuardrailNode(AgentNode):
-    prompt = load_prompt("1_input_guardrail.md")
+        Outside a streaming graph run this behaves like `invoke_llm`.
+        """
+        try:
+            writer = get_stream_writer()
+            node_name = get_config()["metadata"].get("langgraph_node")
+        except RuntimeError:
+            # Not running inside a graph (e.g. called directly from a script)
+            writer, node_name = None, None
+
+        chunks = []
+        with priority_scope(self.priority):
+            async for chunk in self.model.astream(messages):
+                chunks.append(chunk)
+                if writer is not None:
+                    writer({"event": "token", "node": node_name, "content": chunk})
+        return "".join(chunks)
+
+
+class PreclassifiedNode(AgentNode):
+    """Base class for entry nodes that let the local pre-classifier settle clear-cut inputs."""
+
+    def __init__(
+        self,
+        model: BaseLLMClient,
+        history_manager: HistoryManager | None = None,
+        preclassifier: Preclassifier | None = None,
+    ) -> None:
+        super().__init__(model, history_manager)
+        self.preclassifier = preclassifier
+
+    def preclassify(self, state: SessionState) -> bool:
+        """Set the routing flags locally if the input is clear-cut; return whether it was."""
+        if self.preclassifier is None:
+            return False
+        verdict = self.preclassifier.classify(state.user_input or "")
+        if verdict is None:
+            return False
+        LOGGER.info(f"{type(self).__name__}: Pre-classified input as {verdict.value}")
+        state.is_emergency = verdict is Verdict.EMERGENCY
+        state.is_medical = verdict is Verdict.EMERGENCY
+        return True
+
+
+class InputGuardrailNode(PreclassifiedNode):
+    prompt = load_template("1_input_guardrail.md")
+    history_token_budget = 600
+    priority = Priority.CRITICAL
 
     async def run(self, state: SessionState) -> SessionState:
         """Analyzes input for safety and emergency signals."""
         LOGGER.info("InputGuardrailNode: Analyzing input for safety and emergency signals")
-        if state.is_emergency:
+        if state.is_emergency or self.preclassify(state):
             return state
-        prompt_text = self.prompt.format(user_input=state.user_input)
+        prompt_text = self.prompt.render(user_input=state.user_input)
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
         parsed_response = parse_json_response(response)
@@ -122,39 +172,42 @@ class InputGuardrailNode(AgentNode):
 
 
 class EmergencyResponseNode(AgentNode):
-    prompt = load_prompt("2_emergency_response.md")
+    prompt = load_template("2_emergency_response.md")
+    history_token_budget = 800
+    priority = Priority.CRITICAL
 
     async def run(self, state: SessionState) -> SessionState:
         """Handles emergency queries."""
         LOGGER.info("EmergencyResponseNode: Handling emergency queries")
         messages = self.prepare_messages(state, state.user_input)
-        response = await self.invoke_llm(messages)
+        response = await self.stream_llm(messages)
         state.response = response
         self.update_conversation_history(state, state.user_input, state.response)
         return state
 
 
 class GeneralAgentNode(AgentNode):
-    prompt = load_prompt("general_agent.md")
+    prompt = load_template("general_agent.md")
 
     async def run(self, state: SessionState) -> SessionState:
         """Handles casual/general queries."""
         LOGGER.info("GeneralAgentNode: Handling casual/general queries")
         messages = self.prepare_messages(state, state.user_input)
-        response = await self.invoke_llm(messages)
+        response = await self.stream_llm(messages)
         state.response = response
         self.update_conversation_history(state, state.user_input, state.response)
         return state
 
 
 class EnsureDetailsNode(AgentNode):
-    prompt = load_prompt("2_ensure_details.md")
+    prompt = load_template("2_ensure_details.md")
+    history_token_budget = 1200
 
     async def run(self, state: SessionState) -> SessionState:
         """Ensures user provides sufficient details."""
         LOGGER.info("EnsureDetailsNode: Ensuring user provides sufficient details")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input, user_profile=state.user_profile or {}
+        prompt_text = self.prompt.render(
+            user_input=state.user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
@@ -165,145 +218,271 @@ class EnsureDetailsNode(AgentNode):
         return state
 
 
-class ProfileExtractorNode(AgentNode):
-    prompt = load_prompt("3_profile_extractor.md")
+class TriageNode(PreclassifiedNode):
+    """Guardrail and detail-sufficiency checks fused into one structured LLM call."""
+
+    prompt = load_template("1_triage.md")
+    history_token_budget = 1200
+    priority = Priority.CRITICAL
 
     async def run(self, state: SessionState) -> SessionState:
-        """Updates persistent user profile."""
-        LOGGER.info("ProfileExtractorNode: Updating user profile")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input,
-            current_profile=json.dumps(state.user_profile.model_dump())
-            if state.user_profile
-            else "",
+        """Classifies the input and asks for missing details in a single round trip."""
+        LOGGER.info("TriageNode: Checking safety, medical intent and detail sufficiency")
+        if state.is_emergency or self.preclassify(state):
+            return state
+        user_input = state.user_input or ""
+        prompt_text = self.prompt.render(
+            user_input=user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
+        parsed_response = parse_json_response(response)
+        state.is_emergency = parsed_response.get("is_emergency", False)
+        state.is_medical = parsed_response.get("is_medical", False)
+        # Detail sufficiency only applies to the medical, non-emergency path
+        if state.is_medical and not state.is_emergency:
+            state.has_sufficient_details = parsed_response.get("has_sufficient_details", False)
+            state.response = parsed_response.get("response", "")
+            self.update_conversation_history(state, user_input, state.response)
+        return state
 
-        try:
-            parsed_response = parse_json_response(response)
-            state = self.update_profile(state, parsed_response)
-        except Exception as e:
-            LOGGER.error(f"Error in ProfileExtractorNode: {e}", exc_info=True)
-            raise e
+
+class ProfileExtractorNode(AgentNode):
+    prompt = load_template("3_profile_extractor.md")
+    history_token_budget = 400
+    priority = Priority.BACKGROUND
+
+    def __init__(
+        self,
+        model: BaseLLMClient,
+        history_manager: HistoryManager | None = None,
+        gate: ProfileGate | None = None,
+    ) -> None:
+        super().__init__(model, history_manager)
+        self.gate = gate
+
+    async def extract(self, state: SessionState) -> dict[str, Any]:
+        """Return the field-level profile changes stated in the user input.
+
+        Inputs the gate finds no profile facts in return no changes without an LLM call.
+        """
+        user_input = state.user_input or ""
+        if self.gate and not self.gate.should_extract(user_input):
+            LOGGER.info("ProfileExtractorNode: No profile facts in input, skipping extraction")
+            PROFILE_EXTRACTIONS.inc(outcome="skipped")
+            return {}
+        PROFILE_EXTRACTIONS.inc(outcome="called")
+        LOGGER.info("ProfileExtractorNode: Extracting profile updates")
+        prompt_text = self.prompt.render(
+            user_input=user_input, current_profile=PROFILE_BLOCKS.render(state.user_profile)
+        )
+        messages = self.prepare_messages(state, prompt_text)
+        response = await self.invoke_llm(messages)
+        return profile_patch(self.current_profile(state), parse_json_response(response))
+
+    async def run(self, state: SessionState) -> SessionState:
+        """Updates persistent user profile."""
+        patch = await self.extract(state)
+        state.user_profile = apply_profile_patch(self.current_profile(state), patch)
         return state
 
 
 class AncientKnowledgeNode(AgentNode):
+    def __init__(
+        self,
+        model: BaseLLMClient,
+        history_manager: HistoryManager | None = None,
+        selector: SpecialistSelector | None = None,
+    ) -> None:
+        super().__init__(model, history_manager)
+        self.selector = selector
+
     async def run(self, state: SessionState) -> SessionState:
-        """Decides if more info is needed or if specialists should run."""
-        LOGGER.info(
-            "AncientKnowledgeNode: Deciding if more info is needed or if specialists should run"
-        )
+        """Chooses the specialists to consult for this query."""
+        LOGGER.info("AncientKnowledgeNode: Choosing the specialists to consult")
+        # Clear the previous turn's perspectives, so a specialist that is skipped or dropped
+        # for missing its deadline leaves its field empty instead of stale
+        for field in SPECIALIST_ADVICE.values():
+            setattr(state, field, "")
+        state.dropped_perspectives = []
+        if self.selector is None:
+            state.selected_specialists = list(SPECIALISTS)
+        else:
+            state.selected_specialists = self.selector.select(
+                state.user_input or "", state.user_profile
+            )
+        LOGGER.info(f"AncientKnowledgeNode: Consulting {state.selected_specialists}")
         return state
 
 
 class AllopathyAgentNode(AgentNode):
-    prompt = load_prompt("4_allopathy_agent.md")
+    prompt = load_template("4_allopathy_agent.md")
+    history_token_budget = 800
 
-    async def run(self, state: SessionState) -> SessionState:
+    async def run(self, state: SessionState) -> dict[str, Any]:
         """Western medicine expert."""
         LOGGER.info("AllopathyAgentNode: Western medicine expert")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input, user_profile=state.user_profile or {}
+        prompt_text = self.prompt.render(
+            user_input=state.user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
-        state.allopathy_response = response
-        return state
+        # Specialists run in parallel, so each returns only the key it owns
+        return {"allopathy_advice": response}
 
 
 class TCMKampoAgentNode(AgentNode):
-    prompt = load_prompt("4_tcm_kampo_agent.md")
+    prompt = load_template("4_tcm_kampo_agent.md")
+    history_token_budget = 800
 
-    async def run(self, state: SessionState) -> SessionState:
+    async def run(self, state: SessionState) -> dict[str, Any]:
         """TCM/Kampo expert."""
         LOGGER.info("TCMKampoAgentNode: TCM/Kampo expert")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input, user_profile=state.user_profile or {}
+        prompt_text = self.prompt.render(
+            user_input=state.user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
-        state.tcm_kampo_response = response
-        return state
+        # Specialists run in parallel, so each returns only the key it owns
+        return {"tcm_advice": response}
 
 
 class AyurvedaAgentNode(AgentNode):
-    prompt = load_prompt("4_ayurveda_agent.md")
+    prompt = load_template("4_ayurveda_agent.md")
+    history_token_budget = 800
 
-    async def run(self, state: SessionState) -> SessionState:
+    async def run(self, state: SessionState) -> dict[str, Any]:
         """Ayurveda expert."""
         LOGGER.info("AyurvedaAgentNode: Ayurveda expert")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input, user_profile=state.user_profile or {}
+        prompt_text = self.prompt.render(
+            user_input=state.user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
-        state.ayurveda_response = response
-        return state
+        # Specialists run in parallel, so each returns only the key it owns
+        return {"ayurveda_advice": response}
 
 
 class LifestyleAgentNode(AgentNode):
-    prompt = load_prompt("4_lifestyle_agent.md")
+    prompt = load_template("4_lifestyle_agent.md")
+    history_token_budget = 800
 
-    async def run(self, state: SessionState) -> SessionState:
+    async def run(self, state: SessionState) -> dict[str, Any]:
         """Lifestyle/Nutrition expert."""
         LOGGER.info("LifestyleAgentNode: Lifestyle/Nutrition expert")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input, user_profile=state.user_profile or {}
+        prompt_text = self.prompt.render(
+            user_input=state.user_input, user_profile=PROFILE_BLOCKS.render(state.user_profile)
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
-        state.lifestyle_response = response
-        return state
+        # Specialists run in parallel, so each returns only the key it owns
+        return {"lifestyle_advice": response}
+
+
+UNAVAILABLE_PERSPECTIVE = "Unavailable: this perspective did not arrive in time."
+NOT_CONSULTED_PERSPECTIVE = "Not consulted for this question."
+NO_PERSPECTIVES_RESPONSE = (
+    "I could not gather the specialist perspectives in time for this question. "
+    "Please try again in a moment, and seek medical care if your symptoms are severe."
+)
 
 
 class SynthesisNode(AgentNode):
-    prompt = load_prompt("5_synthesis.md")
+    prompt = load_template("5_synthesis.md")
+    history_token_budget = 600
 
     async def run(self, state: SessionState) -> SessionState:
         """Combines specialist outputs into a cohesive draft."""
         LOGGER.info("SynthesisNode: Combining specialist outputs into a cohesive draft")
-        prompt_text = self.prompt.format(
-            user_input=state.user_input,
-            allopathy_response=state.allopathy_response or "",
-            tcm_kampo_response=state.tcm_kampo_response or "",
-            ayurveda_response=state.ayurveda_response or "",
-            lifestyle_response=state.lifestyle_response or "",
-        )
-        messages = self.prepare_messages(state, prompt_text)
-        response = await self.invoke_llm(messages)
-        state.synthesized_response = response
+        selected = state.selected_specialists or list(SPECIALISTS)
+        advice = {}
+        for name, field in SPECIALIST_ADVICE.items():
+            text = getattr(state, field).strip()
+            if name not in selected:
+                text = NOT_CONSULTED_PERSPECTIVE
+            advice[field] = text
+        state.dropped_perspectives = [
+            name for name in selected if not advice[SPECIALIST_ADVICE[name]]
+        ]
+        if state.dropped_perspectives:
+            LOGGER.warning(f"SynthesisNode: Proceeding without {state.dropped_perspectives}")
+            DEGRADED_RESPONSES.inc()
+        if len(state.dropped_perspectives) == len(selected):
+            state.synthesized_response = NO_PERSPECTIVES_RESPONSE
+        else:
+            prompt_text = self.prompt.render(
+                user_input=state.user_input,
+                allopathy_response=advice["allopathy_advice"] or UNAVAILABLE_PERSPECTIVE,
+                tcm_kampo_response=advice["tcm_advice"] or UNAVAILABLE_PERSPECTIVE,
+                ayurveda_response=advice["ayurveda_advice"] or UNAVAILABLE_PERSPECTIVE,
+                lifestyle_response=advice["lifestyle_advice"] or UNAVAILABLE_PERSPECTIVE,
+            )
+            messages = self.prepare_messages(state, prompt_text)
+            state.synthesized_response = await self.invoke_llm(messages)
         self.update_conversation_history(state, state.user_input, state.response)
         return state
 
 
 class ContraindicationCheckNode(AgentNode):
-    prompt = load_prompt("6_contraindication_check.md")
+    prompt = load_template("6_contraindication_check.md")
+    history_token_budget = 300
+
+    def __init__(
+        self,
+        model: BaseLLMClient,
+        history_manager: HistoryManager | None = None,
+        interaction_index: InteractionIndex | None = None,
+    ) -> None:
+        super().__init__(model, history_manager)
+        self.interaction_index = interaction_index
 
     async def run(self, state: SessionState) -> SessionState:
         """Checks for drug-herb-food interactions."""
         LOGGER.info("ContraindicationCheckNode: Checking for drug-herb-food interactions")
-        prompt_text = self.prompt.format(
+        known_interactions = "Not pre-screened; check the whole response."
+        fallback_details = ""
+        if self.interaction_index is not None:
+            draft, profile = state.synthesized_response, state.user_profile
+            if not self.interaction_index.needs_check(draft, profile):
+                LOGGER.info("ContraindicationCheckNode: Nothing to check, skipping LLM")
+                CONTRAINDICATION_CHECKS.inc(outcome="skipped")
+                state.has_contraindications = False
+                state.contraindication_details = ""
+                return state
+            # Table matches are hints for the LLM, which still checks the whole response
+            matches = self.interaction_index.check(draft, profile)
+            if matches:
+                known_interactions = "\n".join(f"- {match.describe()}" for match in matches)
+                fallback_details = known_interactions
+            else:
+                known_interactions = "None in the local table; check the whole response."
+        CONTRAINDICATION_CHECKS.inc(outcome="llm")
+
+        prompt_text = self.prompt.render(
             synthesized_response=state.synthesized_response or "",
-            user_profile=state.user_profile or {},
+            user_profile=PROFILE_BLOCKS.render(state.user_profile),
+            known_interactions=known_interactions,
         )
         messages = self.prepare_messages(state, prompt_text)
         response = await self.invoke_llm(messages)
         parsed_response = parse_json_response(response)
-        state.has_contraindications = parsed_response.get("has_contraindications", False)
-        state.contraindication_details = parsed_response.get("details", "")
+        # Unparseable output falls back to the indexed matches rather than "no problems"
+        state.has_contraindications = parsed_response.get(
+            "has_contraindications", bool(fallback_details)
+        )
+        state.contraindication_details = parsed_response.get("response", fallback_details)
         self.update_conversation_history(state, state.user_input, state.response)
         return state
 
 
 class AdjustmentNode(AgentNode):
-    prompt = load_prompt("7_adjustment.md")
+    prompt = load_template("7_adjustment.md")
+    history_token_budget = 300
 
     async def run(self, state: SessionState) -> SessionState:
         """Modifies response to resolve safety conflicts."""
         LOGGER.info("AdjustmentNode: Modifying response to resolve safety conflicts")
-        prompt_text = self.prompt.format(
+        prompt_text = self.prompt.render(
             synthesized_response=state.synthesized_response or "",
             contraindication_details=state.contraindication_details or "",
         )
@@ -316,19 +495,20 @@ class AdjustmentNode(AgentNode):
 
 
 class ResponseGeneratorNode(AgentNode):
-    prompt = load_prompt("response_generator.md")
+    prompt = load_template("response_generator.md")
+    history_token_budget = 800
 
     async def run(self, state: SessionState) -> SessionState:
         """Formats final response for the user."""
         LOGGER.info("ResponseGeneratorNode: Formatting final response for the user")
-        prompt_text = self.prompt.format(synthesized_response=state.synthesized_response or "")
+        prompt_text = self.prompt.render(synthesized_response=state.synthesized_response or "")
         messages = self.prepare_messages(state, prompt_text)
-        response = await self.invoke_llm(messages)
+        response = await self.stream_llm(messages)
         state.response = response
         self.update_conversation_history(state, state.user_input, state.response)
         return state
 
 
 class ResponseNode(BaseNode):
-    async def run(self, state: SessionState) -> dict[str, Any]:  # noqa: PLR6301
+    async def run(self, state: SessionState) -> dict[str, Any]:
         return {"response": state.response}
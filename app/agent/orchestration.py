@@ -1,17 +1,20 @@
 """Agent Orchestrator logic."""
 
-import asyncio
 import logging
-from typing import TYPE_CHECKING
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import TYPE_CHECKING, Any
 
 from langchain_core.runnables import RunnableConfig
-from langgraph.runtime import Runtime
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.types import Send
 
 if TYPE_CHECKING:
     from config.state import UserProfile
 
+from agent.deadlines import deadline_node, turn_deadline
 from agent.graph_builder import GraphBuilder
+from agent.interactions import default_interaction_index
 from agent.nodes import (
     AdjustmentNode,
     AllopathyAgentNode,
@@ -22,16 +25,28 @@ from agent.nodes import (
     EnsureDetailsNode,
     GeneralAgentNode,
     InputGuardrailNode,
+    InputNode,
     LifestyleAgentNode,
     ProfileExtractorNode,
     ResponseGeneratorNode,
     ResponseNode,
     SynthesisNode,
     TCMKampoAgentNode,
+    TriageNode,
 )
+from agent.preclassifier import Preclassifier
+from agent.profile import ProfileGate
+from agent.selector import SpecialistSelector
+from agent.speculation import SPECIALISTS, Speculation, SpeculationStats, speculative_node
 from agent.utils import configure_logging
+from config.settings import settings
 from config.state import Context, SessionState, UserProfile
-from core.llm import LLMClient
+from core.background import BackgroundWorkerPool
+from core.llm import BaseLLMClient, LLMClient
+from core.profiling import RequestProfiler
+from core.recording import RecordingLLMClient, RunRecorder, current_recording
+from core.tracing import trace_scope
+from memory.locks import SessionLocks
 from memory.postgres import PostgresClient
 
 configure_logging()
@@ -39,26 +54,57 @@ LOGGER = logging.getLogger("agent")
 LOGGER.setLevel(logging.INFO)
 
 
+def graph_input(state: SessionState) -> dict[str, Any]:
+    """The state's fields as graph input, sharing their values rather than dumping a deep copy.
+
+    Every field is passed, so unset optional fields also reset the checkpointed channels.
+    """
+    return dict(state)
+
+
+def state_from_graph(values: dict[str, Any]) -> SessionState:
+    """Build the final state from the graph's channel values without validating them again.
+
+    The values are the input state's fields and what the nodes set in code, so validating them
+    would only copy the conversation history once more.
+    """
+    return SessionState.model_construct(**values)
+
+
 class Nodes:
     """Container for all orchestration nodes."""
 
-    def __init__(self, llm_client: LLMClient) -> None:
-        self.input_guardrail = InputGuardrailNode(llm_client).run
+    def __init__(
+        self,
+        llm_client: BaseLLMClient,
+        preclassifier: Preclassifier | None = None,
+        profile_gate: ProfileGate | None = None,
+        specialist_selector: SpecialistSelector | None = None,
+    ) -> None:
+        self.input_guardrail = InputGuardrailNode(llm_client, preclassifier=preclassifier).run
+        self.triage = TriageNode(llm_client, preclassifier=preclassifier).run
         self.emergency_response = EmergencyResponseNode(llm_client).run
         self.response = ResponseNode().run
         self.general_agent = GeneralAgentNode(llm_client).run
         self.ensure_details = EnsureDetailsNode(llm_client).run
-        self.ancient_knowledge = AncientKnowledgeNode(llm_client).run
+        self.ancient_knowledge_router = InputNode().run
+        self.ancient_knowledge = AncientKnowledgeNode(llm_client, selector=specialist_selector).run
         self.allopathy_agent = AllopathyAgentNode(llm_client).run
         self.tcm_kampo_agent = TCMKampoAgentNode(llm_client).run
         self.ayurveda_agent = AyurvedaAgentNode(llm_client).run
         self.lifestyle_agent = LifestyleAgentNode(llm_client).run
         self.synthesis_node = SynthesisNode(llm_client).run
-        self.contraindication_check = ContraindicationCheckNode(llm_client).run
+        self.contraindication_check = ContraindicationCheckNode(
+            llm_client,
+            interaction_index=default_interaction_index()
+            if settings.INTERACTION_INDEX_ENABLED
+            else None,
+        ).run
         self.adjustment_node = AdjustmentNode(llm_client).run
         self.response_generator = ResponseGeneratorNode(llm_client).run
-        self.response_generator = ResponseGeneratorNode(llm_client).run
-        self.profile_extractor = ProfileExtractorNode(llm_client).run
+        profile_extractor = ProfileExtractorNode(llm_client, gate=profile_gate)
+        self.profile_extractor = profile_extractor.run
+        self.extract_profile_patch = profile_extractor.extract
 
 
 class Edges:
@@ -89,16 +135,35 @@ class Edges:
             return "ancient_knowledge_router"
         return "response"
 
+    @staticmethod
+    def route_triage(state: SessionState) -> str:
+        """Route based on the fused triage call.
+
+        Emergencies and general queries branch as after the input guardrail; medical queries
+        branch on detail sufficiency as after ensure_details.
+        """
+        if state.is_emergency:
+            return "emergency_response"
+        elif state.is_medical:
+            return Edges.route_ensure_details(state)
+        else:
+            return "general_agent"
+
     @staticmethod
     def route_ancient_knowledge_router(state: SessionState) -> str | list[Send]:
         """Route based on ancient knowledge router decision.
 
-        If needs ancient knowledge, go to ancient_knowledge.
-        Otherwise, go to response.
+        If ancient knowledge was already gathered, go to response.
+        Otherwise, go to ancient_knowledge.
         """
         if state.gathered_ancient_knowledge:
-            return "ancient_knowledge"
-        return "response"
+            return "response"
+        return "ancient_knowledge"
+
+    @staticmethod
+    def route_specialists(state: SessionState) -> list[Send]:
+        """Fan out to the specialists ancient_knowledge chose for the query."""
+        return [Send(name, state) for name in state.selected_specialists or SPECIALISTS]
 
     @staticmethod
     def route_contraindication_check(state: SessionState) -> str:
@@ -113,18 +178,60 @@ class Edges:
 
 
 class Orchestrator:
-    def __init__(self, llm_client: LLMClient, postgres_client: PostgresClient):
+    def __init__(self, llm_client: BaseLLMClient, postgres_client: PostgresClient):
+        self.recorder = (
+            RunRecorder(settings.RECORDING_DIR, settings.RECORDING_SAMPLE_RATE)
+            if settings.RECORDING_DIR
+            else None
+        )
+        if self.recorder is not None:
+            llm_client = RecordingLLMClient(llm_client)
         self.llm_client = llm_client
         self.postgres_client = postgres_client
-        self.nodes = Nodes(llm_client)
+        self.preclassifier = Preclassifier() if settings.LOCAL_PRECLASSIFIER_ENABLED else None
+        self.profile_gate = ProfileGate() if settings.PROFILE_EXTRACTION_GATE_ENABLED else None
+        self.specialist_selector = (
+            SpecialistSelector() if settings.SPECIALIST_SELECTION_ENABLED else None
+        )
+        self.nodes = Nodes(
+            llm_client, self.preclassifier, self.profile_gate, self.specialist_selector
+        )
         self.edges = Edges()
 
+        self.speculation_stats = SpeculationStats()
+        self.specialists = {name: getattr(self.nodes, name) for name in SPECIALISTS}
+        if settings.SPECULATIVE_SPECIALISTS:
+            for name, node in self.specialists.items():
+                setattr(self.nodes, name, speculative_node(name, node, self.speculation_stats))
+        for name in SPECIALISTS:
+            setattr(self.nodes, name, deadline_node(name, getattr(self.nodes, name)))
+
+        self.profile_jobs = BackgroundWorkerPool(
+            "profile_extraction",
+            max_workers=settings.PROFILE_EXTRACTION_WORKERS,
+            max_queued=settings.PROFILE_EXTRACTION_QUEUE_SIZE,
+            submit_timeout=settings.PROFILE_EXTRACTION_SUBMIT_TIMEOUT_SECONDS,
+        )
+        self.session_locks = (
+            SessionLocks(
+                postgres_client,
+                ttl_seconds=settings.SESSION_LEASE_TTL_SECONDS,
+                wait_timeout=settings.SESSION_LOCK_TIMEOUT_SECONDS,
+            )
+            if settings.SESSION_LOCK_ENABLED
+            else None
+        )
+        self.profiler = RequestProfiler(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+
         self.graph_builder = GraphBuilder(self)
         self.graph = self.graph_builder.build()
 
+    def use_checkpointer(self, checkpointer: BaseCheckpointSaver) -> None:
+        """Recompile the graph to keep its checkpoints in `checkpointer`."""
+        self.graph = self.graph_builder.build(checkpointer)
+
     async def load_state_memory(self, session_id: str) -> SessionState:
         """Load state memory from Postgres."""
-        await self.postgres_client.create_tables()
         state = await self.postgres_client.get_state(session_id)
         if state:
             return state
@@ -143,47 +250,152 @@ class Orchestrator:
         await self.postgres_client.save_user_profile(profile)
 
     async def run_profile_extraction_background(self, state: SessionState) -> None:
-        """Run profile extraction in background."""
-        try:
-            # Create a copy to avoid side effects and clear response for input-only extraction
-            extraction_state = state.model_copy(deep=True)
-
-            LOGGER.info("Starting background profile extraction")
-            state = await self.nodes.profile_extractor(extraction_state)
-            LOGGER.info("Background profile extraction completed.")
+        """Extract profile updates from the turn's input and save them."""
+        if state.user_id is None:
+            LOGGER.info("No user ID for the turn, skipping background profile extraction")
+            return
+        LOGGER.info("Starting background profile extraction")
+        patch = await self.nodes.extract_profile_patch(state)
+        if not patch:
+            LOGGER.info("Background profile extraction found no changes.")
+            return
+        await self.postgres_client.update_user_profile(state.user_id, patch)
+        LOGGER.info("Background profile extraction completed and saved.")
+
+    async def submit_profile_extraction(self, state: SessionState) -> None:
+        """Queue profile extraction for the turn; a newer turn of the user supersedes it.
+
+        The graph input and speculative specialists share the values of `state` (see
+        `graph_input`), so the job gets its own snapshot of the fields it reads. The history list
+        is copied because nodes append to it in place; its messages, the summary string and the
+        profile are only ever replaced, never mutated, so they are shared.
+        """
+        snapshot = SessionState.model_construct(
+            session_id=state.session_id,
+            user_id=state.user_id,
+            user_input=state.user_input,
+            conversation_history=list(state.conversation_history),
+            history_summary=state.history_summary,
+            user_profile=state.user_profile,
+        )
+        await self.profile_jobs.submit(
+            state.user_id or state.session_id,
+            lambda: self.run_profile_extraction_background(snapshot),
+        )
+
+    async def prepare_state(
+        self,
+        session_id: str,
+        user_id: str,
+        user_input: str,
+        prefetched: tuple[SessionState | None, UserProfile | None] | None = None,
+    ) -> SessionState:
+        """Load session state and user profile for a new turn, unless already `prefetched`."""
+        if prefetched is None:
+            prefetched = await self.postgres_client.get_state_and_profile(session_id, user_id)
+        state, user_profile = prefetched
+        state = state or SessionState(session_id=session_id)
+        state.user_input = user_input
+        state.user_id = user_id
+        state.user_profile = user_profile or UserProfile(user_id=user_id)
+        LOGGER.info("Loaded state memory and user profile")
+        return state
 
-            await self.save_user_profile(state.user_profile)
-            LOGGER.info("Background profile extraction completed and saved.")
+    def start_speculation(self, state: SessionState) -> Speculation | None:
+        """Start the specialists for this turn ahead of routing, when speculative mode is on.
 
-        except Exception as e:
-            LOGGER.error(f"Background profile extraction failed: {e}")
+        Only the specialists the selector will choose for the query are started.
+        """
+        if not settings.SPECULATIVE_SPECIALISTS:
+            return None
+        specialists = self.specialists
+        if self.specialist_selector is not None:
+            chosen = self.specialist_selector.choose(state.user_input or "", state.user_profile)
+            specialists = {name: specialists[name] for name in chosen}
+        return Speculation.start(specialists, state, self.speculation_stats)
+
+    def session_lock(self, session_id: str) -> AbstractAsyncContextManager[None]:
+        """Serialize the load, graph run and save of a session's turns across workers.
+
+        Raises:
+            SessionBusyError: On entry, when another turn keeps the session for too long.
+        """
+        if self.session_locks is None:
+            return nullcontext()
+        return self.session_locks.hold(session_id)
+
+    def recording(
+        self, trace_id: str, session_id: str, user_id: str, user_input: str
+    ) -> AbstractAsyncContextManager[Any]:
+        """Record the run for offline replay, when recording is on (see `core.recording`)."""
+        if self.recorder is None:
+            return nullcontext()
+        return self.recorder.capture(trace_id, session_id, user_id, user_input)
 
-    async def run(self, session_id: str, user_id: str, user_input: str) -> dict:
-        """Run the orchestrator."""
+    @staticmethod
+    def run_config(session_id: str, trace_id: str) -> RunnableConfig:
+        return {"configurable": {"thread_id": session_id}, "metadata": {"trace_id": trace_id}}
+
+    async def run(
+        self,
+        session_id: str,
+        user_id: str,
+        user_input: str,
+        trace_id: str | None = None,
+        profile: bool = False,
+        prefetched: tuple[SessionState | None, UserProfile | None] | None = None,
+    ) -> dict:
+        """Run the orchestrator.
+
+        Turns of one session are serialized across workers (see `session_lock`). Logs, metrics
+        and background work of the run carry `trace_id`, generated if not given.
+        With `profile`, or when profiling was armed for the session, the run is profiled and the
+        result stored under the trace ID. `prefetched` is the session state and user profile
+        when the caller already loaded them (see `BatchRunner`).
+        """
+        with trace_scope(trace_id) as active_trace_id:
+            async with (
+                self.session_lock(session_id),
+                self.recording(active_trace_id, session_id, user_id, user_input),
+            ):
+                if profile or self.profiler.consume_armed(session_id):
+                    async with self.profiler.capture(active_trace_id):
+                        return await self._run(
+                            session_id, user_id, user_input, active_trace_id, prefetched
+                        )
+                return await self._run(session_id, user_id, user_input, active_trace_id, prefetched)
+
+    async def _run(
+        self,
+        session_id: str,
+        user_id: str,
+        user_input: str,
+        trace_id: str,
+        prefetched: tuple[SessionState | None, UserProfile | None] | None = None,
+    ) -> dict:
         LOGGER.info("Orchestrator started.")
-        config: RunnableConfig = {"configurable": {"thread_id": session_id}}
-        state = await self.load_state_memory(session_id)
-        LOGGER.info("Loaded state memory")
-        state.user_input = user_input
-        state.user_id = user_id
-
-        user_profile = await self.load_user_profile(user_id)
-        state.user_profile = user_profile or UserProfile(user_id=user_id)
-        LOGGER.info("Loaded user profile")
+        config = self.run_config(session_id, trace_id)
+        state = await self.prepare_state(session_id, user_id, user_input, prefetched)
+        if (recording := current_recording()) is not None:
+            recording.initial_state = state.model_dump(mode="json")
 
         try:
-            # Start background profile extraction
-            LOGGER.info("Starting background profile extraction")
-            asyncio.create_task(self.run_profile_extraction_background(state))
-
-            context = Context()
-            state_dict = await self.graph.ainvoke(
-                state.model_dump(), config, runtime=Runtime(context=context), stream_mode="values"
-            )
+            await self.submit_profile_extraction(state)
+
+            context = Context(speculation=self.start_speculation(state), deadline=turn_deadline())
+            try:
+                state_dict = await self.graph.ainvoke(
+                    graph_input(state), config, context=context, stream_mode="values"
+                )
+            finally:
+                if context.speculation:
+                    context.speculation.cancel_unused()
             LOGGER.info("Orchestrator completed.")
 
-            state_from_result = SessionState(**state_dict)
+            state_from_result = state_from_graph(state_dict)
             await self.save_state_memory(state_from_result)
+            if recording is not None:
+                recording.final_state = state_from_result.model_dump(mode="json")
 
             return state_from_result.model_dump()
 
@@ -191,6 +403,72 @@ class Orchestrator:
             LOGGER.exception("Orchestrator failed.")
             raise RuntimeError(f"Orchestrator failed: {e}") from e
 
+    async def run_stream(
+        self, session_id: str, user_id: str, user_input: str, trace_id: str | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Run the orchestrator, yielding events as the graph advances.
+
+        Yields `node` events when a node finishes, `token` events for final-answer tokens and a
+        last `final` event carrying the same payload `run` returns.
+        """
+        with trace_scope(trace_id) as active_trace_id:
+            async with (
+                self.session_lock(session_id),
+                self.recording(active_trace_id, session_id, user_id, user_input),
+            ):
+                async for event in self._run_stream(
+                    session_id, user_id, user_input, active_trace_id
+                ):
+                    yield event
+
+    async def _run_stream(
+        self, session_id: str, user_id: str, user_input: str, trace_id: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        LOGGER.info("Orchestrator stream started.")
+        config = self.run_config(session_id, trace_id)
+        state = await self.prepare_state(session_id, user_id, user_input)
+        if (recording := current_recording()) is not None:
+            recording.initial_state = state.model_dump(mode="json")
+
+        try:
+            await self.submit_profile_extraction(state)
+
+            context = Context(speculation=self.start_speculation(state), deadline=turn_deadline())
+            state_dict: dict[str, Any] = {}
+            # With several stream modes each item is a (mode, chunk) pair
+            mode: str
+            chunk: Any
+            try:
+                async for mode, chunk in self.graph.astream(
+                    graph_input(state),
+                    config,
+                    context=context,
+                    stream_mode=["updates", "custom", "values"],
+                ):
+                    if mode == "updates":
+                        for node_name in chunk:
+                            if not node_name.startswith("__"):
+                                yield {"event": "node", "node": node_name}
+                    elif mode == "custom":
+                        yield chunk
+                    else:
+                        state_dict = chunk
+            finally:
+                if context.speculation:
+                    context.speculation.cancel_unused()
+            LOGGER.info("Orchestrator stream completed.")
+
+            state_from_result = state_from_graph(state_dict)
+            await self.save_state_memory(state_from_result)
+            if recording is not None:
+                recording.final_state = state_from_result.model_dump(mode="json")
+
+            yield {"event": "final", "data": state_from_result.model_dump()}
+
+        except Exception as e:
+            LOGGER.exception("Orchestrator failed.")
+            raise RuntimeError(f"Orchestrator failed: {e}") from e
+
 
 if __name__ == "__main__":
     orchestrator = Orchestrator(LLMClient())
@@ -0,0 +1,212 @@
+"""Local pre-classification of user input ahead of the LLM guardrail."""
+
+import re
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any
+
+from core.matcher import PhraseMatch, PhraseMatcher
+from core.metrics import PRECLASSIFIER_VERDICTS
+
+EMERGENCY_PHRASES = (
+    "chest pain",
+    "crushing chest",
+    "heart attack",
+    "can't breathe",
+    "cannot breathe",
+    "can not breathe",
+    "difficulty breathing",
+    "trouble breathing",
+    "struggling to breathe",
+    "not breathing",
+    "stopped breathing",
+    "choking",
+    "unconscious",
+    "passed out",
+    "unresponsive",
+    "severe bleeding",
+    "bleeding heavily",
+    "won't stop bleeding",
+    "having a stroke",
+    "stroke symptoms",
+    "face drooping",
+    "slurred speech",
+    "seizure",
+    "overdose",
+    "overdosed",
+    "suicidal",
+    "suicide",
+    "kill myself",
+    "end my life",
+    "want to die",
+    "self harm",
+    "hurt myself",
+    "anaphylaxis",
+    "anaphylactic",
+    "throat is swelling",
+    "throat is closing",
+)
+
+SMALLTALK_PHRASES = (
+    "hi",
+    "hello",
+    "hey",
+    "hiya",
+    "yo",
+    "there",
+    "good morning",
+    "good afternoon",
+    "good evening",
+    "good night",
+    "thanks",
+    "thank you",
+    "thx",
+    "ty",
+    "so much",
+    "very much",
+    "a lot",
+    "cheers",
+    "ok",
+    "okay",
+    "cool",
+    "great",
+    "nice",
+    "bye",
+    "goodbye",
+    "see you",
+    "how are you",
+    "who are you",
+    "what can you do",
+)
+
+# Medical vocabulary vetoes the smalltalk shortcut ("thanks, my head still hurts")
+MEDICAL_TERMS = (
+    "pain",
+    "ache",
+    "hurt",
+    "hurts",
+    "sick",
+    "ill",
+    "fever",
+    "cough",
+    "cold",
+    "flu",
+    "headache",
+    "migraine",
+    "nausea",
+    "dizzy",
+    "rash",
+    "allergy",
+    "allergic",
+    "symptom",
+    "symptoms",
+    "medicine",
+    "medication",
+    "pill",
+    "pills",
+    "dose",
+    "doctor",
+    "blood",
+    "pressure",
+    "diabetes",
+    "pregnant",
+    "sleep",
+    "diet",
+    "stress",
+    "anxiety",
+)
+
+# Words just before an emergency phrase that make it a denial or a history, not an emergency
+NEGATION_CUES = frozenset(
+    {"no", "not", "don't", "dont", "never", "without", "denies", "had", "history", "past"}
+)
+NEGATION_WINDOW = 3
+SMALLTALK_MAX_WORDS = 8
+
+_WORD_PATTERN = re.compile(r"[\w']+")
+
+
+class Verdict(str, Enum):
+    EMERGENCY = "emergency"
+    SMALLTALK = "smalltalk"
+
+
+@dataclass
+class PreclassifierStats:
+    calls: int = 0
+    emergency: int = 0
+    smalltalk: int = 0
+    deferred: int = 0
+
+    @property
+    def bypass_rate(self) -> float:
+        return (self.emergency + self.smalltalk) / self.calls if self.calls else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self), "bypass_rate": self.bypass_rate}
+
+
+def default_matcher() -> PhraseMatcher:
+    phrases = {phrase: "medical" for phrase in MEDICAL_TERMS}
+    phrases.update({phrase: "smalltalk" for phrase in SMALLTALK_PHRASES})
+    phrases.update({phrase: "emergency" for phrase in EMERGENCY_PHRASES})
+    return PhraseMatcher(phrases)
+
+
+_DEFAULT_MATCHER = default_matcher()
+
+
+class Preclassifier:
+    """Decides clear-cut inputs locally so they skip the LLM guardrail call.
+
+    Unnegated emergency phrases route to the emergency response and messages made up entirely of
+    greetings or thanks route to the general agent. Anything else returns None and is left to
+    the LLM.
+    """
+
+    def __init__(self, matcher: PhraseMatcher | None = None) -> None:
+        self.matcher = matcher or _DEFAULT_MATCHER
+        self.stats = PreclassifierStats()
+
+    def classify(self, text: str) -> Verdict | None:
+        self.stats.calls += 1
+        verdict = self._classify(text.lower().replace("’", "'"))
+        if verdict is Verdict.EMERGENCY:
+            self.stats.emergency += 1
+        elif verdict is Verdict.SMALLTALK:
+            self.stats.smalltalk += 1
+        else:
+            self.stats.deferred += 1
+        PRECLASSIFIER_VERDICTS.inc(verdict=verdict.value if verdict else "deferred")
+        return verdict
+
+    def _classify(self, text: str) -> Verdict | None:
+        matches = self.matcher.find(text)
+        words = [(m.start(), m.end(), m.group()) for m in _WORD_PATTERN.finditer(text)]
+
+        for match in matches:
+            if match.label == "emergency" and not self._negated(match, words):
+                return Verdict.EMERGENCY
+        if any(match.label == "medical" for match in matches):
+            return None
+
+        smalltalk = [m for m in matches if m.label == "smalltalk"]
+        if (
+            words
+            and len(words) <= SMALLTALK_MAX_WORDS
+            and all(_covered(start, end, smalltalk) for start, end, _ in words)
+        ):
+            return Verdict.SMALLTALK
+        return None
+
+    @staticmethod
+    def _negated(match: PhraseMatch, words: list[tuple[int, int, str]]) -> bool:
+        preceding = [word for _, end, word in words if end <= match.start]
+        return any(word in NEGATION_CUES for word in preceding[-NEGATION_WINDOW:])
+
+    def stats_snapshot(self) -> dict[str, Any]:
+        return self.stats.snapshot()
+
+
+def _covered(start: int, end: int, matches: list[PhraseMatch]) -> bool:
+    return any(m.start <= start and end <= m.end for m in matches)
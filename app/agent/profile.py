@@ -0,0 +1,236 @@
+"""Profile extraction gate and field-level profile patches."""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from config.state import UserProfile
+from core.matcher import PhraseMatcher
+
+LOGGER = logging.getLogger("profile")
+LOGGER.setLevel(logging.INFO)
+
+# Phrases that suggest the input states something the profile stores, grouped by profile field
+PROFILE_CUES = {
+    "name": ("my name", "call me", "i'm called"),
+    "biometrics": (
+        "years old",
+        "year old",
+        "yrs old",
+        "my age",
+        "weigh",
+        "weight",
+        "tall",
+        "height",
+        "bmi",
+        "male",
+        "female",
+        "man",
+        "woman",
+        "pregnant",
+    ),
+    "demographics": (
+        "i live",
+        "living in",
+        "i'm from",
+        "i am from",
+        "moved to",
+        "based in",
+        "my city",
+        "my country",
+    ),
+    "diet": (
+        "vegetarian",
+        "vegan",
+        "pescatarian",
+        "keto",
+        "gluten",
+        "lactose",
+        "dairy",
+        "halal",
+        "kosher",
+        "my diet",
+        "i eat",
+        "i don't eat",
+        "i avoid",
+        "intolerant",
+        "intolerance",
+    ),
+    "allergies": ("allergic", "allergy", "allergies"),
+    "medical_history": (
+        "i take",
+        "i'm taking",
+        "i am taking",
+        "i'm on",
+        "i am on",
+        "prescribed",
+        "medication",
+        "medications",
+        "medicine",
+        "pills",
+        "supplement",
+        "supplements",
+        "vitamin",
+        "diagnosed",
+        "history of",
+        "i have had",
+        "i suffer",
+        "chronic",
+        "diabetes",
+        "diabetic",
+        "hypertension",
+        "high blood pressure",
+        "asthma",
+        "thyroid",
+        "cholesterol",
+        "arthritis",
+        "pcos",
+        "depression",
+        "anxiety",
+        "surgery",
+    ),
+    "lifestyle": (
+        "i smoke",
+        "smoker",
+        "i drink",
+        "alcohol",
+        "i exercise",
+        "i work out",
+        "gym",
+        "yoga",
+        "i run",
+        "i sleep",
+        "night shift",
+        "my job",
+        "stressed",
+        "desk job",
+    ),
+    "health_goals": ("my goal", "i want to", "trying to", "lose weight", "gain weight"),
+    "ayurveda": ("dosha", "vata", "pitta", "kapha", "prakriti"),
+    "preferences": (
+        "i prefer",
+        "i'd prefer",
+        "i would prefer",
+        "i don't want",
+        "i do not want",
+        "i don't trust",
+        "i don't believe in",
+        "ayurveda",
+        "ayurvedic",
+        "tcm",
+        "kampo",
+        "chinese medicine",
+        "acupuncture",
+        "allopathy",
+        "western medicine",
+        "conventional medicine",
+    ),
+}
+
+# Numbers carry ages, doses, weights and heights ("45", "5mg", "70 kg")
+_NUMBER_PATTERN = re.compile(r"\d")
+
+
+def default_matcher() -> PhraseMatcher:
+    return PhraseMatcher(
+        {phrase: field for field, phrases in PROFILE_CUES.items() for phrase in phrases}
+    )
+
+
+_DEFAULT_MATCHER = default_matcher()
+
+
+class ProfileGate:
+    """Decides locally whether an input may contain profile facts worth an extraction call.
+
+    Tuned for recall: any cue phrase or number lets the input through. Inputs without either
+    ("thanks", "what else can I try?") skip the extraction LLM call.
+    """
+
+    def __init__(self, matcher: PhraseMatcher | None = None) -> None:
+        self.matcher = matcher or _DEFAULT_MATCHER
+
+    def should_extract(self, text: str) -> bool:
+        text = text.lower().replace("’", "'")
+        return bool(_NUMBER_PATTERN.search(text) or self.matcher.find(text))
+
+
+@lru_cache
+def _field_adapter(model: type[BaseModel], field: str) -> TypeAdapter:
+    annotation = model.model_fields[field].annotation
+    assert annotation is not None, f"{model.__name__}.{field} has no annotation"
+    return TypeAdapter(annotation)
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def profile_patch(profile: UserProfile, updates: dict[str, Any]) -> dict[str, Any]:
+    """Turn extractor output into the changes it makes to `profile`.
+
+    Only known fields whose validated value differs from the current one are kept. Nested
+    sections (biometrics, diet, ...) map to a dict of their changed sub-fields; empty values
+    and values that fail validation are dropped.
+
+    Returns:
+        Mapping of changed top-level field to its new value or changed sub-fields.
+    """
+    patch: dict[str, Any] = {}
+    for field, value in updates.items():
+        if field == "user_id" or field not in UserProfile.model_fields:
+            LOGGER.warning(f"Attempted to set invalid UserProfile field: {field}")
+            continue
+        current = getattr(profile, field)
+        if isinstance(current, BaseModel):
+            if isinstance(value, dict):
+                changes = _section_patch(current, value)
+                if changes:
+                    patch[field] = changes
+            continue
+        changed = _validated_change(UserProfile, field, current, value)
+        if changed is not None:
+            patch[field] = changed
+    return patch
+
+
+def _section_patch(section: BaseModel, updates: dict[str, Any]) -> dict[str, Any]:
+    changes = {}
+    for field, value in updates.items():
+        if field not in type(section).model_fields:
+            LOGGER.warning(f"Attempted to set invalid UserProfile field: {field}")
+            continue
+        changed = _validated_change(type(section), field, getattr(section, field), value)
+        if changed is not None:
+            changes[field] = changed
+    return changes
+
+
+def _validated_change(model: type[BaseModel], field: str, current: Any, value: Any) -> Any:
+    if _is_empty(value):
+        return None
+    try:
+        value = _field_adapter(model, field).validate_python(value)
+    except ValidationError:
+        LOGGER.warning(f"Ignoring invalid value for profile field {field}: {value!r}")
+        return None
+    return None if value == current else value
+
+
+def apply_profile_patch(profile: UserProfile, patch: dict[str, Any]) -> UserProfile:
+    """Return a new profile with `patch` applied; unchanged sections are shared, not copied.
+
+    The patch must come from `profile_patch`, whose values are already validated.
+    """
+    if not patch:
+        return profile
+    update = {
+        field: getattr(profile, field).model_copy(update=value)
+        if isinstance(value, dict)
+        else value
+        for field, value in patch.items()
+    }
+    return profile.model_copy(update=update)
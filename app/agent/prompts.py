@@ -0,0 +1,99 @@
+"""Prompt assembly: precompiled templates and a shared, memoized user profile block."""
+
+import string
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from config.state import UserProfile
+from core.metrics import PROFILE_BLOCK_CACHE_LOOKUPS
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+NO_PROFILE = "No user profile available yet."
+
+
+class PromptTemplate:
+    """A prompt file parsed once into literal segments and placeholders.
+
+    Rendering joins the segments instead of re-parsing the template on every call, and the text
+    before the first placeholder (`static_prefix`) is byte-identical across every render.
+    """
+
+    def __init__(self, text: str, name: str = "<string>") -> None:
+        self.name = name
+        self.segments: list[tuple[str, str | None]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"{name}: format specs are not supported in {{{field}}}")
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"{name}: invalid placeholder {{{field}}}")
+            self.segments.append((literal, field))
+        self.fields = frozenset(field for _, field in self.segments if field is not None)
+        self.static_prefix = self.segments[0][0] if self.segments else ""
+
+    @classmethod
+    def load(cls, filename: str) -> "PromptTemplate":
+        return cls((PROMPTS_DIR / filename).read_text(), filename)
+
+    def render(self, **values: Any) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"{self.name}: missing values for {sorted(missing)}")
+        return "".join(
+            [literal + (str(values[field]) if field else "") for literal, field in self.segments]
+        )
+
+
+@lru_cache
+def load_template(filename: str) -> PromptTemplate:
+    """Return the precompiled template for a file in app/prompts, shared by all nodes."""
+    return PromptTemplate.load(filename)
+
+
+@dataclass
+class ProfileBlockStats:
+    hits: int = 0
+    misses: int = 0
+
+
+class ProfileBlockCache:
+    """Memoizes the rendered JSON of user profiles.
+
+    Profiles are replaced rather than mutated when they change (see `BaseNode.update_profile`),
+    so the object identity is the profile version. Entries hold weak references and a small LRU
+    bound, so finished turns do not keep their profiles alive.
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        self.stats = ProfileBlockStats()
+        self._entries: OrderedDict[int, tuple[weakref.ref, str]] = OrderedDict()
+
+    def render(self, profile: UserProfile | None) -> str:
+        if not profile:
+            return NO_PROFILE
+        key = id(profile)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0]() is profile:
+            self.stats.hits += 1
+            PROFILE_BLOCK_CACHE_LOOKUPS.inc(result="hit")
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.stats.misses += 1
+        PROFILE_BLOCK_CACHE_LOOKUPS.inc(result="miss")
+        block = profile.model_dump_json(indent=2, exclude_none=True)
+        self._entries[key] = (weakref.ref(profile), block)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return block
+
+    def stats_snapshot(self) -> dict[str, int]:
+        return asdict(self.stats)
+
+
+PROFILE_BLOCKS = ProfileBlockCache()
@@ -0,0 +1,206 @@
+"""Local, query-aware choice of the specialists consulted for a medical turn."""
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from agent.preclassifier import MEDICAL_TERMS
+from agent.speculation import SPECIALISTS
+from config.state import UserProfile
+from core.matcher import PhraseMatch, PhraseMatcher
+from core.metrics import SPECIALISTS_SKIPPED
+
+# Names users give each tradition, for explicit requests and opt-outs
+SPECIALIST_ALIASES = {
+    "allopathy_agent": (
+        "allopathy",
+        "allopathic",
+        "western medicine",
+        "modern medicine",
+        "conventional medicine",
+    ),
+    "tcm_kampo_agent": (
+        "tcm",
+        "tcm_kampo",
+        "kampo",
+        "chinese medicine",
+        "traditional chinese medicine",
+        "acupuncture",
+    ),
+    "ayurveda_agent": ("ayurveda", "ayurvedic"),
+    "lifestyle_agent": ("lifestyle",),
+}
+
+# Concepts only one tradition speaks to bring that specialist in
+TRADITION_TOPICS = {
+    "tcm_kampo_agent": ("qi", "yin", "yang", "meridian", "meridians"),
+    "ayurveda_agent": ("dosha", "vata", "pitta", "kapha", "prakriti", "agni"),
+}
+
+# Everyday wellbeing questions the lifestyle specialist answers on its own
+LIFESTYLE_TOPICS = (
+    "water",
+    "hydration",
+    "hydrated",
+    "drink",
+    "sleep",
+    "bedtime",
+    "nap",
+    "exercise",
+    "workout",
+    "walk",
+    "walking",
+    "steps",
+    "stretching",
+    "posture",
+    "diet",
+    "nutrition",
+    "eat",
+    "eating",
+    "meal",
+    "meals",
+    "snack",
+    "routine",
+    "habit",
+    "habits",
+    "screen time",
+    "meditation",
+    "stress",
+    "lose weight",
+    "weight loss",
+)
+
+# Symptoms and conditions call for every perspective; lifestyle words are left out of this list
+SYMPTOM_TERMS = tuple(term for term in MEDICAL_TERMS if term not in LIFESTYLE_TOPICS) + (
+    "infection",
+    "injury",
+    "swelling",
+    "swollen",
+    "vomiting",
+    "diarrhea",
+    "constipation",
+    "insomnia",
+    "bleeding",
+    "itching",
+    "sore",
+)
+
+EXCLUSION_CUES = frozenset(
+    {"no", "not", "without", "skip", "don't", "dont", "never", "avoid", "except", "exclude"}
+)
+EXCLUSIVE_CUES = frozenset({"only", "just", "purely", "strictly"})
+CUE_WINDOW = 3
+
+# When every tradition is opted out of, conventional advice is still given
+FALLBACK_SPECIALISTS = ("allopathy_agent",)
+
+_WORD_PATTERN = re.compile(r"[\w']+")
+
+
+@dataclass
+class SelectorStats:
+    calls: int = 0
+    consulted: int = 0
+    skipped: int = 0
+
+    @property
+    def specialists_per_turn(self) -> float:
+        return self.consulted / self.calls if self.calls else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self), "specialists_per_turn": self.specialists_per_turn}
+
+
+def default_matcher() -> PhraseMatcher:
+    phrases = {term: "symptom" for term in SYMPTOM_TERMS}
+    phrases.update({topic: "lifestyle" for topic in LIFESTYLE_TOPICS})
+    for name, topics in TRADITION_TOPICS.items():
+        phrases.update({topic: f"topic:{name}" for topic in topics})
+    for name, aliases in SPECIALIST_ALIASES.items():
+        phrases.update({alias: f"alias:{name}" for alias in aliases})
+    return PhraseMatcher(phrases)
+
+
+_DEFAULT_MATCHER = default_matcher()
+
+
+class SpecialistSelector:
+    """Picks the specialists worth an LLM call for a query.
+
+    Explicit requests ("only ayurveda") and opt-outs ("no TCM please"), including those kept in
+    the profile's preferences, come first. Otherwise symptoms consult every specialist, while
+    everyday wellbeing questions and concepts of a single tradition ("my vata") consult only the
+    lifestyle specialist or that tradition, plus any tradition the query or the profile's
+    preferences name. Anything unrecognised consults every specialist.
+    """
+
+    def __init__(self, matcher: PhraseMatcher | None = None) -> None:
+        self.matcher = matcher or _DEFAULT_MATCHER
+        self.stats = SelectorStats()
+
+    def select(self, text: str, profile: UserProfile | None = None) -> list[str]:
+        """Choose the specialists for a turn and record the choice."""
+        selected = self.choose(text, profile)
+        self.stats.calls += 1
+        self.stats.consulted += len(selected)
+        self.stats.skipped += len(SPECIALISTS) - len(selected)
+        for name in SPECIALISTS:
+            if name not in selected:
+                SPECIALISTS_SKIPPED.inc(specialist=name)
+        return selected
+
+    def choose(self, text: str, profile: UserProfile | None = None) -> list[str]:
+        """Choose the specialists for a turn, in `SPECIALISTS` order, without recording it."""
+        text = text.lower().replace("’", "'")
+        matches = self.matcher.find(text)
+        words = [(m.start(), m.group()) for m in _WORD_PATTERN.finditer(text)]
+        preferences = profile.preferences if profile else None
+
+        excluded = set(self._traditions((preferences and preferences.excluded_traditions) or []))
+        exclusive, named = set(), set()
+        for match in matches:
+            if not match.label.startswith("alias:"):
+                continue
+            name = match.label.removeprefix("alias:")
+            cues = _preceding(match, words)
+            if cues & EXCLUSION_CUES:
+                excluded.add(name)
+            elif cues & EXCLUSIVE_CUES:
+                exclusive.add(name)
+            else:
+                named.add(name)
+
+        # "medicine" inside "chinese medicine" names a tradition, not a symptom
+        aliases = [m for m in matches if m.label.startswith("alias:")]
+        labels = {
+            m.label
+            for m in matches
+            if not any(a.start <= m.start and m.end <= a.end and a != m for a in aliases)
+        }
+        topics = {label.removeprefix("topic:") for label in labels if label.startswith("topic:")}
+        if exclusive:
+            chosen = exclusive
+        elif "symptom" in labels or not (topics or "lifestyle" in labels):
+            chosen = set(SPECIALISTS)
+        else:
+            preferred = (preferences and preferences.preferred_traditions) or []
+            chosen = {*topics, *named, *self._traditions(preferred)}
+            if "lifestyle" in labels:
+                chosen.add("lifestyle_agent")
+
+        selected = [name for name in SPECIALISTS if name in chosen and name not in excluded]
+        return selected or list(FALLBACK_SPECIALISTS)
+
+    def _traditions(self, names: list[str]) -> list[str]:
+        """Map free-text tradition names, as stored in the profile, to specialists."""
+        matches = self.matcher.find(" , ".join(names).lower().replace("_", " "))
+        return [m.label.removeprefix("alias:") for m in matches if m.label.startswith("alias:")]
+
+    def stats_snapshot(self) -> dict[str, Any]:
+        return self.stats.snapshot()
+
+
+def _preceding(match: PhraseMatch, words: list[tuple[int, str]]) -> set[str]:
+    """The few words just before a match, where "no" or "only" would qualify it."""
+    preceding = [word for start, word in words if start < match.start]
+    return set(preceding[-CUE_WINDOW:])
@@ -0,0 +1,105 @@
+"""Speculative execution of the specialist agents ahead of routing."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, Protocol
+
+from langgraph.runtime import Runtime
+
+from config.state import Context, SessionState
+from core.metrics import SPECULATIVE_SPECIALISTS
+
+LOGGER = logging.getLogger("agent")
+LOGGER.setLevel(logging.INFO)
+
+SPECIALISTS = ("allopathy_agent", "tcm_kampo_agent", "ayurveda_agent", "lifestyle_agent")
+
+SpecialistNode = Callable[[SessionState], Awaitable[dict[str, Any]]]
+
+
+class ContextSpecialistNode(Protocol):
+    """A specialist wrapper that also reads the run's context, such as `speculative_node`."""
+
+    def __call__(
+        self, state: SessionState, runtime: Runtime[Context]
+    ) -> Awaitable[dict[str, Any]]: ...
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    committed: int = 0
+    wasted: int = 0
+    failed: int = 0
+
+    @property
+    def wasted_rate(self) -> float:
+        return self.wasted / self.started if self.started else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self), "wasted_rate": self.wasted_rate}
+
+
+async def _run_specialist(node: SpecialistNode, state: SessionState) -> dict[str, Any]:
+    return await node(state)
+
+
+class Speculation:
+    """Specialist calls started with the turn, before guardrail and detail checks finish.
+
+    Each result is committed only when the graph actually reaches that specialist; whatever
+    is left when the run ends was routed away from and gets cancelled.
+    """
+
+    def __init__(
+        self, tasks: dict[str, asyncio.Task[dict[str, Any]]], stats: SpeculationStats
+    ) -> None:
+        self.tasks = tasks
+        self.stats = stats
+
+    @classmethod
+    def start(
+        cls, nodes: dict[str, SpecialistNode], state: SessionState, stats: SpeculationStats
+    ) -> "Speculation":
+        tasks: dict[str, asyncio.Task[dict[str, Any]]] = {
+            name: asyncio.create_task(_run_specialist(node, state)) for name, node in nodes.items()
+        }
+        stats.started += len(tasks)
+        SPECULATIVE_SPECIALISTS.inc(len(tasks), outcome="started")
+        return cls(tasks, stats)
+
+    def take(self, name: str) -> asyncio.Task[dict[str, Any]] | None:
+        return self.tasks.pop(name, None)
+
+    def cancel_unused(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+        self.stats.wasted += len(self.tasks)
+        SPECULATIVE_SPECIALISTS.inc(len(self.tasks), outcome="wasted")
+        self.tasks.clear()
+
+
+def speculative_node(
+    name: str, node: SpecialistNode, stats: SpeculationStats
+) -> ContextSpecialistNode:
+    """Wrap a specialist so it commits the speculative result for the run, if there is one."""
+
+    async def run(state: SessionState, runtime: Runtime[Context]) -> dict[str, Any]:
+        speculation = runtime.context.speculation if runtime.context else None
+        task = speculation.take(name) if speculation else None
+        if task is not None:
+            try:
+                result = await task
+            except Exception:
+                LOGGER.exception(f"Speculative {name} failed, running it again")
+                stats.failed += 1
+                SPECULATIVE_SPECIALISTS.inc(outcome="failed")
+            else:
+                stats.committed += 1
+                SPECULATIVE_SPECIALISTS.inc(outcome="committed")
+                return result
+        return await node(state)
+
+    return run
@@ -4,7 +4,9 @@ import sys
 from pathlib import Path
 from typing import Any
 
-LOG_FORMAT = "%(levelname)s:     %(message)s"
+from core.tracing import TraceIdFilter
+
+LOG_FORMAT = "%(levelname)s:     [%(trace_id)s] %(message)s"
 LOGGER = logging.getLogger("agent")
 LOGGER.setLevel(logging.INFO)
 
@@ -28,9 +30,11 @@ def parse_json_response(response_text: str) -> dict[str, Any]:
 
 
 def configure_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(TraceIdFilter())
     logging.basicConfig(
         level=logging.INFO,
         format=LOG_FORMAT,
-        handlers=[logging.StreamHandler(sys.stdout)],
+        handlers=[handler],
         force=True,  # ensures consistent config across modules
     )
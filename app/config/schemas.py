@@ -1,9 +1,15 @@
 """Request and response schemas."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class UserInput(BaseModel):
     session_id: str
     user_id: str
     user_input: str
+
+
+class BatchInput(BaseModel):
+    items: list[UserInput]
+    # Sessions run at once; capped by BATCH_MAX_CONCURRENCY
+    max_concurrency: int | None = Field(default=None, ge=1)
@@ -7,6 +7,94 @@ class Settings(BaseSettings):
 
     GROQ_API_KEY: SecretStr = SecretStr("groq_api_key")
     LLM_MODEL_NAME: str = Field(default="meta-llama/llama-4-maverick-17b-128e-instruct")
+    OPENAI_API_KEY: SecretStr = SecretStr("openai_api_key")
+
+    # Extra backends as `provider:model` specs; setting any enables the router
+    LLM_FALLBACK_MODELS: list[str] = Field(default_factory=list)
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = Field(default=1.0)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5)
+    LLM_CIRCUIT_RESET_SECONDS: float = Field(default=30.0)
+
+    # Scheduler limits; 0 disables the corresponding cap
+    LLM_MAX_CONCURRENCY: int = Field(default=16)
+    LLM_PROVIDER_MAX_CONCURRENCY: int = Field(default=8)
+    LLM_REQUESTS_PER_MINUTE: int = Field(default=0)
+    LLM_TOKENS_PER_MINUTE: int = Field(default=0)
+    LLM_EXPECTED_COMPLETION_TOKENS: int = Field(default=512)
+    # USD per million tokens as {model: [prompt, completion]}, for the llm_cost_usd_total metric
+    LLM_TOKEN_PRICES: dict[str, list[float]] = Field(default_factory=dict)
+
+    LLM_CACHE_ENABLED: bool = Field(default=True)
+    LLM_CACHE_MAX_SIZE: int = Field(default=1024)
+    LLM_CACHE_TTL_SECONDS: int = Field(default=3600)
+    LLM_CACHE_POSTGRES_ENABLED: bool = Field(default=False)
+    LLM_SINGLE_FLIGHT_ENABLED: bool = Field(default=True)
+
+    HISTORY_MAX_TOKENS: int = Field(default=3000)
+    HISTORY_KEEP_RECENT_MESSAGES: int = Field(default=8)
+    HISTORY_SUMMARY_MAX_TOKENS: int = Field(default=500)
+    HISTORY_NODE_TOKEN_BUDGET: int = Field(default=1500)
+    # Most recent messages read back from the session's message log when its state loads
+    HISTORY_LOAD_MAX_MESSAGES: int = Field(default=200)
+
+    # Start the specialists alongside the guardrail/ensure-details calls (costs wasted calls)
+    SPECULATIVE_SPECIALISTS: bool = Field(default=False)
+
+    # Settle clear emergencies and smalltalk locally, skipping the guardrail LLM call
+    LOCAL_PRECLASSIFIER_ENABLED: bool = Field(default=True)
+
+    # Screen drafts against the local interaction table and pass its matches to the LLM check;
+    # the check is skipped only when neither the draft nor the profile names anything to check
+    INTERACTION_INDEX_ENABLED: bool = Field(default=True)
+
+    # One triage LLM call in place of the input guardrail and ensure-details calls
+    FUSED_TRIAGE: bool = Field(default=False)
+
+    # Turn deadline; specialists get their own timeout, capped by what the deadline leaves after
+    # the reserve kept for synthesis, safety check and response. Late specialists are dropped.
+    TURN_DEADLINE_SECONDS: float | None = Field(default=30.0)
+    DEADLINE_RESERVE_SECONDS: float = Field(default=8.0)
+    SPECIALIST_TIMEOUT_SECONDS: float = Field(default=20.0)
+    SPECIALIST_TIMEOUTS: dict[str, float] = Field(default_factory=dict)
+
+    # Consult only the specialists relevant to a medical query, chosen locally per turn
+    SPECIALIST_SELECTION_ENABLED: bool = Field(default=True)
+
+    # Skip the profile extraction LLM call for inputs without local profile-fact cues
+    PROFILE_EXTRACTION_GATE_ENABLED: bool = Field(default=True)
+
+    # Background profile extraction: workers, queue bound, and how long a turn waits for a slot
+    PROFILE_EXTRACTION_WORKERS: int = Field(default=2)
+    PROFILE_EXTRACTION_QUEUE_SIZE: int = Field(default=256)
+    PROFILE_EXTRACTION_SUBMIT_TIMEOUT_SECONDS: float = Field(default=1.0)
+    BACKGROUND_DRAIN_TIMEOUT_SECONDS: float = Field(default=10.0)
+
+    # Batch chat: items accepted per request and sessions run at once (LLM calls share the
+    # scheduler's limits in the batch lane)
+    BATCH_MAX_ITEMS: int = Field(default=5000)
+    BATCH_MAX_CONCURRENCY: int = Field(default=16)
+
+    # Graph checkpointer: "none", "postgres" (the lifespan's saver) or "memory" (bounded,
+    # in-process). Session state lives in Postgres either way; "memory" keeps per-worker
+    # checkpoints and only suits a single worker
+    CHECKPOINTER: str = Field(default="none")
+    CHECKPOINT_MAX_THREADS: int = Field(default=10_000)
+    CHECKPOINT_TTL_SECONDS: float | None = Field(default=24 * 3600)
+    CHECKPOINT_KEEP_LATEST_ONLY: bool = Field(default=True)
+
+    # Per-session leases serializing turns across workers and replicas
+    SESSION_LOCK_ENABLED: bool = Field(default=True)
+    SESSION_LEASE_TTL_SECONDS: float = Field(default=60.0)
+    SESSION_LOCK_TIMEOUT_SECONDS: float = Field(default=30.0)
+
+    # Per-request profiles (cProfile + asyncio task timeline), retrievable by trace ID
+    PROFILING_DIR: str = Field(default="profiles")
+    PROFILING_MAX_PROFILES: int = Field(default=50)
+    # Record a sample of runs (inputs, LLM calls, timings, states) for offline replay; unset disables
+    RECORDING_DIR: str | None = Field(default=None)
+    RECORDING_SAMPLE_RATE: float = Field(default=1.0)
+    # Required in X-Admin-Token for the admin endpoints and the X-Profile header; unset disables
+    ADMIN_TOKEN: SecretStr | None = Field(default=None)
 
     SERVICE_HOST: str | None = Field(default="localhost")
     SERVICE_PORT: int | None = Field(default=8080)
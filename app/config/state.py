@@ -47,6 +47,11 @@ class MedicalHistory(BaseModel):
     supplements: List[str] | None = None
 
 
+class Preferences(BaseModel):
+    excluded_traditions: List[str] | None = None
+    preferred_traditions: List[str] | None = None
+
+
 class UserProfile(BaseModel):
     user_id: str
     name: str | None = None
@@ -59,6 +64,7 @@ class UserProfile(BaseModel):
     health_goals: HealthGoals = Field(default_factory=HealthGoals)
     lifestyle: Lifestyle = Field(default_factory=Lifestyle)
     medical_history: MedicalHistory = Field(default_factory=MedicalHistory)
+    preferences: Preferences = Field(default_factory=Preferences)
     other: str | None = None
 
 
@@ -73,6 +79,13 @@ class SessionState(BaseModel):
         tool_responses: The combined string from the medical tools.
         response: The final response from the non-medical path.
         conversation_history: The list of messages that make up the chat history.
+        history_summary: Rolling summary of messages compacted out of conversation_history.
+        message_count: Messages ever added to the session's history, including folded ones.
+        saved_message_count: How many of those are already in the stored message log.
+        synthesized_response: Draft combining the specialist advice, before safety checks.
+        contraindication_details: Safety concerns found in the synthesized response.
+        selected_specialists: Specialists consulted for this turn.
+        dropped_perspectives: Selected specialists whose advice missed this turn's synthesis.
     """
 
     session_id: str
@@ -82,15 +95,22 @@ class SessionState(BaseModel):
 
     allopathy_advice: str = Field(default="")
     ayurveda_advice: str = Field(default="")
+    contraindication_details: str = Field(default="")
     conversation_history: list[dict[str, Any]] = Field(default_factory=list)
+    dropped_perspectives: List[str] = Field(default_factory=list)
     gathered_ancient_knowledge: bool = Field(default=False)
     has_sufficient_details: bool = Field(default=False)
     has_contraindications: bool = Field(default=False)
+    history_summary: str = Field(default="")
     is_emergency: bool = Field(default=False)
     is_medical: bool = Field(default=False)
     lifestyle_advice: str = Field(default="")
+    message_count: int = Field(default=0)
     response: str = Field(default="")
     safety_warnings: List[str] = Field(default_factory=list)
+    saved_message_count: int = Field(default=0)
+    selected_specialists: List[str] = Field(default_factory=list)
+    synthesized_response: str = Field(default="")
     tcm_advice: str = Field(default="")
     user_profile: UserProfile | None = None
 
@@ -100,3 +120,7 @@ class Context:
     """Context schema for LangGraph execution."""
 
     user_profile: UserProfile | None = None
+    # agent.speculation.Speculation started for this run, if speculative mode is on
+    speculation: Any = None
+    # time.monotonic() by which the turn should have its response; see agent.deadlines
+    deadline: float | None = None
@@ -0,0 +1,135 @@
+"""Bounded pool for fire-and-forget work such as profile extraction.
+
+Jobs are keyed (by user for profile extraction): submitting a job for a key that is still
+waiting replaces the waiting job, so only the latest one per key runs, and jobs for one key
+never run concurrently. The queue is bounded; when it is full `submit` waits up to
+`submit_timeout` for a slot and then drops the job. Workers are started on demand and exit
+when the queue is empty, so an idle pool holds no tasks.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.metrics import (
+    BACKGROUND_JOB_DURATION,
+    BACKGROUND_JOB_WAIT,
+    BACKGROUND_JOBS,
+    BACKGROUND_QUEUE_DEPTH,
+)
+
+LOGGER = logging.getLogger("background")
+LOGGER.setLevel(logging.INFO)
+
+Job = Callable[[], Coroutine[Any, Any, None]]
+
+
+@dataclass
+class _Pending:
+    job: Job
+    context: contextvars.Context
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class BackgroundWorkerPool:
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 2,
+        max_queued: int = 256,
+        submit_timeout: float | None = 1.0,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.submit_timeout = submit_timeout
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queued)
+        self.pending: dict[str, _Pending] = {}
+        self.running: set[str] = set()
+        self.workers: set[asyncio.Task] = set()
+        self.closed = False
+
+    def _record(self, outcome: str) -> None:
+        BACKGROUND_JOBS.inc(queue=self.name, outcome=outcome)
+
+    def _update_depth(self) -> None:
+        BACKGROUND_QUEUE_DEPTH.set(len(self.pending), queue=self.name)
+
+    async def submit(self, key: str, job: Job) -> bool:
+        """Queue `job` under `key`; returns False when it was dropped.
+
+        The job runs in a copy of the caller's context, so it keeps the caller's trace ID.
+        """
+        if self.closed:
+            self._record("dropped")
+            return False
+        pending = _Pending(job, contextvars.copy_context())
+        if key in self.pending:
+            self.pending[key] = pending
+            self._record("coalesced")
+            return True
+        self.pending[key] = pending
+        self._update_depth()
+        # A key that is running is picked up again by its worker, without a queue slot
+        if key not in self.running:
+            try:
+                await asyncio.wait_for(self.queue.put(key), self.submit_timeout)
+            except TimeoutError:
+                self.pending.pop(key, None)
+                self._update_depth()
+                self._record("dropped")
+                LOGGER.warning(f"{self.name} queue is full, dropping job for {key}")
+                return False
+            self._spawn_worker()
+        return True
+
+    def _spawn_worker(self) -> None:
+        if len(self.workers) < self.max_workers:
+            task = asyncio.create_task(self._work())
+            self.workers.add(task)
+            # Also covers a worker cancelled before it started, whose `finally` never runs
+            task.add_done_callback(self.workers.discard)
+
+    async def _work(self) -> None:
+        try:
+            while not self.queue.empty():
+                key = self.queue.get_nowait()
+                try:
+                    while key in self.pending:
+                        await self._run(key, self.pending.pop(key))
+                finally:
+                    self.queue.task_done()
+        finally:
+            # Leave the pool in the same step that saw the queue empty; a done callback would
+            # run later, and a job submitted in between would find no free worker slot
+            self.workers.discard(asyncio.current_task())
+
+    async def _run(self, key: str, pending: _Pending) -> None:
+        self._update_depth()
+        self.running.add(key)
+        started = time.perf_counter()
+        BACKGROUND_JOB_WAIT.observe(started - pending.submitted_at, queue=self.name)
+        try:
+            await asyncio.create_task(pending.job(), context=pending.context)
+            self._record("completed")
+        except Exception:
+            LOGGER.exception(f"{self.name} job for {key} failed")
+            self._record("failed")
+        finally:
+            self.running.discard(key)
+            BACKGROUND_JOB_DURATION.observe(time.perf_counter() - started, queue=self.name)
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """Stop accepting jobs and wait for queued ones; returns False on timeout."""
+        self.closed = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            return True
+        except TimeoutError:
+            LOGGER.warning(f"{self.name} drain timed out with {len(self.pending)} jobs pending")
+            for task in list(self.workers):
+                task.cancel()
+            return False
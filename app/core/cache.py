@@ -0,0 +1,212 @@
+"""Response cache in front of the LLM client."""
+
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+import psycopg
+
+from core.llm import BaseLLMClient
+from core.metrics import LLM_CACHE_ERRORS, LLM_CACHE_EVICTIONS, LLM_CACHE_LOOKUPS
+
+if TYPE_CHECKING:
+    from memory.postgres import PostgresClient
+
+LOGGER = logging.getLogger("cache")
+LOGGER.setLevel(logging.INFO)
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Fallback serializer for LangChain messages and pydantic models."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def cache_key(model_name: str, messages: Any) -> str:
+    """Build a canonical hash of the model name and the messages sent to it.
+
+    Keys are stable across processes so the shared Postgres tier can be hit by every worker.
+    """
+    payload = json.dumps(
+        {"model": model_name, "messages": messages},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_to_jsonable,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+
+class CacheBackend(ABC):
+    """A single cache tier."""
+
+    name: str = "cache"
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    def _hit(self) -> None:
+        self.stats.hits += 1
+        LLM_CACHE_LOOKUPS.inc(tier=self.name, result="hit")
+
+    def _miss(self) -> None:
+        self.stats.misses += 1
+        LLM_CACHE_LOOKUPS.inc(tier=self.name, result="miss")
+
+    def _evicted(self) -> None:
+        self.stats.evictions += 1
+        LLM_CACHE_EVICTIONS.inc(tier=self.name)
+
+    def _failed(self) -> None:
+        self.stats.errors += 1
+        LLM_CACHE_ERRORS.inc(tier=self.name)
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        pass
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Process-local LRU tier bounded by entry count and TTL."""
+
+    name = "memory"
+
+    def __init__(
+        self, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._miss()
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self._evicted()
+            self._miss()
+            return None
+        self._entries.move_to_end(key)
+        self._hit()
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evicted()
+
+
+class PostgresLLMCache(CacheBackend):
+    """Shared tier stored in Postgres so every worker benefits from each other's calls.
+
+    Database errors (including pool timeouts) are logged and treated as misses; the cache must
+    never fail a chat turn.
+    """
+
+    name = "postgres"
+
+    def __init__(self, postgres_client: "PostgresClient", ttl_seconds: float) -> None:
+        super().__init__()
+        self.postgres_client = postgres_client
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> str | None:
+        try:
+            value = await self.postgres_client.get_cached_response(key)
+        except psycopg.Error as e:
+            LOGGER.warning(f"Postgres cache lookup failed: {e}")
+            self._failed()
+            value = None
+        if value is None:
+            self._miss()
+            return None
+        self._hit()
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await self.postgres_client.save_cached_response(key, value, self.ttl_seconds)
+        except psycopg.Error as e:
+            LOGGER.warning(f"Postgres cache write failed: {e}")
+            self._failed()
+
+
+class CachedLLMClient(BaseLLMClient):
+    """Wraps an LLM client with a chain of cache tiers, fastest first."""
+
+    def __init__(self, client: BaseLLMClient, tiers: list[CacheBackend]) -> None:
+        self.client = client
+        self.model_name = client.model_name
+        self.tiers = tiers
+
+    async def ainvoke(self, messages: Any) -> str:
+        key = cache_key(self.model_name, messages)
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+
+        response = await self.client.ainvoke(messages)
+        await self._store(key, response)
+        return response
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        key = cache_key(self.model_name, messages)
+        cached = await self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for chunk in self.client.astream(messages):
+            chunks.append(chunk)
+            yield chunk
+        await self._store(key, "".join(chunks))
+
+    async def _lookup(self, key: str) -> str | None:
+        for index, tier in enumerate(self.tiers):
+            value = await tier.get(key)
+            if value is not None:
+                # Backfill the faster tiers so the next lookup stays in-process
+                for faster_tier in self.tiers[:index]:
+                    await faster_tier.set(key, value)
+                return value
+        return None
+
+    async def _store(self, key: str, response: str) -> None:
+        # Empty completions are usually transient provider failures; don't pin them
+        if response:
+            for tier in self.tiers:
+                await tier.set(key, response)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return hit/miss/eviction counters per tier."""
+        return {tier.name: asdict(tier.stats) for tier in self.tiers}
@@ -0,0 +1,172 @@
+"""Local fake LLM backends for offline tests and benchmarks."""
+
+import asyncio
+import json
+import math
+import random
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from core.llm import BaseLLMClient
+
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def constant_latency(seconds: float) -> LatencyDistribution:
+    return lambda rng: seconds
+
+
+def lognormal_latency(median_seconds: float, sigma: float) -> LatencyDistribution:
+    """Right-skewed latency, the usual shape of provider response times."""
+    mu = math.log(median_seconds)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class FakeLLMError(RuntimeError):
+    """Error injected by a fake backend."""
+
+
+class FakeLLMClient(BaseLLMClient):
+    """Stand-in for a provider with configurable latency and error injection."""
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        response: str = "",
+        latency: LatencyDistribution | None = None,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.model_name = model_name
+        self.response = response
+        self.latency = latency or constant_latency(0.0)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def respond(self, messages: Any) -> str:
+        return self.response
+
+    async def ainvoke(self, messages: Any) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency(self.rng))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise FakeLLMError(f"Injected failure from {self.model_name}")
+        return self.respond(messages)
+
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+_GREETINGS = ("hi", "hello", "hey", "thanks", "thank you", "good morning", "bye")
+CLARIFYING_QUESTION = "Could you tell me your age, how long this has lasted and any medications?"
+
+# Canned completions per prompt file; callables receive the rendered prompt text
+Responder = str | Callable[[str], str]
+
+
+def _user_input(prompt: str) -> str:
+    match = re.search(r"\*\*User (?:input|message):\*\*\s*(.*)", prompt)
+    return match.group(1).strip() if match else prompt.strip()
+
+
+def _guardrail_response(prompt: str) -> str:
+    text = _user_input(prompt).lower()
+    return json.dumps(
+        {
+            "is_emergency": "chest pain" in text or "can't breathe" in text,
+            "is_medical": not text.startswith(_GREETINGS),
+        }
+    )
+
+
+def _details_response(prompt: str) -> str:
+    # Very short messages ("my head hurts") get a clarifying question
+    if len(_user_input(prompt).split()) >= 5:
+        return json.dumps({"has_sufficient_details": True, "response": ""})
+    return json.dumps({"has_sufficient_details": False, "response": CLARIFYING_QUESTION})
+
+
+def _triage_response(prompt: str) -> str:
+    triage = json.loads(_guardrail_response(prompt))
+    details = {"has_sufficient_details": False, "response": ""}
+    if triage["is_medical"] and not triage["is_emergency"]:
+        details = json.loads(_details_response(prompt))
+    return json.dumps({**triage, **details})
+
+
+DEFAULT_RESPONSES: dict[str, Responder] = {
+    "1_input_guardrail.md": _guardrail_response,
+    "1_triage.md": _triage_response,
+    "2_ensure_details.md": _details_response,
+    "3_profile_extractor.md": json.dumps({"biometrics": {"age": 35}}),
+    "4_allopathy_agent.md": "Allopathy: rest, fluids and paracetamol if needed.",
+    "4_tcm_kampo_agent.md": "TCM/Kampo: ginger tea to warm the middle burner.",
+    "4_ayurveda_agent.md": "Ayurveda: a tulsi and turmeric decoction for kapha.",
+    "4_lifestyle_agent.md": "Lifestyle: sleep eight hours and walk daily.",
+    "5_synthesis.md": "Combined advice: rest, fluids, ginger tea and gentle exercise.",
+    "6_contraindication_check.md": json.dumps({"has_contraindications": False, "response": ""}),
+    "7_adjustment.md": "Adjusted advice without the conflicting remedies.",
+    "response_generator.md": "Here is your personalised plan: rest, fluids and ginger tea.",
+}
+
+
+class ScriptedLLMClient(FakeLLMClient):
+    """Fake backend that answers each prompt file in app/prompts with canned output.
+
+    The prompt file is recognised from the static text that precedes its first placeholder.
+    Messages that match no prompt (general and emergency turns) get `default_response`.
+    Per-prompt latency distributions let benchmarks model slow specialists.
+    """
+
+    def __init__(
+        self,
+        responses: dict[str, Responder] | None = None,
+        latencies: dict[str, LatencyDistribution] | None = None,
+        default_response: str = "Hello! How can I help you today?",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(response=default_response, **kwargs)
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.latencies = latencies or {}
+        self.calls_by_prompt: dict[str, int] = {}
+        self.prefixes = {
+            filename: self._static_prefix((PROMPTS_DIR / filename).read_text())
+            for filename in self.responses
+        }
+
+    @staticmethod
+    def _static_prefix(template: str) -> str:
+        return template[: template.find("{")] if "{" in template else template
+
+    def identify(self, messages: Any) -> str | None:
+        """Return the prompt file the final message was rendered from."""
+        prompt = self._last_prompt(messages)
+        for filename, prefix in self.prefixes.items():
+            if prefix and prompt.startswith(prefix):
+                return filename
+        return None
+
+    @staticmethod
+    def _last_prompt(messages: Any) -> str:
+        if isinstance(messages, str):
+            return messages
+        return str(messages[-1].get("content", "")) if messages else ""
+
+    def respond(self, messages: Any) -> str:
+        return self._answer(self.identify(messages), messages)
+
+    def _answer(self, filename: str | None, messages: Any) -> str:
+        key = filename or "default"
+        self.calls_by_prompt[key] = self.calls_by_prompt.get(key, 0) + 1
+        responder = self.responses.get(filename, self.response) if filename else self.response
+        return responder(self._last_prompt(messages)) if callable(responder) else responder
+
+    async def ainvoke(self, messages: Any) -> str:
+        filename = self.identify(messages)
+        latency = self.latencies.get(filename or "default", self.latency)
+        self.calls += 1
+        await asyncio.sleep(latency(self.rng))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise FakeLLMError(f"Injected failure from {self.model_name}")
+        return self._answer(filename, messages)
@@ -1,13 +1,78 @@
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_groq import ChatGroq
+from langchain_openai import ChatOpenAI
 
 from config.settings import settings
+from core.metrics import (
+    LLM_COMPLETION_TOKENS,
+    LLM_COST,
+    LLM_DURATION,
+    LLM_ERRORS,
+    LLM_PROMPT_TOKENS,
+)
+from core.tokens import estimate_tokens, messages_text
+from core.tracing import current_node
+
+
+class BaseLLMClient(ABC):
+    """Common interface for everything that sits in front of the chat model."""
+
+    model_name: str
+
+    @abstractmethod
+    async def ainvoke(self, messages: Any) -> str:
+        pass
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        """Yield the response in chunks; clients without native streaming yield it whole."""
+        yield await self.ainvoke(messages)
+
+
+class LLMClient(BaseLLMClient):
+    def __init__(self, model_name: str | None = None, provider: str = "groq"):
+        self.model_name = model_name or settings.LLM_MODEL_NAME
+        self.provider = provider
+        self.model: BaseChatModel
+        if provider == "groq":
+            self.model = ChatGroq(
+                model=self.model_name, api_key=settings.GROQ_API_KEY, temperature=0.0
+            )
+        elif provider == "openai":
+            self.model = ChatOpenAI(
+                model=self.model_name, api_key=settings.OPENAI_API_KEY, temperature=0.0
+            )
+        else:
+            raise ValueError(f"Unsupported LLM provider: {provider}")
 
+    @classmethod
+    def from_spec(cls, spec: str) -> "LLMClient":
+        """Create a client from a `provider:model` spec; a bare model name means Groq."""
+        provider, separator, model_name = spec.partition(":")
+        if not separator:
+            return cls(model_name=spec)
+        return cls(model_name=model_name, provider=provider)
 
-class LLMClient:
-    def __init__(self):
-        self.model = ChatGroq(
-            model=settings.LLM_MODEL_NAME, api_key=settings.GROQ_API_KEY, temperature=0.0
-        )
+    def _labels(self) -> dict[str, str]:
+        return {"model": self.model_name, "node": current_node() or "none"}
+
+    def _record_usage(
+        self, labels: dict[str, str], messages: Any, completion: str, usage: dict[str, Any] | None
+    ) -> None:
+        """Record token counts from provider usage metadata, estimating when it is missing."""
+        usage = usage or {}
+        prompt_tokens = usage.get("input_tokens") or estimate_tokens(messages_text(messages))
+        completion_tokens = usage.get("output_tokens") or estimate_tokens(completion)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, **labels)
+        LLM_COMPLETION_TOKENS.observe(completion_tokens, **labels)
+        prices = settings.LLM_TOKEN_PRICES.get(self.model_name)
+        if prices:
+            cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+            LLM_COST.inc(cost, model=self.model_name)
 
     async def ainvoke(self, messages):
         """Invoke the LLM with messages.
@@ -18,5 +83,41 @@ class LLMClient:
         Returns:
             The response content as a string
         """
-        response = await self.model.ainvoke(messages)
-        return response.content
+        labels = self._labels()
+        started = time.perf_counter()
+        try:
+            response = await self.model.ainvoke(messages)
+        except Exception:
+            LLM_ERRORS.inc(1, **labels)
+            raise
+        finally:
+            LLM_DURATION.observe(time.perf_counter() - started, **labels)
+        # Content may be a list of content blocks; `text` joins their text parts
+        content = response.text
+        self._record_usage(labels, messages, content, getattr(response, "usage_metadata", None))
+        return content
+
+    async def astream(self, messages):
+        """Stream the LLM response token by token.
+
+        Args:
+            messages: Either a string prompt or a list of message dicts
+
+        Yields:
+            Response content chunks as strings
+        """
+        labels = self._labels()
+        started = time.perf_counter()
+        chunks, usage = [], None
+        try:
+            async for chunk in self.model.astream(messages):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if text := chunk.text:
+                    chunks.append(text)
+                    yield text
+        except Exception:
+            LLM_ERRORS.inc(1, **labels)
+            raise
+        finally:
+            LLM_DURATION.observe(time.perf_counter() - started, **labels)
+        self._record_usage(labels, messages, "".join(chunks), usage)
@@ -0,0 +1,81 @@
+"""Multi-pattern phrase matching (Aho-Corasick)."""
+
+from collections import deque
+from typing import NamedTuple
+
+
+class PhraseMatch(NamedTuple):
+    start: int
+    end: int
+    label: str
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over lowercase phrases.
+
+    All phrases are found in one pass over the text, whatever their number. Matches must start
+    and end on word boundaries, so "hi" does not match inside "this".
+    """
+
+    def __init__(self, phrases: dict[str, str]) -> None:
+        """Build the automaton.
+
+        Args:
+            phrases: Mapping of phrase to the label reported when it matches.
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[tuple[int, str]]] = [[]]
+        for phrase, label in phrases.items():
+            self._add(phrase.lower(), label)
+        self._link()
+
+    def _add(self, phrase: str, label: str) -> None:
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(phrase), label))
+
+    def _link(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> list[PhraseMatch]:
+        """Return every phrase occurrence in text, bounded by non-word characters."""
+        text = text.lower()
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if not self._output[state]:
+                continue
+            end = index + 1
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            for length, label in self._output[state]:
+                start = end - length
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    matches.append(PhraseMatch(start, end, label))
+        return matches
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
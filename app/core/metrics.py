@@ -0,0 +1,379 @@
+"""In-process metrics with Prometheus text exposition."""
+
+import functools
+import math
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar, cast
+
+from core.profiling import record_span
+from core.tracing import node_scope
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+LabelValues = tuple[str, ...]
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramSeries:
+    __slots__ = ("count", "counts", "sum")
+
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series: dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _HistogramSeries(len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series.counts[index] += 1
+                break
+        series.sum += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self.series.get(self._key(labels))
+        return series.count if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series.counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, le=_format_value(bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, le="+Inf")
+            yield f"{self.name}_bucket{labels} {series.count}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series.sum)}"
+            yield f"{self.name}_count{labels} {series.count}"
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self.metrics.values())
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_DURATION = REGISTRY.histogram(
+    "graph_node_duration_seconds", "Duration of orchestration graph nodes.", ("node",)
+)
+NODE_ERRORS = REGISTRY.counter(
+    "graph_node_errors_total", "Orchestration graph nodes that raised.", ("node",)
+)
+LLM_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Duration of LLM provider calls.", ("model", "node")
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_request_errors_total", "LLM provider calls that raised.", ("model", "node")
+)
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "llm_prompt_tokens", "Prompt tokens per LLM call.", ("model", "node"), TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = REGISTRY.histogram(
+    "llm_completion_tokens", "Completion tokens per LLM call.", ("model", "node"), TOKEN_BUCKETS
+)
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "Estimated LLM spend from LLM_TOKEN_PRICES.", ("model",)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "Duration of PostgresClient operations.", ("operation",)
+)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "db_query_errors_total", "PostgresClient operations that raised.", ("operation",)
+)
+
+BACKGROUND_QUEUE_DEPTH = REGISTRY.gauge(
+    "background_queue_depth", "Jobs waiting in a background pool.", ("queue",)
+)
+BACKGROUND_JOB_WAIT = REGISTRY.histogram(
+    "background_job_wait_seconds", "Time background jobs wait before starting.", ("queue",)
+)
+BACKGROUND_JOB_DURATION = REGISTRY.histogram(
+    "background_job_duration_seconds", "Duration of background jobs.", ("queue",)
+)
+BACKGROUND_JOBS = REGISTRY.counter(
+    "background_jobs_total",
+    "Background jobs by outcome: completed, failed, coalesced or dropped.",
+    ("queue", "outcome"),
+)
+
+CHECKPOINT_THREADS = REGISTRY.gauge(
+    "checkpointer_threads", "Threads held by the in-process checkpointer."
+)
+CHECKPOINT_EVICTIONS = REGISTRY.counter(
+    "checkpointer_evictions_total", "Threads evicted from the in-process checkpointer.", ("reason",)
+)
+
+SESSION_LOCK_WAIT = REGISTRY.histogram(
+    "session_lock_wait_seconds", "Time turns wait for their session's lease."
+)
+SESSION_LOCK_TIMEOUTS = REGISTRY.counter(
+    "session_lock_timeouts_total", "Turns rejected because their session stayed busy."
+)
+
+SPECIALIST_TIMEOUTS = REGISTRY.counter(
+    "specialist_timeouts_total", "Specialists dropped for missing their budget.", ("specialist",)
+)
+DEGRADED_RESPONSES = REGISTRY.counter(
+    "synthesis_degraded_total", "Syntheses made without every specialist perspective."
+)
+BATCH_ITEMS = REGISTRY.counter(
+    "batch_items_total", "Batch chat items by outcome: ok or error.", ("outcome",)
+)
+CONTRAINDICATION_CHECKS = REGISTRY.counter(
+    "contraindication_checks_total",
+    "Contraindication checks by outcome: llm, or skipped with nothing to check.",
+    ("outcome",),
+)
+PROFILE_EXTRACTIONS = REGISTRY.counter(
+    "profile_extraction_total",
+    "Profile extraction calls by outcome: called, or skipped by the gate.",
+    ("outcome",),
+)
+SPECIALISTS_SKIPPED = REGISTRY.counter(
+    "specialists_skipped_total", "Specialists not consulted for a medical turn.", ("specialist",)
+)
+
+LLM_CACHE_LOOKUPS = REGISTRY.counter(
+    "llm_cache_lookups_total", "LLM response cache lookups by tier and result.", ("tier", "result")
+)
+LLM_CACHE_EVICTIONS = REGISTRY.counter(
+    "llm_cache_evictions_total", "LLM response cache entries expired or evicted.", ("tier",)
+)
+LLM_CACHE_ERRORS = REGISTRY.counter(
+    "llm_cache_errors_total", "LLM response cache reads and writes that failed.", ("tier",)
+)
+LLM_CALLS_COALESCED = REGISTRY.counter(
+    "llm_calls_coalesced_total", "LLM calls that joined an identical call already in flight."
+)
+LLM_CALLS_ABANDONED = REGISTRY.counter(
+    "llm_calls_abandoned_total", "Shared LLM calls cancelled after every caller left."
+)
+SPECULATIVE_SPECIALISTS = REGISTRY.counter(
+    "speculative_specialists_total",
+    "Speculative specialist calls by outcome: started, committed, wasted or failed.",
+    ("outcome",),
+)
+PRECLASSIFIER_VERDICTS = REGISTRY.counter(
+    "preclassifier_verdicts_total",
+    "Local guardrail verdicts: emergency and smalltalk skip the LLM, deferred go to it.",
+    ("verdict",),
+)
+
+PROFILE_BLOCK_CACHE_LOOKUPS = REGISTRY.counter(
+    "profile_block_cache_lookups_total",
+    "Rendered profile block cache lookups by result: hit or miss.",
+    ("result",),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "llm_hedges_total", "Hedged duplicates sent after a slow LLM backend call."
+)
+LLM_HEDGE_WINS = REGISTRY.counter(
+    "llm_hedge_wins_total", "LLM calls answered by a hedged duplicate first."
+)
+LLM_FAILOVERS = REGISTRY.counter(
+    "llm_failovers_total", "LLM calls retried on the next backend after a failure."
+)
+LLM_CIRCUIT_OPEN = REGISTRY.gauge(
+    "llm_circuit_open", "1 while a backend's circuit is open or half-open, else 0.", ("backend",)
+)
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls wait for rate budget and concurrency slots.",
+    ("priority",),
+)
+LLM_QUEUED = REGISTRY.gauge(
+    "llm_queued_calls", "LLM calls waiting in the scheduler.", ("priority",)
+)
+
+
+def timed(histogram: Histogram, errors: Counter | None = None, **labels: str) -> Callable[[F], F]:
+    """Decorate a coroutine function to record its duration and failures."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(1, **labels)
+                raise
+            finally:
+                ended = time.perf_counter()
+                histogram.observe(ended - started, **labels)
+                record_span(histogram.name, fn.__qualname__, started, ended)
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def instrument_node(
+    name: str, node: Callable[..., Awaitable[Any]]
+) -> Callable[..., Awaitable[Any]]:
+    """Wrap a graph node to record its duration and failures and attribute LLM calls to it."""
+
+    # functools.wraps keeps the node signature, so LangGraph still injects `runtime`
+    @functools.wraps(node)
+    async def wrapper(state: Any, **kwargs: Any) -> Any:
+        with node_scope(name):
+            started = time.perf_counter()
+            try:
+                return await node(state, **kwargs)
+            except Exception:
+                NODE_ERRORS.inc(node=name)
+                raise
+            finally:
+                ended = time.perf_counter()
+                NODE_DURATION.observe(ended - started, node=name)
+                record_span("node", name, started, ended)
+
+    return wrapper
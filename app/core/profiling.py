@@ -0,0 +1,179 @@
+"""On-demand profiling of single orchestrator runs.
+
+A capture records a cProfile of the event loop thread and a timeline of the asyncio tasks the
+run created, plus the spans reported through `record_span`. Results are written as
+`<request_id>.prof` (pstats, readable by `python -m pstats` or snakeviz) and
+`<request_id>.trace.json` (Chrome trace events, readable by Perfetto or chrome://tracing).
+
+When no capture is active the hooks cost one contextvar lookup.
+"""
+
+import asyncio
+import cProfile
+import json
+import logging
+import re
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from core.tracing import current_trace_id
+
+LOGGER = logging.getLogger("profiling")
+LOGGER.setLevel(logging.INFO)
+
+PROFILE_SUFFIXES = {"cprofile": ".prof", "timeline": ".trace.json"}
+_REQUEST_ID = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+
+
+def is_valid_request_id(request_id: str) -> bool:
+    return bool(_REQUEST_ID.fullmatch(request_id)) and request_id not in {".", ".."}
+
+
+class TaskTimeline:
+    """Spans of the asyncio tasks and instrumented sections belonging to one trace."""
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.origin = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self._task_ids: dict[int, int] = {}
+        self._previous_factory: Any = None
+
+    def _tid(self, task: asyncio.Task | None) -> int:
+        return self._task_ids.setdefault(id(task), len(self._task_ids) + 1) if task else 0
+
+    def add(self, category: str, name: str, start: float, end: float, tid: int) -> None:
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 1,
+                "tid": tid,
+            }
+        )
+
+    def span(self, category: str, name: str, start: float, end: float) -> None:
+        self.add(category, name, start, end, self._tid(asyncio.current_task()))
+
+    def install(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Record every task created on behalf of this trace until `uninstall`."""
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+
+    def uninstall(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.set_task_factory(self._previous_factory)
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> Any:
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        if current_trace_id() == self.trace_id:
+            started = time.perf_counter()
+            name = getattr(coro, "__qualname__", task.get_name())
+            tid = self._tid(task)
+            task.add_done_callback(
+                lambda _: self.add("task", name, started, time.perf_counter(), tid)
+            )
+        return task
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        return {"traceEvents": self.events, "otherData": {"trace_id": self.trace_id}}
+
+
+_active_timeline: ContextVar[TaskTimeline | None] = ContextVar("active_timeline", default=None)
+
+
+def record_span(category: str, name: str, start: float, end: float) -> None:
+    """Add a span to the timeline of the capture running in this context, if any."""
+    timeline = _active_timeline.get()
+    if timeline is not None:
+        timeline.span(category, name, start, end)
+
+
+class RequestProfiler:
+    """Captures profiles of individual runs and stores them by request ID.
+
+    cProfile hooks the whole event loop thread, so a capture also sees work from requests that
+    run concurrently with it; only one capture runs at a time and others are skipped.
+    """
+
+    def __init__(self, directory: str | Path, max_profiles: int = 50) -> None:
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self._busy = False
+        self._armed: dict[str, int] = {}
+
+    def arm(self, session_id: str, runs: int = 1) -> None:
+        """Profile the next `runs` runs of a session."""
+        self._armed[session_id] = self._armed.get(session_id, 0) + runs
+
+    def consume_armed(self, session_id: str) -> bool:
+        remaining = self._armed.get(session_id, 0)
+        if remaining <= 0:
+            return False
+        if remaining == 1:
+            del self._armed[session_id]
+        else:
+            self._armed[session_id] = remaining - 1
+        return True
+
+    @asynccontextmanager
+    async def capture(self, request_id: str) -> AsyncIterator[bool]:
+        """Profile the enclosed block; yields whether a capture is actually running."""
+        if self._busy or not is_valid_request_id(request_id):
+            LOGGER.warning(f"Skipping profile of {request_id}: busy or invalid request ID")
+            yield False
+            return
+
+        self._busy = True
+        loop = asyncio.get_running_loop()
+        timeline = TaskTimeline(request_id)
+        profiler = cProfile.Profile()
+        token = _active_timeline.set(timeline)
+        timeline.install(loop)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield True
+        finally:
+            profiler.disable()
+            timeline.span("run", "orchestrator.run", started, time.perf_counter())
+            timeline.uninstall(loop)
+            _active_timeline.reset(token)
+            self._busy = False
+            await asyncio.to_thread(self._save, request_id, profiler, timeline)
+
+    def _save(self, request_id: str, profiler: cProfile.Profile, timeline: TaskTimeline) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.path(request_id, "cprofile"))
+        self.path(request_id, "timeline").write_text(json.dumps(timeline.to_chrome_trace()))
+        LOGGER.info(f"Saved profile {request_id} to {self.directory}")
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = sorted(
+            self.directory.glob(f"*{PROFILE_SUFFIXES['cprofile']}"), key=lambda p: p.stat().st_mtime
+        )
+        for stale in profiles[: max(0, len(profiles) - self.max_profiles)]:
+            request_id = stale.name.removesuffix(PROFILE_SUFFIXES["cprofile"])
+            for kind in PROFILE_SUFFIXES:
+                self.path(request_id, kind).unlink(missing_ok=True)
+
+    def path(self, request_id: str, kind: str) -> Path:
+        if not is_valid_request_id(request_id):
+            raise ValueError(f"Invalid request ID: {request_id!r}")
+        return self.directory / f"{request_id}{PROFILE_SUFFIXES[kind]}"
+
+    def list_profiles(self) -> list[str]:
+        if not self.directory.exists():
+            return []
+        suffix = PROFILE_SUFFIXES["cprofile"]
+        return sorted(p.name.removesuffix(suffix) for p in self.directory.glob(f"*{suffix}"))
@@ -0,0 +1,328 @@
+"""Recording of orchestrator runs and their offline replay.
+
+A recording holds, per run, the turn's inputs, the state it started from (session state and
+user profile), every LLM call with its node, request, response and timing, and the final state.
+Runs are appended as gzip-compressed JSON lines to `runs-<YYYYMMDD>.jsonl.gz` files.
+
+`replay_runs` re-drives an orchestrator through recorded runs with a `ReplayLLMClient` that
+answers each call from the recording, waiting the recorded latency scaled by `time_scale`, so
+orchestration, serialization and storage overhead can be profiled on production-shaped traffic
+without live LLMs.
+
+When no capture is active the hooks cost one contextvar lookup.
+"""
+
+import asyncio
+import gzip
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from config.state import SessionState, UserProfile
+from core.codec import dumps, loads
+from core.llm import BaseLLMClient
+from core.scheduler import Priority, current_priority
+from core.tokens import messages_text
+from core.tracing import current_node, current_trace_id
+
+if TYPE_CHECKING:
+    from agent.orchestration import Orchestrator
+
+LOGGER = logging.getLogger("recording")
+LOGGER.setLevel(logging.INFO)
+
+RECORDING_VERSION = 1
+
+
+@dataclass
+class RecordedCall:
+    node: str | None
+    # Seconds from the start of the run
+    offset: float
+    duration: float
+    request: Any
+    response: str
+
+
+@dataclass
+class RunRecording:
+    trace_id: str
+    session_id: str
+    user_id: str
+    user_input: str
+    # Wall-clock start, which orders runs and spaces them out on replay
+    started_at: float
+    duration: float = 0.0
+    initial_state: dict[str, Any] | None = None
+    final_state: dict[str, Any] | None = None
+    error: str | None = None
+    calls: list[RecordedCall] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._closed = False
+
+    def add_call(
+        self, node: str | None, request: Any, response: str, started: float, ended: float
+    ) -> None:
+        # Calls that finish after the run ended (unused speculation) are not part of it
+        if not self._closed:
+            self.calls.append(
+                RecordedCall(node, started - self._origin, ended - started, request, response)
+            )
+
+    def close(self) -> None:
+        self.duration = time.perf_counter() - self._origin
+        self._closed = True
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"version": RECORDING_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RunRecording":
+        data = {k: v for k, v in data.items() if k != "version"}
+        calls = [RecordedCall(**call) for call in data.pop("calls", [])]
+        recording = cls(**data)
+        recording.calls = calls
+        recording._closed = True
+        return recording
+
+
+_active_recording: ContextVar[RunRecording | None] = ContextVar("active_recording", default=None)
+
+
+def current_recording() -> RunRecording | None:
+    return _active_recording.get()
+
+
+class RunRecorder:
+    """Records a sample of runs to `directory`."""
+
+    def __init__(
+        self, directory: str | Path, sample_rate: float = 1.0, seed: int | None = None
+    ) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.rng = random.Random(seed)
+        # Concurrent saves append to the same file from worker threads
+        self._write_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def capture(
+        self, trace_id: str, session_id: str, user_id: str, user_input: str
+    ) -> AsyncIterator[RunRecording | None]:
+        """Record the enclosed run; yields None when the run is not sampled."""
+        if self.rng.random() >= self.sample_rate:
+            yield None
+            return
+
+        recording = RunRecording(trace_id, session_id, user_id, user_input, time.time())
+        token = _active_recording.set(recording)
+        try:
+            yield recording
+        except Exception as e:
+            recording.error = str(e)
+            raise
+        finally:
+            recording.close()
+            _active_recording.reset(token)
+            await asyncio.to_thread(self._save, recording)
+
+    def _save(self, recording: RunRecording) -> None:
+        line = dumps(recording.to_dict()) + b"\n"
+        path = self.directory / f"runs-{time.strftime('%Y%m%d', time.gmtime())}.jsonl.gz"
+        with self._write_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Each save appends a gzip member; readers see one continuous stream
+            with gzip.open(path, "ab") as f:
+                f.write(line)
+
+
+def load_recordings(paths: Iterable[str | Path]) -> list[RunRecording]:
+    """Read recordings from files and directories of them, ordered by start time."""
+    files: list[Path] = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("runs-*.jsonl.gz")) if path.is_dir() else [path])
+    recordings: list[RunRecording] = []
+    for file in files:
+        with gzip.open(file, "rb") as f:
+            recordings.extend(RunRecording.from_dict(loads(line)) for line in f if line.strip())
+    return sorted(recordings, key=lambda recording: recording.started_at)
+
+
+class RecordingLLMClient(BaseLLMClient):
+    """Adds the calls it forwards to the recording of the run in progress, if any.
+
+    Background calls (profile extraction) may outlive the run, so they are not recorded.
+    """
+
+    def __init__(self, client: BaseLLMClient) -> None:
+        self.client = client
+        self.model_name = client.model_name
+        self.provider = getattr(client, "provider", client.model_name)
+
+    @staticmethod
+    def _recording() -> RunRecording | None:
+        if current_priority() is Priority.BACKGROUND:
+            return None
+        return current_recording()
+
+    async def ainvoke(self, messages: Any) -> str:
+        recording = self._recording()
+        if recording is None:
+            return await self.client.ainvoke(messages)
+        started = time.perf_counter()
+        response = await self.client.ainvoke(messages)
+        recording.add_call(current_node(), messages, response, started, time.perf_counter())
+        return response
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        recording = self._recording()
+        started = time.perf_counter()
+        chunks = []
+        async for chunk in self.client.astream(messages):
+            chunks.append(chunk)
+            yield chunk
+        if recording is not None:
+            ended = time.perf_counter()
+            recording.add_call(current_node(), messages, "".join(chunks), started, ended)
+
+
+class ReplayMissError(LookupError):
+    """A replayed run made an LLM call its recording has no answer for."""
+
+
+@dataclass
+class ReplayStats:
+    calls: int = 0
+    # Answered, but the request differs from the recorded one (prompts or state changed)
+    mismatched: int = 0
+    missing: int = 0
+    background: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class ReplayLLMClient(BaseLLMClient):
+    """Answers LLM calls from recordings instead of a provider.
+
+    A call is matched to the recording of the run in progress by trace ID and, within it, to the
+    unanswered calls of the same node: the one with the same request if any, else the oldest.
+    Parallel specialists therefore replay correctly whatever order they finish in. Each answer
+    arrives after the recorded duration times `time_scale`; 0 answers at once. Background calls,
+    which are not recorded, get an empty JSON object at once, so they change nothing.
+    """
+
+    def __init__(self, recordings: Iterable[RunRecording], time_scale: float = 1.0) -> None:
+        self.model_name = "replay"
+        self.time_scale = time_scale
+        self.stats = ReplayStats()
+        self._calls: dict[str, defaultdict[str | None, deque[RecordedCall]]] = {}
+        for recording in recordings:
+            calls = self._calls.setdefault(recording.trace_id, defaultdict(deque))
+            for call in recording.calls:
+                calls[call.node].append(call)
+
+    def _next_call(self, messages: Any) -> RecordedCall:
+        trace_id, node = current_trace_id(), current_node()
+        calls = self._calls.get(trace_id) if trace_id is not None else None
+        queue = calls.get(node) if calls is not None else None
+        if not queue:
+            self.stats.missing += 1
+            raise ReplayMissError(f"No recorded {node or 'unattributed'} call left for {trace_id}")
+        text = messages_text(messages)
+        for call in queue:
+            if messages_text(call.request) == text:
+                queue.remove(call)
+                return call
+        self.stats.mismatched += 1
+        return queue.popleft()
+
+    async def ainvoke(self, messages: Any) -> str:
+        if current_priority() is Priority.BACKGROUND:
+            self.stats.background += 1
+            return "{}"
+        self.stats.calls += 1
+        call = self._next_call(messages)
+        await asyncio.sleep(call.duration * self.time_scale)
+        return call.response
+
+
+@dataclass
+class ReplayResult:
+    trace_id: str
+    duration: float
+    # Whether the replayed response equals the recorded one
+    matched: bool
+    error: str | None = None
+
+
+async def replay_runs(
+    orchestrator: "Orchestrator", recordings: list[RunRecording], time_scale: float = 1.0
+) -> list[ReplayResult]:
+    """Re-drive recorded runs through `orchestrator`, which should answer from a replay client.
+
+    Each session starts from the state its first recorded run started from, and its runs go one
+    after another in the recorded order. Profiles change outside the runs (background extraction,
+    other sessions of the user), so each run gets the profile it was recorded with. Runs start at
+    their recorded spacing times `time_scale`, or all at once with 0.
+    """
+    sessions: dict[str, list[RunRecording]] = {}
+    for recording in sorted(recordings, key=lambda recording: recording.started_at):
+        sessions.setdefault(recording.session_id, []).append(recording)
+    for runs in sessions.values():
+        if runs[0].initial_state:
+            # Saved to a fresh store, so its whole history goes to the message log
+            state = SessionState(**{**runs[0].initial_state, "saved_message_count": 0})
+            await orchestrator.postgres_client.add_state(state)
+
+    origin = min((recording.started_at for recording in recordings), default=0.0)
+    clock_origin = time.perf_counter()
+    profiles: dict[str, Any] = {}
+    results: list[ReplayResult] = []
+
+    async def restore_profile(recording: RunRecording) -> None:
+        profile = (recording.initial_state or {}).get("user_profile")
+        if profile and profiles.get(recording.user_id) != profile:
+            profiles[recording.user_id] = profile
+            await orchestrator.postgres_client.save_user_profile(UserProfile(**profile))
+
+    async def replay_session(runs: list[RunRecording]) -> None:
+        for recording in runs:
+            arrival = (recording.started_at - origin) * time_scale
+            await asyncio.sleep(max(0.0, arrival - (time.perf_counter() - clock_origin)))
+            await restore_profile(recording)
+            started = time.perf_counter()
+            try:
+                result = await orchestrator.run(
+                    recording.session_id,
+                    recording.user_id,
+                    recording.user_input,
+                    trace_id=recording.trace_id,
+                )
+            # Any failure of a replayed run is a result to report, not a reason to stop the replay
+            except Exception as e:  # noqa: BLE001
+                results.append(
+                    ReplayResult(recording.trace_id, time.perf_counter() - started, False, str(e))
+                )
+                continue
+            expected = (recording.final_state or {}).get("response")
+            results.append(
+                ReplayResult(
+                    recording.trace_id,
+                    time.perf_counter() - started,
+                    result.get("response") == expected,
+                )
+            )
+
+    await asyncio.gather(*(replay_session(runs) for runs in sessions.values()))
+    return results
@@ -0,0 +1,314 @@
+"""Multi-backend LLM router with hedged requests and circuit breaking."""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from core.llm import BaseLLMClient
+from core.metrics import LLM_CIRCUIT_OPEN, LLM_FAILOVERS, LLM_HEDGE_WINS, LLM_HEDGES
+
+LOGGER = logging.getLogger("router")
+LOGGER.setLevel(logging.INFO)
+
+# One-sided z-score of the 95th percentile for a normal distribution
+_P95_Z_SCORE = 1.645
+
+
+class NoBackendAvailableError(RuntimeError):
+    """Raised when every backend failed or has an open circuit."""
+
+
+class LatencyTracker:
+    """Exponentially weighted mean and variance of call latency."""
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self.mean: float | None = None
+        self.variance = 0.0
+
+    def observe(self, seconds: float) -> None:
+        if self.mean is None:
+            self.mean = seconds
+            return
+        delta = seconds - self.mean
+        self.mean += self.alpha * delta
+        self.variance = (1 - self.alpha) * (self.variance + self.alpha * delta * delta)
+
+    def observe_at_least(self, seconds: float) -> None:
+        """Record a call cut short after `seconds`, whose latency is at least that.
+
+        Only a bound above the mean says anything, so shorter ones are ignored.
+        """
+        if self.mean is None or seconds > self.mean:
+            self.observe(seconds)
+
+    @property
+    def p95(self) -> float | None:
+        if self.mean is None:
+            return None
+        return self.mean + _P95_Z_SCORE * math.sqrt(self.variance)
+
+
+class CircuitBreaker:
+    """Stops sending traffic to a backend after consecutive failures.
+
+    After `reset_timeout` seconds the circuit goes half-open and lets one trial call through;
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def acquire(self) -> bool:
+        """Claim permission for one call, reserving the trial slot when half-open."""
+        if not self.available():
+            return False
+        if self.state == "half_open":
+            self.trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+    def release(self) -> None:
+        """Forget a half-open trial that was cancelled before it finished."""
+        self.trial_in_flight = False
+
+
+@dataclass
+class RouterStats:
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    failures: int = 0
+
+
+class Backend:
+    def __init__(self, client: BaseLLMClient, breaker: CircuitBreaker) -> None:
+        self.client = client
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+
+    @property
+    def name(self) -> str:
+        return self.client.model_name
+
+    def record_success(self) -> None:
+        self.breaker.record_success()
+        LLM_CIRCUIT_OPEN.set(0, backend=self.name)
+
+    def record_failure(self) -> None:
+        self.breaker.record_failure()
+        LLM_CIRCUIT_OPEN.set(int(self.breaker.opened_at is not None), backend=self.name)
+
+
+class LLMRouter(BaseLLMClient):
+    """Routes calls across several backends behind the `ainvoke` interface.
+
+    The healthy backend with the lowest EWMA latency is tried first. If it has not answered by
+    its estimated p95, a hedged duplicate goes to the next backend; the first success wins and
+    the loser is cancelled. Failures fail over immediately and trip per-backend breakers.
+    """
+
+    def __init__(
+        self,
+        clients: list[BaseLLMClient],
+        hedge_min_delay: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        max_hedges: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not clients:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = [
+            Backend(client, CircuitBreaker(failure_threshold, reset_timeout, clock))
+            for client in clients
+        ]
+        self.model_name = clients[0].model_name
+        self.hedge_min_delay = hedge_min_delay
+        self.max_hedges = max_hedges
+        self.clock = clock
+        self.stats = RouterStats()
+        for backend in self.backends:
+            LLM_CIRCUIT_OPEN.set(0, backend=backend.name)
+
+    def _candidates(self) -> list[Backend]:
+        """Healthy backends, fastest measured first, then unmeasured ones in configured order."""
+        ranked = sorted(
+            enumerate(self.backends),
+            key=lambda item: (item[1].latency.mean is None, item[1].latency.mean or 0.0, item[0]),
+        )
+        return [backend for _, backend in ranked if backend.breaker.available()]
+
+    def _hedge_delay(self, backend: Backend) -> float:
+        p95 = backend.latency.p95
+        return max(self.hedge_min_delay, p95) if p95 is not None else self.hedge_min_delay
+
+    async def _call(self, backend: Backend, messages: Any) -> str:
+        started = self.clock()
+        try:
+            response = await backend.client.ainvoke(messages)
+        except asyncio.CancelledError:
+            # A hedged loser would otherwise never report how slow it was and stay first
+            backend.latency.observe_at_least(self.clock() - started)
+            backend.breaker.release()
+            raise
+        except Exception:
+            backend.record_failure()
+            raise
+        backend.latency.observe(self.clock() - started)
+        backend.record_success()
+        return response
+
+    async def ainvoke(self, messages: Any) -> str:
+        self.stats.calls += 1
+        candidates = self._candidates()
+        if not candidates:
+            raise NoBackendAvailableError("All LLM backends have open circuits")
+
+        pending: dict[asyncio.Task, Backend] = {}
+        hedge_backends: list[Backend] = []
+        errors: list[BaseException] = []
+        launched = 0
+
+        def launch() -> Backend | None:
+            nonlocal launched
+            while launched < len(candidates):
+                backend = candidates[launched]
+                launched += 1
+                if backend.breaker.acquire():
+                    pending[asyncio.create_task(self._call(backend, messages))] = backend
+                    return backend
+            return None
+
+        launch()
+        try:
+            while pending:
+                # The oldest call in flight; after a failover that is no longer candidates[0]
+                primary = next(iter(pending.values()))
+                can_hedge = len(hedge_backends) < self.max_hedges and launched < len(candidates)
+                timeout = self._hedge_delay(primary) if can_hedge else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    LOGGER.info(f"Hedging slow call to {primary.name}")
+                    if (hedge := launch()) is not None:
+                        self.stats.hedges += 1
+                        LLM_HEDGES.inc()
+                        hedge_backends.append(hedge)
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        if backend in hedge_backends:
+                            self.stats.hedge_wins += 1
+                            LLM_HEDGE_WINS.inc()
+                        return task.result()
+                    LOGGER.warning(f"LLM backend {backend.name} failed: {task.exception()}")
+                    errors.append(task.exception())  # type: ignore[arg-type]
+
+                if not pending and launched < len(candidates):
+                    self.stats.failovers += 1
+                    LLM_FAILOVERS.inc()
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        self.stats.failures += 1
+        raise NoBackendAvailableError("All LLM backends failed") from (
+            errors[-1] if errors else None
+        )
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        """Stream from the best backend, failing over only until the first chunk is sent.
+
+        Streams are not hedged; duplicate token streams cannot be merged.
+        """
+        self.stats.calls += 1
+        candidates = self._candidates()
+        if not candidates:
+            raise NoBackendAvailableError("All LLM backends have open circuits")
+
+        last_error: BaseException | None = None
+        for backend in candidates:
+            if not backend.breaker.acquire():
+                continue
+            started = self.clock()
+            sent_any = False
+            try:
+                async for chunk in backend.client.astream(messages):
+                    sent_any = True
+                    yield chunk
+            except asyncio.CancelledError:
+                backend.breaker.release()
+                raise
+            except Exception as e:
+                backend.record_failure()
+                if sent_any:
+                    raise
+                LOGGER.warning(f"LLM backend {backend.name} failed: {e}")
+                last_error = e
+                self.stats.failovers += 1
+                LLM_FAILOVERS.inc()
+                continue
+            backend.latency.observe(self.clock() - started)
+            backend.record_success()
+            return
+
+        self.stats.failures += 1
+        raise NoBackendAvailableError("All LLM backends failed") from last_error
+
+    def stats_snapshot(self) -> dict[str, Any]:
+        """Router counters plus per-backend latency and circuit state."""
+        return {
+            **asdict(self.stats),
+            "backends": {
+                backend.name: {
+                    "ewma_latency": backend.latency.mean,
+                    "p95_latency": backend.latency.p95,
+                    "circuit": backend.breaker.state,
+                }
+                for backend in self.backends
+            },
+        }
@@ -0,0 +1,257 @@
+"""Priority-aware scheduling of LLM calls with concurrency caps and rate-limit pacing."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from typing import Any
+
+from core.llm import BaseLLMClient
+from core.metrics import LLM_QUEUE_WAIT, LLM_QUEUED
+from core.tokens import estimate_tokens, messages_text
+
+
+class Priority(IntEnum):
+    """Scheduling lanes; lower values are served first."""
+
+    CRITICAL = 0
+    INTERACTIVE = 1
+    BATCH = 2
+    BACKGROUND = 3
+
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+_priority_floor: ContextVar[Priority] = ContextVar("llm_priority_floor", default=Priority.CRITICAL)
+
+
+@contextmanager
+def priority_scope(priority: Priority) -> Iterator[None]:
+    """Run the LLM calls made inside the block in the given lane."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def priority_floor(priority: Priority) -> Iterator[None]:
+    """Serve the LLM calls made inside the block no sooner than the given lane.
+
+    Nodes pick their own lane with `priority_scope`; the floor demotes them all, so bulk work
+    such as batch evaluation never competes with interactive turns.
+    """
+    token = _priority_floor.set(priority)
+    try:
+        yield
+    finally:
+        _priority_floor.reset(token)
+
+
+def current_priority() -> Priority:
+    return max(_current_priority.get(), _priority_floor.get())
+
+
+class PriorityLimiter:
+    """Semaphore whose waiters are woken in priority order, FIFO within a lane."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: Priority) -> None:
+        if self.limit <= 0 or (self.active < self.limit and not self.queued):
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the waiter was cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the next waiter; `active` stays the same
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class TokenBucket:
+    """Paces consumption to a per-minute budget; a budget of 0 disables pacing.
+
+    Waiters are served one at a time in priority order, FIFO within a lane.
+    """
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated_at = clock()
+        self._turns = PriorityLimiter(1)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float, priority: Priority = Priority.INTERACTIVE) -> None:
+        if self.capacity <= 0:
+            return
+        amount = min(amount, self.capacity)
+        # One waiter at a time, so small requests cannot starve big ones
+        await self._turns.acquire(priority)
+        try:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+        finally:
+            self._turns.release()
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or refund, if negative) tokens after the real cost is known."""
+        if self.capacity > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class LaneStats:
+    calls: int = 0
+    queued: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class ProviderLane:
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int):
+        self.limiter = PriorityLimiter(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+
+class LLMScheduler:
+    """Coordinates every LLM call in the process.
+
+    Calls first wait for the provider's requests-per-minute and tokens-per-minute buckets, then
+    take a global slot and a per-provider slot, all granted in priority order. Pacing comes
+    first so a call sleeping on the rate budget holds no slot higher lanes are queued behind.
+    Queue waits are exported as `llm_queue_wait_seconds` and `llm_queued_calls`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        provider_max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        expected_completion_tokens: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.global_limiter = PriorityLimiter(max_concurrency)
+        self.provider_max_concurrency = provider_max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.expected_completion_tokens = expected_completion_tokens
+        self.clock = clock
+        self.providers: dict[str, ProviderLane] = {}
+        self.stats = {priority: LaneStats() for priority in Priority}
+
+    def lane(self, provider: str) -> ProviderLane:
+        if provider not in self.providers:
+            self.providers[provider] = ProviderLane(
+                self.provider_max_concurrency, self.requests_per_minute, self.tokens_per_minute
+            )
+        return self.providers[provider]
+
+    def wrap(self, client: BaseLLMClient) -> "ScheduledLLMClient":
+        return ScheduledLLMClient(client, self)
+
+    @asynccontextmanager
+    async def slot(self, provider: str, prompt_tokens: int) -> AsyncIterator[ProviderLane]:
+        priority = current_priority()
+        stats = self.stats[priority]
+        lane = self.lane(provider)
+        started = self.clock()
+        granted = False
+        stats.queued += 1
+        LLM_QUEUED.inc(priority=priority.name.lower())
+        try:
+            await lane.requests.acquire(1, priority)
+            await lane.tokens.acquire(prompt_tokens + self.expected_completion_tokens, priority)
+            await self.global_limiter.acquire(priority)
+            try:
+                await lane.limiter.acquire(priority)
+                try:
+                    waited = self.clock() - started
+                    granted = True
+                    stats.queued -= 1
+                    stats.calls += 1
+                    stats.total_wait_seconds += waited
+                    stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+                    LLM_QUEUED.dec(priority=priority.name.lower())
+                    LLM_QUEUE_WAIT.observe(waited, priority=priority.name.lower())
+                    yield lane
+                finally:
+                    lane.limiter.release()
+            finally:
+                self.global_limiter.release()
+        finally:
+            if not granted:
+                stats.queued -= 1
+                LLM_QUEUED.dec(priority=priority.name.lower())
+
+    def stats_snapshot(self) -> dict[str, dict[str, Any]]:
+        """Queue-wait metrics per priority lane."""
+        return {priority.name.lower(): asdict(stats) for priority, stats in self.stats.items()}
+
+
+class ScheduledLLMClient(BaseLLMClient):
+    """Runs each call of the wrapped client through the shared scheduler."""
+
+    def __init__(self, client: BaseLLMClient, scheduler: LLMScheduler) -> None:
+        self.client = client
+        self.scheduler = scheduler
+        self.model_name = client.model_name
+        self.provider = getattr(client, "provider", client.model_name)
+
+    async def ainvoke(self, messages: Any) -> str:
+        async with self.scheduler.slot(
+            self.provider, estimate_tokens(messages_text(messages))
+        ) as lane:
+            response = await self.client.ainvoke(messages)
+        lane.tokens.adjust(estimate_tokens(response) - self.scheduler.expected_completion_tokens)
+        return response
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        chunks = []
+        async with self.scheduler.slot(
+            self.provider, estimate_tokens(messages_text(messages))
+        ) as lane:
+            async for chunk in self.client.astream(messages):
+                chunks.append(chunk)
+                yield chunk
+        lane.tokens.adjust(
+            estimate_tokens("".join(chunks)) - self.scheduler.expected_completion_tokens
+        )
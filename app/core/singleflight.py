@@ -0,0 +1,72 @@
+"""Coalescing of identical in-flight LLM calls."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from core.cache import cache_key
+from core.llm import BaseLLMClient
+from core.metrics import LLM_CALLS_ABANDONED, LLM_CALLS_COALESCED
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    coalesced: int = 0
+    abandoned: int = 0
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlightLLMClient(BaseLLMClient):
+    """Lets concurrent callers with the same request fingerprint share one provider call.
+
+    Each caller awaits the shared task through `asyncio.shield`, so one waiter going away does
+    not cancel the call for the others. The call is cancelled only when its last waiter leaves.
+    """
+
+    def __init__(self, client: BaseLLMClient) -> None:
+        self.client = client
+        self.model_name = client.model_name
+        self.stats = SingleFlightStats()
+        self._flights: dict[str, _Flight] = {}
+
+    async def ainvoke(self, messages: Any) -> str:
+        self.stats.calls += 1
+        key = cache_key(self.model_name, messages)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(self.client.ainvoke(messages)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats.coalesced += 1
+            LLM_CALLS_COALESCED.inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self.stats.abandoned += 1
+                LLM_CALLS_ABANDONED.inc()
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def astream(self, messages: Any) -> AsyncIterator[str]:
+        """Streams are passed through; token streams cannot be shared between callers."""
+        async for chunk in self.client.astream(messages):
+            yield chunk
+
+    def stats_snapshot(self) -> dict[str, int]:
+        return asdict(self.stats)
@@ -0,0 +1,25 @@
+"""Local token estimation, used where a model-specific tokenizer would be overkill."""
+
+import re
+from typing import Any
+
+# Words, numbers and individual punctuation marks, roughly how BPE tokenizers split text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without a model-specific tokenizer.
+
+    Short words count as one token, long words as one token per ~6 characters.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def messages_text(messages: Any) -> str:
+    """Concatenate the content of a prompt given as a string, message dicts or message objects."""
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(
+        str(message.get("content", "") if isinstance(message, dict) else message.content)
+        for message in messages
+    )
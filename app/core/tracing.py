@@ -0,0 +1,53 @@
+"""Per-request trace IDs and the graph node currently executing."""
+
+import logging
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_HEADER = "X-Trace-ID"
+
+_trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+_current_node: ContextVar[str | None] = ContextVar("current_node", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextmanager
+def trace_scope(trace_id: str | None = None) -> Iterator[str]:
+    """Bind a trace ID to this context; tasks created inside inherit it."""
+    trace_id = trace_id or current_trace_id() or new_trace_id()
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+def current_node() -> str | None:
+    return _current_node.get()
+
+
+@contextmanager
+def node_scope(name: str) -> Iterator[None]:
+    """Mark the graph node running in this context, so LLM metrics can be attributed to it."""
+    token = _current_node.set(name)
+    try:
+        yield
+    finally:
+        _current_node.reset(token)
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `trace_id` to log records so the log format can include it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
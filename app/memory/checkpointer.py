@@ -0,0 +1,139 @@
+"""In-process LangGraph checkpointer with bounded memory."""
+
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from core.metrics import CHECKPOINT_EVICTIONS, CHECKPOINT_THREADS
+
+LOGGER = logging.getLogger("checkpointer")
+LOGGER.setLevel(logging.INFO)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """`InMemorySaver` that evicts idle threads and, optionally, superseded checkpoints.
+
+    Threads are kept in LRU order of their last checkpoint; the least recently used are evicted
+    beyond `max_threads`, and threads idle for longer than `ttl_seconds` are evicted on the next
+    write. With `keep_latest_only`, writing a checkpoint drops the thread's older checkpoints,
+    their pending writes and the channel blobs only they referenced, so a thread costs one
+    checkpoint however long the conversation. Time travel to earlier checkpoints is then not
+    possible; the graph does not use it.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10_000,
+        ttl_seconds: float | None = None,
+        keep_latest_only: bool = True,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.keep_latest_only = keep_latest_only
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        # Keys of `writes` and `blobs` per thread, so evicting a thread does not scan every key
+        self._write_keys: defaultdict[str, set[tuple]] = defaultdict(set)
+        self._blob_keys: defaultdict[str, set[tuple]] = defaultdict(set)
+
+    @property
+    def thread_count(self) -> int:
+        return len(self._last_used)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        # The base class reads through defaultdicts, which would leave an entry per unknown thread
+        if config["configurable"]["thread_id"] not in self.storage:
+            return None
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = saved["configurable"]["thread_id"]
+        checkpoint_ns = saved["configurable"]["checkpoint_ns"]
+        self._blob_keys[thread_id].update(
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in new_versions.items()
+        )
+        if self.keep_latest_only:
+            self._drop_superseded(thread_id, checkpoint_ns, checkpoint)
+        self._touch(thread_id)
+        return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        configurable = config["configurable"]
+        self._write_keys[configurable["thread_id"]].add(
+            (
+                configurable["thread_id"],
+                configurable.get("checkpoint_ns", ""),
+                configurable["checkpoint_id"],
+            )
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._last_used.pop(thread_id, None)
+        CHECKPOINT_THREADS.set(self.thread_count)
+
+    def _drop_superseded(self, thread_id: str, checkpoint_ns: str, checkpoint: Checkpoint) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for checkpoint_id in [cid for cid in checkpoints if cid != checkpoint["id"]]:
+            del checkpoints[checkpoint_id]
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys[thread_id].discard(write_key)
+        current = {
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in checkpoint["channel_versions"].items()
+        }
+        blob_keys = self._blob_keys[thread_id]
+        for key in [k for k in blob_keys if k[1] == checkpoint_ns and k not in current]:
+            self.blobs.pop(key, None)
+            blob_keys.discard(key)
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        self._last_used[thread_id] = now
+        self._last_used.move_to_end(thread_id)
+        while len(self._last_used) > self.max_threads:
+            self._evict(next(iter(self._last_used)), "size")
+        if self.ttl_seconds is not None:
+            while self._last_used:
+                oldest, last_used = next(iter(self._last_used.items()))
+                if now - last_used <= self.ttl_seconds:
+                    break
+                self._evict(oldest, "ttl")
+        CHECKPOINT_THREADS.set(self.thread_count)
+
+    def _evict(self, thread_id: str, reason: str) -> None:
+        self.delete_thread(thread_id)
+        CHECKPOINT_EVICTIONS.inc(reason=reason)
+        LOGGER.debug(f"Evicted checkpoints of thread {thread_id} ({reason})")
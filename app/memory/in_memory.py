@@ -0,0 +1,117 @@
+"""In-process stand-in for PostgresClient, used by tests and benchmarks."""
+
+import time
+from typing import Any
+
+from config.settings import settings
+from config.state import SessionState, UserProfile
+from core.codec import dumps_str, loads
+from memory.postgres import unsaved_messages
+
+
+class InMemoryPostgresClient:
+    """Implements the PostgresClient interface on dicts.
+
+    Rows are stored as JSON so the (de)serialization cost of a real round trip is kept.
+    """
+
+    def __init__(self) -> None:
+        self.states: dict[str, str] = {}
+        # Append-only message log per session, as (seq, message) pairs
+        self.messages: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+        self.profiles: dict[str, str] = {}
+        self.cached_responses: dict[str, tuple[float, str]] = {}
+        self.leases: dict[str, tuple[str, float]] = {}
+
+    async def ensure_pool(self):
+        pass
+
+    async def migrate(self) -> list[int]:
+        return []
+
+    async def add_state(self, state: SessionState):
+        log = self.messages.setdefault(state.session_id, [])
+        last_seq = log[-1][0] if log else 0
+        log.extend(
+            (seq, loads(dumps_str(message)))
+            for seq, message in unsaved_messages(state)
+            if seq > last_seq
+        )
+        row = state.model_dump(exclude={"conversation_history"})
+        row["history_start_seq"] = state.message_count - len(state.conversation_history) + 1
+        self.states[state.session_id] = dumps_str(row)
+        state.saved_message_count = state.message_count
+
+    async def get_state(self, session_id: str) -> SessionState | None:
+        row = self.states.get(session_id)
+        if not row:
+            return None
+        data = loads(row)
+        history_start_seq = data.pop("history_start_seq")
+        tail = self.messages.get(session_id, [])[-settings.HISTORY_LOAD_MAX_MESSAGES :]
+        data["conversation_history"] = [msg for seq, msg in tail if seq >= history_start_seq]
+        state = SessionState(**data)
+        state.saved_message_count = state.message_count
+        return state
+
+    async def get_state_and_profile(
+        self, session_id: str, user_id: str
+    ) -> tuple[SessionState | None, UserProfile | None]:
+        return await self.get_state(session_id), await self.get_user_profile(user_id)
+
+    async def get_states_and_profiles(
+        self, session_ids: list[str], user_ids: list[str]
+    ) -> tuple[dict[str, SessionState], dict[str, UserProfile]]:
+        states = {sid: state for sid in session_ids if (state := await self.get_state(sid))}
+        profiles = {
+            uid: profile for uid in user_ids if (profile := await self.get_user_profile(uid))
+        }
+        return states, profiles
+
+    async def save_user_profile(self, user_profile: UserProfile):
+        existing = loads(self.profiles.get(user_profile.user_id, "{}"))
+        updates = user_profile.model_dump(exclude_none=True)
+        self.profiles[user_profile.user_id] = dumps_str({**existing, **updates})
+
+    async def update_user_profile(self, user_id: str, patch: dict[str, Any]):
+        profile = loads(self.profiles.get(user_id, dumps_str({"user_id": user_id})))
+        for field, value in patch.items():
+            if isinstance(value, dict):
+                profile[field] = {**(profile.get(field) or {}), **value}
+            else:
+                profile[field] = value
+        self.profiles[user_id] = dumps_str(profile)
+
+    async def get_user_profile(self, user_id: str) -> UserProfile | None:
+        row = self.profiles.get(user_id)
+        return UserProfile.model_validate_json(row) if row else None
+
+    async def get_cached_response(self, cache_key: str) -> str | None:
+        entry = self.cached_responses.get(cache_key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        return None
+
+    async def save_cached_response(self, cache_key: str, response: str, ttl_seconds: float):
+        self.cached_responses[cache_key] = (time.time() + ttl_seconds, response)
+
+    async def acquire_session_lease(self, session_id: str, holder: str, ttl_seconds: float) -> bool:
+        lease = self.leases.get(session_id)
+        if lease and lease[1] > time.time():
+            return False
+        self.leases[session_id] = (holder, time.time() + ttl_seconds)
+        return True
+
+    async def renew_session_lease(self, session_id: str, holder: str, ttl_seconds: float) -> bool:
+        lease = self.leases.get(session_id)
+        if not lease or lease[0] != holder:
+            return False
+        self.leases[session_id] = (holder, time.time() + ttl_seconds)
+        return True
+
+    async def release_session_lease(self, session_id: str, holder: str):
+        if self.leases.get(session_id, ("",))[0] == holder:
+            del self.leases[session_id]
+
+    async def close(self):
+        pass
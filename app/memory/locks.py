@@ -0,0 +1,130 @@
+"""Per-session serialization of turns across workers and replicas."""
+
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Protocol
+
+from core.metrics import SESSION_LOCK_TIMEOUTS, SESSION_LOCK_WAIT
+
+LOGGER = logging.getLogger("locks")
+LOGGER.setLevel(logging.INFO)
+
+
+class SessionBusyError(RuntimeError):
+    """Another turn of the session held its lease for longer than the wait timeout."""
+
+
+class LeaseBackend(Protocol):
+    async def acquire_session_lease(
+        self, session_id: str, holder: str, ttl_seconds: float
+    ) -> bool: ...
+
+    async def renew_session_lease(
+        self, session_id: str, holder: str, ttl_seconds: float
+    ) -> bool: ...
+
+    async def release_session_lease(self, session_id: str, holder: str) -> None: ...
+
+
+class SessionLocks:
+    """Leases in the shared database, so one turn per session runs at a time anywhere.
+
+    A lease expires after `ttl_seconds` unless renewed, so a crashed worker cannot block a
+    session for longer than that; holders renew at a third of the TTL. Turns of one session that
+    land on the same worker first queue on a local lock, so only one of them polls the database.
+    """
+
+    def __init__(
+        self,
+        backend: LeaseBackend,
+        ttl_seconds: float = 60.0,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+    ) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        # Local locks with the number of turns using them, dropped when unused
+        self._local: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        """Hold the session's lease for the enclosed block.
+
+        Raises:
+            SessionBusyError: The lease could not be taken within `wait_timeout`.
+        """
+        lock, users = self._local.get(session_id, (asyncio.Lock(), 0))
+        self._local[session_id] = (lock, users + 1)
+        try:
+            holder = await self._wait(session_id, lock)
+            released = asyncio.Event()
+            renewal = asyncio.create_task(self._renew(session_id, holder, released))
+            try:
+                yield
+            finally:
+                released.set()
+                try:
+                    await renewal
+                    await self.backend.release_session_lease(session_id, holder)
+                finally:
+                    lock.release()
+        finally:
+            lock, users = self._local[session_id]
+            if users == 1:
+                del self._local[session_id]
+            else:
+                self._local[session_id] = (lock, users - 1)
+
+    async def _wait(self, session_id: str, lock: asyncio.Lock) -> str:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.wait_timeout):
+                await lock.acquire()
+            try:
+                holder = await self._acquire(session_id, started)
+            except BaseException:
+                lock.release()
+                raise
+        except TimeoutError as e:
+            SESSION_LOCK_TIMEOUTS.inc()
+            raise SessionBusyError(f"Session {session_id} is busy") from e
+        SESSION_LOCK_WAIT.observe(time.perf_counter() - started)
+        return holder
+
+    async def _acquire(self, session_id: str, started: float) -> str:
+        holder = uuid.uuid4().hex
+        delay = self.poll_interval
+        while not await self.backend.acquire_session_lease(session_id, holder, self.ttl_seconds):
+            remaining = self.wait_timeout - (time.perf_counter() - started)
+            if remaining <= 0:
+                raise TimeoutError
+            await asyncio.sleep(min(delay * random.uniform(0.5, 1.5), remaining))
+            delay = min(delay * 2, self.max_poll_interval)
+        return holder
+
+    async def _renew(self, session_id: str, holder: str, released: asyncio.Event) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(released.wait(), self.ttl_seconds / 3)
+                return
+            except TimeoutError:
+                pass
+            try:
+                renewed = await self.backend.renew_session_lease(
+                    session_id, holder, self.ttl_seconds
+                )
+            except Exception:
+                LOGGER.exception(f"Failed to renew the lease of session {session_id}")
+                continue
+            if not renewed:
+                LOGGER.error(f"Lost the lease of session {session_id}; turns may interleave")
+                return
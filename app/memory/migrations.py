@@ -0,0 +1,193 @@
+"""Versioned schema migrations for the application tables.
+
+Migrations run once at startup (see `service.lifespan`), never on the request path. Applied
+versions are recorded in `schema_migrations`; an advisory lock keeps concurrently starting
+workers from applying the same migration twice. Statements stay idempotent so databases created
+before versioning was introduced migrate cleanly.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+LOGGER = logging.getLogger("migrations")
+LOGGER.setLevel(logging.INFO)
+
+# Arbitrary constant identifying the migration lock among other advisory locks
+MIGRATION_LOCK_KEY = 7_240_115
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create session_state and user_profile",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                user_input TEXT,
+                allopathy_advice TEXT,
+                ayurveda_advice TEXT,
+                conversation_history JSONB,
+                gathered_ancient_knowledge BOOLEAN,
+                has_sufficient_details BOOLEAN,
+                has_contraindications BOOLEAN,
+                is_emergency BOOLEAN,
+                is_medical BOOLEAN,
+                lifestyle_advice TEXT,
+                response TEXT,
+                safety_warnings JSONB,
+                tcm_advice TEXT,
+                user_profile JSONB,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS user_profile (
+                user_id TEXT PRIMARY KEY,
+                name TEXT,
+                allergies TEXT,
+                ayurveda JSONB,
+                biometrics JSONB,
+                demographics JSONB,
+                diet JSONB,
+                health_goals JSONB,
+                lifestyle JSONB,
+                medical_history JSONB,
+                other TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2, "add user_profile.name", ("ALTER TABLE user_profile ADD COLUMN IF NOT EXISTS name TEXT",)
+    ),
+    Migration(
+        3,
+        "add session_state.history_summary",
+        ("ALTER TABLE session_state ADD COLUMN IF NOT EXISTS history_summary TEXT DEFAULT ''",),
+    ),
+    Migration(
+        4,
+        "create llm_cache",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "create session_leases",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS session_leases (
+                session_id TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migration(
+        6,
+        "add user_profile.preferences",
+        (
+            "ALTER TABLE user_profile ADD COLUMN IF NOT EXISTS preferences JSONB NOT NULL DEFAULT '{}'",
+        ),
+    ),
+    Migration(
+        7,
+        "move conversation histories to session_messages",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS session_messages (
+                session_id TEXT NOT NULL,
+                seq BIGINT NOT NULL,
+                message JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (session_id, seq)
+            )
+            """,
+            "ALTER TABLE session_state ADD COLUMN IF NOT EXISTS message_count BIGINT NOT NULL DEFAULT 0",
+            """
+            ALTER TABLE session_state
+            ADD COLUMN IF NOT EXISTS history_start_seq BIGINT NOT NULL DEFAULT 1
+            """,
+            """
+            INSERT INTO session_messages (session_id, seq, message)
+            SELECT s.session_id, m.seq, m.message
+            FROM session_state s,
+                 jsonb_array_elements(s.conversation_history) WITH ORDINALITY AS m(message, seq)
+            WHERE jsonb_typeof(s.conversation_history) = 'array'
+            ON CONFLICT (session_id, seq) DO NOTHING
+            """,
+            """
+            UPDATE session_state
+            SET message_count = jsonb_array_length(conversation_history),
+                history_start_seq = 1,
+                conversation_history = NULL
+            WHERE jsonb_typeof(conversation_history) = 'array'
+            """,
+        ),
+    ),
+)
+
+
+async def applied_versions(conn: Any) -> set[int]:
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT version FROM schema_migrations")
+        return {row["version"] for row in await cur.fetchall()}
+
+
+async def apply_migrations(conn: Any, migrations: tuple[Migration, ...] = MIGRATIONS) -> list[int]:
+    """Apply pending migrations in version order, each in its own transaction.
+
+    Args:
+        conn: An autocommit psycopg connection using the dict row factory.
+        migrations: The migrations to bring the schema up to.
+
+    Returns:
+        The versions applied by this call.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await conn.execute("SELECT pg_advisory_lock(%(key)s)", {"key": MIGRATION_LOCK_KEY})
+    try:
+        done = await applied_versions(conn)
+        applied = []
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            async with conn.transaction():
+                for statement in migration.statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%(version)s, %(name)s)",
+                    {"version": migration.version, "name": migration.name},
+                )
+            LOGGER.info(f"Applied migration {migration.version}: {migration.name}")
+            applied.append(migration.version)
+        return applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(%(key)s)", {"key": MIGRATION_LOCK_KEY})
@@ -1,14 +1,52 @@
-import json
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Any
 
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.store.postgres import AsyncPostgresStore
-from psycopg.rows import dict_row
+from psycopg import AsyncConnection, sql
+from psycopg.rows import DictRow, dict_row
+from psycopg.types.json import Jsonb
 from psycopg_pool import AsyncConnectionPool
 
 from config.settings import settings
 from config.state import SessionState, UserProfile
+from core.codec import configure_connection
+from core.metrics import DB_QUERY_DURATION, DB_QUERY_ERRORS, timed
+from memory.migrations import apply_migrations
+
+# A session_state row `s` as JSON with the tail of its message log, newest
+# `history_limit` messages from the first one not folded into the history summary
+STATE_WITH_MESSAGES = """
+    json_build_object(
+        'state', row_to_json(s),
+        'messages', (
+            SELECT COALESCE(json_agg(t.message ORDER BY t.seq), '[]'::json)
+            FROM (
+                SELECT m.seq, m.message FROM session_messages m
+                WHERE m.session_id = s.session_id AND m.seq >= s.history_start_seq
+                ORDER BY m.seq DESC
+                LIMIT %(history_limit)s
+            ) t
+        )
+    )
+"""
+
+
+def state_from_row(row: dict[str, Any]) -> SessionState:
+    """Build a session state from `STATE_WITH_MESSAGES` output."""
+    state = SessionState(**{**row["state"], "conversation_history": row["messages"]})
+    state.saved_message_count = state.message_count
+    return state
+
+
+def unsaved_messages(state: SessionState) -> list[tuple[int, dict[str, Any]]]:
+    """The messages added since the state was saved, with their sequence numbers."""
+    unsaved = min(state.message_count - state.saved_message_count, len(state.conversation_history))
+    if unsaved <= 0:
+        return []
+    first_seq = state.message_count - unsaved + 1
+    return list(enumerate(state.conversation_history[-unsaved:], start=first_seq))
 
 
 def get_postgres_connection_string() -> str:
@@ -86,12 +124,14 @@ async def save_message(conn, session_id: str, role: str, content: str):
 class PostgresClient:
     def __init__(self):
         self.connection_string = get_postgres_connection_string()
-        self.pool = None
+        self.pool: AsyncConnectionPool[AsyncConnection[DictRow]] | None = None
 
-    async def ensure_pool(self):
+    async def ensure_pool(self) -> AsyncConnectionPool[AsyncConnection[DictRow]]:
+        """Open the connection pool on first use and return it."""
         if self.pool is None:
             self.pool = AsyncConnectionPool(
                 self.connection_string,
+                connection_class=AsyncConnection[DictRow],
                 min_size=settings.POSTGRES_MIN_CONNECTIONS_PER_POOL,
                 max_size=settings.POSTGRES_MAX_CONNECTIONS_PER_POOL,
                 kwargs={
@@ -100,61 +140,29 @@ class PostgresClient:
                     "application_name": settings.POSTGRES_APPLICATION_NAME,
                 },
                 check=AsyncConnectionPool.check_connection,
+                configure=configure_connection,
                 open=False,
             )
             await self.pool.open()
+        return self.pool
 
-    async def create_tables(self):
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS session_state (
-                    session_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    user_input TEXT,
-                    allopathy_advice TEXT,
-                    ayurveda_advice TEXT,
-                    conversation_history JSONB,
-                    gathered_ancient_knowledge BOOLEAN,
-                    has_sufficient_details BOOLEAN,
-                    has_contraindications BOOLEAN,
-                    is_emergency BOOLEAN,
-                    is_medical BOOLEAN,
-                    lifestyle_advice TEXT,
-                    response TEXT,
-                    safety_warnings JSONB,
-                    tcm_advice TEXT,
-                    user_profile JSONB,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS user_profile (
-                    user_id TEXT PRIMARY KEY,
-                    name TEXT,
-                    allergies TEXT,
-                    ayurveda JSONB,
-                    biometrics JSONB,
-                    demographics JSONB,
-                    diet JSONB,
-                    health_goals JSONB,
-                    lifestyle JSONB,
-                    medical_history JSONB,
-                    other TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-
-            await conn.execute("""
-                ALTER TABLE user_profile 
-                ADD COLUMN IF NOT EXISTS name TEXT;
-            """)
+    async def migrate(self) -> list[int]:
+        """Bring the schema up to date; run once at startup, not per request."""
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn:
+            return await apply_migrations(conn)
 
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="add_state")
     async def add_state(self, state: SessionState):
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:
+        """Save the session state and append the turn's new messages to its message log.
+
+        Only messages added since the state was loaded are written, so a turn costs the same
+        whatever the length of the conversation. Updates `state.saved_message_count`.
+        """
+        new_messages = unsaved_messages(state)
+        history_start_seq = state.message_count - len(state.conversation_history) + 1
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.transaction():
             await conn.execute(
                 """
                 INSERT INTO session_state (
@@ -163,13 +171,15 @@ class PostgresClient:
                     user_input, 
                     allopathy_advice, 
                     ayurveda_advice, 
-                    conversation_history,
                     gathered_ancient_knowledge,
                     has_sufficient_details,
                     has_contraindications,
+                    history_start_seq,
+                    history_summary,
                     is_emergency,
                     is_medical,
                     lifestyle_advice,
+                    message_count,
                     response,
                     safety_warnings,
                     tcm_advice,
@@ -181,13 +191,15 @@ class PostgresClient:
                     %(user_input)s, 
                     %(allopathy_advice)s, 
                     %(ayurveda_advice)s, 
-                    %(conversation_history)s, 
                     %(gathered_ancient_knowledge)s, 
                     %(has_sufficient_details)s, 
                     %(has_contraindications)s, 
+                    %(history_start_seq)s, 
+                    %(history_summary)s, 
                     %(is_emergency)s, 
                     %(is_medical)s, 
                     %(lifestyle_advice)s, 
+                    %(message_count)s, 
                     %(response)s, 
                     %(safety_warnings)s, 
                     %(tcm_advice)s, 
@@ -198,13 +210,15 @@ class PostgresClient:
                     user_input = EXCLUDED.user_input,
                     allopathy_advice = EXCLUDED.allopathy_advice,
                     ayurveda_advice = EXCLUDED.ayurveda_advice,
-                    conversation_history = EXCLUDED.conversation_history,
                     gathered_ancient_knowledge = EXCLUDED.gathered_ancient_knowledge,
                     has_sufficient_details = EXCLUDED.has_sufficient_details,
                     has_contraindications = EXCLUDED.has_contraindications,
+                    history_start_seq = EXCLUDED.history_start_seq,
+                    history_summary = EXCLUDED.history_summary,
                     is_emergency = EXCLUDED.is_emergency,
                     is_medical = EXCLUDED.is_medical,
                     lifestyle_advice = EXCLUDED.lifestyle_advice,
+                    message_count = EXCLUDED.message_count,
                     response = EXCLUDED.response,
                     safety_warnings = EXCLUDED.safety_warnings,
                     tcm_advice = EXCLUDED.tcm_advice,
@@ -217,46 +231,119 @@ class PostgresClient:
                     "user_input": state.user_input,
                     "allopathy_advice": state.allopathy_advice,
                     "ayurveda_advice": state.ayurveda_advice,
-                    "conversation_history": json.dumps(state.conversation_history),
                     "gathered_ancient_knowledge": state.gathered_ancient_knowledge,
                     "has_sufficient_details": state.has_sufficient_details,
                     "has_contraindications": state.has_contraindications,
+                    "history_start_seq": history_start_seq,
+                    "history_summary": state.history_summary,
                     "is_emergency": state.is_emergency,
                     "is_medical": state.is_medical,
                     "lifestyle_advice": state.lifestyle_advice,
+                    "message_count": state.message_count,
                     "response": state.response,
-                    "safety_warnings": json.dumps(state.safety_warnings),
+                    "safety_warnings": Jsonb(state.safety_warnings),
                     "tcm_advice": state.tcm_advice,
                     "user_profile": state.user_profile.model_dump_json()
                     if state.user_profile
                     else None,
                 },
             )
+            if new_messages:
+                async with conn.cursor() as cur:
+                    # A retried save finds its messages already stored
+                    await cur.executemany(
+                        """
+                        INSERT INTO session_messages (session_id, seq, message)
+                        VALUES (%(session_id)s, %(seq)s, %(message)s)
+                        ON CONFLICT (session_id, seq) DO NOTHING
+                        """,
+                        [
+                            {"session_id": state.session_id, "seq": seq, "message": Jsonb(message)}
+                            for seq, message in new_messages
+                        ],
+                    )
+        state.saved_message_count = state.message_count
 
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="get_state")
     async def get_state(self, session_id: str) -> SessionState | None:
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "SELECT * FROM session_state WHERE session_id = %(session_id)s",
-                    {"session_id": session_id},
-                )
-                row = await cur.fetchone()
-                if row:
-                    return SessionState(**row)
-        return None
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                f"SELECT {STATE_WITH_MESSAGES} AS state FROM session_state s "
+                "WHERE s.session_id = %(session_id)s",
+                {"session_id": session_id, "history_limit": settings.HISTORY_LOAD_MAX_MESSAGES},
+            )
+            row = await cur.fetchone()
+        return state_from_row(row["state"]) if row else None
 
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="get_state_and_profile")
+    async def get_state_and_profile(
+        self, session_id: str, user_id: str
+    ) -> tuple[SessionState | None, UserProfile | None]:
+        """Fetch the session state and the user profile in a single round trip."""
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                f"""
+                    SELECT
+                        (SELECT {STATE_WITH_MESSAGES} FROM session_state s
+                         WHERE s.session_id = %(session_id)s) AS state,
+                        (SELECT row_to_json(p) FROM user_profile p
+                         WHERE p.user_id = %(user_id)s) AS profile
+                    """,
+                {
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "history_limit": settings.HISTORY_LOAD_MAX_MESSAGES,
+                },
+            )
+            row = await cur.fetchone()
+        state = state_from_row(row["state"]) if row and row["state"] else None
+        profile = UserProfile(**row["profile"]) if row and row["profile"] else None
+        return state, profile
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="get_states_and_profiles")
+    async def get_states_and_profiles(
+        self, session_ids: list[str], user_ids: list[str]
+    ) -> tuple[dict[str, SessionState], dict[str, UserProfile]]:
+        """Fetch many session states and user profiles in a single round trip.
+
+        Returns:
+            The states found by session ID and the profiles found by user ID.
+        """
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                f"""
+                    SELECT
+                        (SELECT json_agg({STATE_WITH_MESSAGES}) FROM session_state s
+                         WHERE s.session_id = ANY(%(session_ids)s)) AS states,
+                        (SELECT json_agg(p) FROM user_profile p
+                         WHERE p.user_id = ANY(%(user_ids)s)) AS profiles
+                    """,
+                {
+                    "session_ids": session_ids,
+                    "user_ids": user_ids,
+                    "history_limit": settings.HISTORY_LOAD_MAX_MESSAGES,
+                },
+            )
+            row = await cur.fetchone()
+        states = [state_from_row(s) for s in (row and row["states"]) or []]
+        profiles = {p["user_id"]: UserProfile(**p) for p in (row and row["profiles"]) or []}
+        return {state.session_id: state for state in states}, profiles
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="save_user_profile")
     async def save_user_profile(self, user_profile: UserProfile):
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn:
             await conn.execute(
                 """
                 INSERT INTO user_profile (
-                    user_id, name, allergies, ayurveda, biometrics, demographics, diet, health_goals, lifestyle, medical_history, updated_at
+                    user_id, name, allergies, ayurveda, biometrics, demographics, diet, health_goals, lifestyle, medical_history, preferences, updated_at
                 )
                 VALUES (
                     %(user_id)s, %(name)s, %(allergies)s, %(ayurveda)s::jsonb, %(biometrics)s::jsonb, %(demographics)s::jsonb,
-                    %(diet)s::jsonb, %(health_goals)s::jsonb, %(lifestyle)s::jsonb, %(medical_history)s::jsonb, CURRENT_TIMESTAMP
+                    %(diet)s::jsonb, %(health_goals)s::jsonb, %(lifestyle)s::jsonb, %(medical_history)s::jsonb, %(preferences)s::jsonb, CURRENT_TIMESTAMP
                 )
                 ON CONFLICT (user_id) DO UPDATE SET
                     name = COALESCE(EXCLUDED.name, user_profile.name),
@@ -268,6 +355,7 @@ class PostgresClient:
                     health_goals = COALESCE(EXCLUDED.health_goals, user_profile.health_goals),
                     lifestyle = COALESCE(EXCLUDED.lifestyle, user_profile.lifestyle),
                     medical_history = COALESCE(EXCLUDED.medical_history, user_profile.medical_history),
+                    preferences = COALESCE(EXCLUDED.preferences, user_profile.preferences),
                     updated_at = CURRENT_TIMESTAMP;
                 """,
                 {
@@ -293,22 +381,148 @@ class PostgresClient:
                     "medical_history": user_profile.medical_history.model_dump_json()
                     if user_profile.medical_history
                     else None,
+                    "preferences": user_profile.preferences.model_dump_json()
+                    if user_profile.preferences
+                    else None,
                     "other": user_profile.other,
                 },
             )
 
-    async def get_user_profile(self, user_id: str) -> UserProfile | None:
-        await self.ensure_pool()
-        async with self.pool.connection() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "SELECT * FROM user_profile WHERE user_id = %(user_id)s", {"user_id": user_id}
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="update_user_profile")
+    async def update_user_profile(self, user_id: str, patch: dict[str, Any]):
+        """Write only the profile fields in `patch` (see `agent.profile.profile_patch`).
+
+        Section patches are merged into the stored JSONB with `||`, so sibling keys of the
+        section are left as they are.
+        """
+        columns = [column for column in patch if column in UserProfile.model_fields]
+        if not columns:
+            return
+        params: dict[str, Any] = {"user_id": user_id}
+        assignments = []
+        for column in columns:
+            value = patch[column]
+            if isinstance(value, dict):
+                params[column] = Jsonb(value)
+                assignments.append(
+                    sql.SQL("{col} = COALESCE(user_profile.{col}, '{{}}'::jsonb) || EXCLUDED.{col}")
                 )
-                row = await cur.fetchone()
-                if row:
-                    return UserProfile(**row)
+            else:
+                params[column] = value
+                assignments.append(sql.SQL("{col} = EXCLUDED.{col}"))
+        identifiers = [sql.Identifier(column) for column in columns]
+        query = sql.SQL(
+            """
+            INSERT INTO user_profile (user_id, {columns}, updated_at)
+            VALUES (%(user_id)s, {values}, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id) DO UPDATE SET {assignments}, updated_at = CURRENT_TIMESTAMP
+            """
+        ).format(
+            columns=sql.SQL(", ").join(identifiers),
+            values=sql.SQL(", ").join(sql.Placeholder(column) for column in columns),
+            assignments=sql.SQL(", ").join(
+                assignment.format(col=identifier)
+                for assignment, identifier in zip(assignments, identifiers, strict=True)
+            ),
+        )
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn:
+            await conn.execute(query, params)
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="get_user_profile")
+    async def get_user_profile(self, user_id: str) -> UserProfile | None:
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                "SELECT * FROM user_profile WHERE user_id = %(user_id)s", {"user_id": user_id}
+            )
+            row = await cur.fetchone()
+            if row:
+                return UserProfile(**row)
+        return None
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="get_cached_response")
+    async def get_cached_response(self, cache_key: str) -> str | None:
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                """
+                    SELECT response FROM llm_cache
+                    WHERE cache_key = %(cache_key)s AND expires_at > CURRENT_TIMESTAMP
+                    """,
+                {"cache_key": cache_key},
+            )
+            row = await cur.fetchone()
+            if row:
+                return row["response"]
         return None
 
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="save_cached_response")
+    async def save_cached_response(self, cache_key: str, response: str, ttl_seconds: float):
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO llm_cache (cache_key, response, expires_at)
+                VALUES (
+                    %(cache_key)s,
+                    %(response)s,
+                    CURRENT_TIMESTAMP + make_interval(secs => %(ttl_seconds)s)
+                )
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    response = EXCLUDED.response,
+                    expires_at = EXCLUDED.expires_at;
+                """,
+                {"cache_key": cache_key, "response": response, "ttl_seconds": ttl_seconds},
+            )
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="acquire_session_lease")
+    async def acquire_session_lease(self, session_id: str, holder: str, ttl_seconds: float) -> bool:
+        """Take the session's lease unless another holder has an unexpired one."""
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                """
+                    INSERT INTO session_leases (session_id, holder, expires_at)
+                    VALUES (
+                        %(session_id)s,
+                        %(holder)s,
+                        CURRENT_TIMESTAMP + make_interval(secs => %(ttl_seconds)s)
+                    )
+                    ON CONFLICT (session_id) DO UPDATE SET
+                        holder = EXCLUDED.holder,
+                        expires_at = EXCLUDED.expires_at
+                    WHERE session_leases.expires_at <= CURRENT_TIMESTAMP
+                    RETURNING holder;
+                    """,
+                {"session_id": session_id, "holder": holder, "ttl_seconds": ttl_seconds},
+            )
+            return await cur.fetchone() is not None
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="renew_session_lease")
+    async def renew_session_lease(self, session_id: str, holder: str, ttl_seconds: float) -> bool:
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(
+                """
+                    UPDATE session_leases
+                    SET expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(ttl_seconds)s)
+                    WHERE session_id = %(session_id)s AND holder = %(holder)s
+                    RETURNING holder;
+                    """,
+                {"session_id": session_id, "holder": holder, "ttl_seconds": ttl_seconds},
+            )
+            return await cur.fetchone() is not None
+
+    @timed(DB_QUERY_DURATION, DB_QUERY_ERRORS, operation="release_session_lease")
+    async def release_session_lease(self, session_id: str, holder: str):
+        pool = await self.ensure_pool()
+        async with pool.connection() as conn:
+            await conn.execute(
+                "DELETE FROM session_leases WHERE session_id = %(session_id)s AND holder = %(holder)s",
+                {"session_id": session_id, "holder": holder},
+            )
+
     async def close(self):
         if self.pool:
             await self.pool.close()
@@ -4,14 +4,18 @@ from contextlib import asynccontextmanager
 import asyncpg
 from fastapi import FastAPI
 
+from agent.dependencies import get_orchestrator, get_postgres_client
 from config.settings import settings
 from memory import initialize_database, initialize_store
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
-    """Initializes database checkpointer and store based on settings."""
+    """Applies schema migrations and initializes database checkpointer and store."""
+    postgres_client = get_postgres_client()
     try:
+        await postgres_client.migrate()
+
         app.state.db_conn = await asyncpg.connect(
             user=settings.POSTGRES_USER,
             password=settings.POSTGRES_PASSWORD.get_secret_value(),
@@ -26,10 +30,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
                 await saver.setup()
             if hasattr(store, "setup"):
                 await store.setup()
+            if settings.CHECKPOINTER == "postgres":
+                get_orchestrator().use_checkpointer(saver)
 
             yield
+            # Let queued profile extractions finish while the database is still reachable
+            await get_orchestrator().profile_jobs.drain(settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
     finally:
         # Cleanup on shutdown
         if hasattr(app.state, "db_conn"):
             await app.state.db_conn.close()
+        await postgres_client.close()
         print("Log:--> Application shutting down...")
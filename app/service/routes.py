@@ -1,31 +1,192 @@
 import logging
-from typing import Annotated
+import secrets
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 
+from agent.batch import BatchRunner
 from agent.dependencies import get_orchestrator
 from agent.orchestration import Orchestrator
-from config.schemas import UserInput
+from config.schemas import BatchInput, UserInput
+from config.settings import settings
+from core.codec import dumps, dumps_str
+from core.metrics import REGISTRY
+from core.profiling import PROFILE_SUFFIXES, is_valid_request_id
+from core.tracing import TRACE_HEADER, new_trace_id
+from memory.locks import SessionBusyError
 
 router = APIRouter()
 LOGGER = logging.getLogger("service")
 LOGGER.setLevel(logging.INFO)
 
 
+def request_trace_id(http_request: Request) -> str:
+    """Use the caller's trace ID when given, so our logs join theirs."""
+    return http_request.headers.get(TRACE_HEADER) or new_trace_id()
+
+
+def is_admin(http_request: Request) -> bool:
+    token = http_request.headers.get("X-Admin-Token", "")
+    expected = settings.ADMIN_TOKEN
+    return expected is not None and secrets.compare_digest(token, expected.get_secret_value())
+
+
+def require_admin(http_request: Request) -> None:
+    if settings.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404)
+    if not is_admin(http_request):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def profile_requested(http_request: Request) -> bool:
+    """An `X-Profile: 1` header from an admin profiles this request."""
+    return http_request.headers.get("X-Profile", "").lower() in {"1", "true"} and is_admin(
+        http_request
+    )
+
+
 @router.post("/chat")
 async def chat(
-    request: UserInput, orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)]
-) -> JSONResponse:
+    request: UserInput,
+    orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)],
+    trace_id: Annotated[str, Depends(request_trace_id)],
+    profile: Annotated[bool, Depends(profile_requested)],
+) -> Response:
     session_id = request.session_id or "session-123"
     user_id = request.user_id or "user-123"
     user_input = request.user_input
+    headers = {TRACE_HEADER: trace_id}
     try:
-        result = await orchestrator.run(session_id, user_id, user_input)
-        return JSONResponse(content=result, status_code=200)
+        result = await orchestrator.run(
+            session_id, user_id, user_input, trace_id=trace_id, profile=profile
+        )
+        return Response(dumps(result), media_type="application/json", headers=headers)
+    except SessionBusyError as e:
+        return JSONResponse(
+            content={"error": str(e)}, status_code=409, headers={**headers, "Retry-After": "1"}
+        )
     except Exception as e:
         LOGGER.exception("Orchestrator failed.")
-        return JSONResponse(content={"error": f"Orchestrator error: {e}"}, status_code=500)
+        return JSONResponse(
+            content={"error": f"Orchestrator error: {e}"}, status_code=500, headers=headers
+        )
+
+
+def format_sse(event: dict[str, Any]) -> str:
+    """Format an orchestrator event as a server-sent event frame."""
+    payload = {k: v for k, v in event.items() if k != "event"}
+    return f"event: {event['event']}\ndata: {dumps_str(payload)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: UserInput,
+    orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)],
+    trace_id: Annotated[str, Depends(request_trace_id)],
+) -> StreamingResponse:
+    session_id = request.session_id or "session-123"
+    user_id = request.user_id or "user-123"
+    user_input = request.user_input
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in orchestrator.run_stream(
+                session_id, user_id, user_input, trace_id=trace_id
+            ):
+                yield format_sse(event)
+        except SessionBusyError as e:
+            yield format_sse({"event": "error", "error": str(e)})
+        except Exception as e:
+            LOGGER.exception("Orchestrator failed.")
+            yield format_sse({"event": "error", "error": f"Orchestrator error: {e}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", TRACE_HEADER: trace_id},
+    )
+
+
+@router.post("/chat/batch")
+async def chat_batch(
+    request: BatchInput,
+    orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)],
+    trace_id: Annotated[str, Depends(request_trace_id)],
+) -> StreamingResponse:
+    """Run many turns concurrently, streaming one NDJSON line per item as it completes.
+
+    Lines come in completion order and carry the item's `index`; failed items have
+    `"status": "error"` and do not stop the batch.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.BATCH_MAX_ITEMS} items per batch"
+        )
+    max_concurrency = min(
+        request.max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY
+    )
+    runner = BatchRunner(orchestrator, max_concurrency)
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for result in runner.run(request.items):
+            yield dumps(result) + b"\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no", TRACE_HEADER: trace_id},
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
+
+@router.post(
+    "/admin/profiling/sessions/{session_id}",
+    include_in_schema=False,
+    dependencies=[Depends(require_admin)],
+)
+async def arm_session_profiling(
+    session_id: str, orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)], runs: int = 1
+) -> JSONResponse:
+    """Profile the next `runs` turns of a session; fetch them by their X-Trace-ID."""
+    orchestrator.profiler.arm(session_id, runs)
+    return JSONResponse(content={"session_id": session_id, "runs": runs}, status_code=202)
+
+
+@router.get("/admin/profiles", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def list_profiles(
+    orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)],
+) -> JSONResponse:
+    return JSONResponse(content={"profiles": orchestrator.profiler.list_profiles()})
+
+
+@router.get(
+    "/admin/profiles/{request_id}/{kind}",
+    include_in_schema=False,
+    dependencies=[Depends(require_admin)],
+)
+async def get_profile(
+    request_id: str, kind: str, orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)]
+) -> FileResponse:
+    """Download a profile: `kind` is `cprofile` (pstats) or `timeline` (Chrome trace JSON)."""
+    if kind not in PROFILE_SUFFIXES or not is_valid_request_id(request_id):
+        raise HTTPException(status_code=404)
+    path = orchestrator.profiler.path(request_id, kind)
+    if not path.exists():
+        raise HTTPException(status_code=404)
+    return FileResponse(path, filename=path.name)
 
 
 @router.get("/health_check", include_in_schema=False)
@@ -0,0 +1,93 @@
+"""Send a JSONL file of chat turns through the `/chat/batch` API.
+
+Each input line is an object with `session_id`, `user_id` and `user_input`. Results are written
+as JSONL in completion order, each with the `index` of its input line; turns of a session run in
+input order. Large files are sent as several batches of `--chunk-size` items.
+
+Usage:
+    python scripts/batch_chat.py questions.jsonl --output results.jsonl
+    python scripts/batch_chat.py questions.jsonl --url http://localhost:8080 --concurrency 32
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+
+def read_items(path: str) -> list[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def chunks(items: list[dict[str, Any]], size: int) -> Iterator[tuple[int, list[dict[str, Any]]]]:
+    """Split items into batches, keeping every turn of a session in the same batch."""
+    sessions: dict[str, list[int]] = {}
+    for index, item in enumerate(items):
+        sessions.setdefault(item["session_id"], []).append(index)
+    batch: list[int] = []
+    for indexes in sessions.values():
+        if batch and len(batch) + len(indexes) > size:
+            yield sorted(batch), [items[i] for i in sorted(batch)]
+            batch = []
+        batch.extend(indexes)
+    if batch:
+        yield sorted(batch), [items[i] for i in sorted(batch)]
+
+
+def post_batch(
+    url: str, items: list[dict[str, Any]], concurrency: int | None, timeout: float
+) -> Iterator[dict[str, Any]]:
+    body: dict[str, Any] = {"items": items}
+    if concurrency:
+        body["max_concurrency"] = concurrency
+    request = urllib.request.Request(
+        f"{url}/chat/batch",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(args: argparse.Namespace, output: TextIO) -> int:
+    items = read_items(args.input)
+    started = time.perf_counter()
+    outcomes = {"ok": 0, "error": 0}
+    for indexes, batch in chunks(items, args.chunk_size):
+        for result in post_batch(args.url, batch, args.concurrency, args.timeout):
+            result["index"] = indexes[result["index"]]
+            outcomes[result["status"]] += 1
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(items)} items in {elapsed:.1f}s ({len(items) / elapsed:.2f}/s): "
+        f"{outcomes['ok']} ok, {outcomes['error']} failed",
+        file=sys.stderr,
+    )
+    return 1 if outcomes["error"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", help="JSONL file of session_id, user_id and user_input")
+    parser.add_argument("--output", help="results file (default: stdout)")
+    parser.add_argument(
+        "--url", default=os.getenv("API_BASE_URL", "http://localhost:8080"), help="API base URL"
+    )
+    parser.add_argument("--concurrency", type=int, help="sessions run at once by the server")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="items per request")
+    parser.add_argument("--timeout", type=float, default=600, help="socket timeout (s)")
+    args = parser.parse_args()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            sys.exit(main(args, f))
+    sys.exit(main(args, sys.stdout))
@@ -0,0 +1,143 @@
+"""Load benchmark of the full orchestration graph against a scripted fake LLM.
+
+Runs N concurrent sessions through `Orchestrator.run` and reports throughput, per-node latency
+percentiles and memory growth. With the default zero LLM latency the numbers are pure
+orchestration, serialization and storage overhead.
+
+Usage:
+    PYTHONPATH=app python scripts/bench_graph.py --sessions 50 --turns 4
+    PYTHONPATH=app python scripts/bench_graph.py --median 0.2 --sigma 0.5 --postgres
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import resource
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from agent.graph_builder import GraphBuilder
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient, constant_latency, lognormal_latency
+from core.metrics import PROFILE_EXTRACTIONS
+from memory.in_memory import InMemoryPostgresClient
+from memory.postgres import PostgresClient
+
+TURNS = [
+    "hi",
+    "I have had a headache for three days",
+    "I am 35 and I take ibuprofen for back pain",
+    "thanks",
+]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def instrument_nodes(orchestrator: Orchestrator, timings: dict[str, list[float]]) -> None:
+    """Wrap every node callable with a timer and rebuild the graph around the wrappers."""
+
+    def timed(name: str, node: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        # functools.wraps keeps the node signature, so LangGraph still injects `runtime`
+        @functools.wraps(node)
+        async def wrapper(state, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await node(state, **kwargs)
+            finally:
+                timings[name].append(time.perf_counter() - started)
+
+        return wrapper
+
+    for name, node in vars(orchestrator.nodes).items():
+        setattr(orchestrator.nodes, name, timed(name, node))
+    orchestrator.graph = GraphBuilder(orchestrator).build()
+
+
+async def run_session(
+    orchestrator: Orchestrator, session: int, turns: int, turn_latencies: list[float]
+) -> None:
+    for turn in range(turns):
+        started = time.perf_counter()
+        await orchestrator.run(f"bench-session-{session}", f"bench-user-{session}", TURNS[turn % 4])
+        turn_latencies.append(time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    latency = (
+        lognormal_latency(args.median, args.sigma) if args.median > 0 else constant_latency(0.0)
+    )
+    settings.SPECULATIVE_SPECIALISTS = args.speculative
+    llm_client = ScriptedLLMClient(latency=latency, seed=0)
+    postgres_client: Any = PostgresClient() if args.postgres else InMemoryPostgresClient()
+
+    orchestrator = Orchestrator(llm_client=llm_client, postgres_client=postgres_client)
+    timings: dict[str, list[float]] = defaultdict(list)
+    instrument_nodes(orchestrator, timings)
+
+    # Warm up imports, prompt loading and pools outside the measured window
+    await orchestrator.run("bench-warmup", "bench-warmup", TURNS[1])
+
+    tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    turn_latencies: list[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(run_session(orchestrator, s, args.turns, turn_latencies) for s in range(args.sessions))
+    )
+    elapsed = time.perf_counter() - started
+    # Let the queued profile extractions finish before measuring memory
+    await orchestrator.profile_jobs.drain(settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_turns = args.sessions * args.turns
+    print(f"sessions={args.sessions} turns/session={args.turns} llm_calls={llm_client.calls}")
+    print(f"throughput: {total_turns / elapsed:.1f} turns/s over {elapsed:.2f}s")
+    print(
+        f"turn latency: p50={statistics.median(turn_latencies) * 1000:.1f}ms "
+        f"p95={percentile(turn_latencies, 0.95) * 1000:.1f}ms "
+        f"p99={percentile(turn_latencies, 0.99) * 1000:.1f}ms"
+    )
+    print(f"{'node':<26}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, samples in sorted(timings.items()):
+        print(
+            f"{name:<26}{len(samples):>7}"
+            f"{statistics.median(samples) * 1000:>10.2f}"
+            f"{percentile(samples, 0.95) * 1000:>10.2f}"
+            f"{percentile(samples, 0.99) * 1000:>10.2f}"
+        )
+    if orchestrator.preclassifier:
+        print(f"preclassifier: {orchestrator.preclassifier.stats_snapshot()}")
+    if orchestrator.profile_gate:
+        extractions = {o: int(PROFILE_EXTRACTIONS.value(outcome=o)) for o in ("called", "skipped")}
+        print(f"profile extraction: {extractions}")
+    if orchestrator.specialist_selector:
+        print(f"specialist selector: {orchestrator.specialist_selector.stats_snapshot()}")
+    if args.speculative:
+        print(f"speculation: {orchestrator.speculation_stats.snapshot()}")
+    print(
+        f"memory: +{(memory_after - memory_before) / 1024:.0f} KiB retained, "
+        f"peak {memory_peak / 1024:.0f} KiB traced, "
+        f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions")
+    parser.add_argument("--turns", type=int, default=4, help="turns per session")
+    parser.add_argument("--median", type=float, default=0.0, help="median LLM latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal latency shape")
+    parser.add_argument("--postgres", action="store_true", help="use the local Postgres")
+    parser.add_argument("--speculative", action="store_true", help="speculative specialists")
+    logging.disable(logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""Benchmark of the interaction index on large synthetic interaction tables.
+
+Compares `InteractionIndex.check` with a linear scan that tests every record's substance names
+against the draft, which is what an unindexed table costs per turn.
+
+Usage:
+    PYTHONPATH=app python scripts/bench_interactions.py --substances 20000 --interactions 200000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from agent.interactions import Interaction, InteractionIndex, normalize_name
+from config.state import MedicalHistory, UserProfile
+
+FILLER = "rest drink water sleep well eat light meals walk daily and avoid stress".split()
+
+
+def synthetic_table(args: argparse.Namespace, rng: random.Random) -> InteractionIndex:
+    names = [f"substance{i}" for i in range(args.substances)]
+    synonyms = {name: [f"{name}brand", f"{name} extract"] for name in names}
+    interactions = [
+        Interaction(*rng.sample(names, 2), rng.choice(["major", "moderate", "minor"]), "synthetic")
+        for _ in range(args.interactions)
+    ]
+    return InteractionIndex(interactions, synonyms=synonyms)
+
+
+def draft_text(index: InteractionIndex, rng: random.Random, mentions: int) -> str:
+    words = [rng.choice(FILLER) for _ in range(300)]
+    for name in rng.sample(sorted(index.aliases), mentions):
+        words.insert(rng.randrange(len(words)), name)
+    return " ".join(words)
+
+
+def linear_scan(index: InteractionIndex, draft: str, profile_names: set[str]) -> set[Interaction]:
+    words = set(normalize_name(draft).split())
+    found = set()
+    for records in index.pairs.values():
+        for record in records:
+            if record.first in words and (record.second in words or record.second in profile_names):
+                found.add(record)
+            elif record.second in words and record.first in profile_names:
+                found.add(record)
+    return found
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(0)
+    started = time.perf_counter()
+    index = synthetic_table(args, rng)
+    build = time.perf_counter() - started
+
+    medications = rng.sample([f"substance{i}" for i in range(args.substances)], args.medications)
+    profile = UserProfile(user_id="bench", medical_history=MedicalHistory(medications=medications))
+    drafts = [draft_text(index, rng, args.mentions) for _ in range(args.repeat)]
+    matches = [len(index.check(draft, profile)) for draft in drafts]
+
+    indexed = timed(lambda: index.check(rng.choice(drafts), profile), args.repeat)
+    profile_names = index.profile_substances(profile)
+    scan = timed(lambda: linear_scan(index, rng.choice(drafts), profile_names), args.repeat)
+
+    print(
+        f"substances={args.substances} aliases={len(index.aliases)} "
+        f"interactions={args.interactions} build={build:.2f}s"
+    )
+    print(f"mean matches per draft: {statistics.mean(matches):.1f}")
+    print(f"indexed check: p50={statistics.median(indexed) * 1000:.3f}ms")
+    print(f"linear scan:   p50={statistics.median(scan) * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--substances", type=int, default=20000)
+    parser.add_argument("--interactions", type=int, default=200000)
+    parser.add_argument("--medications", type=int, default=5, help="medications in the profile")
+    parser.add_argument("--mentions", type=int, default=8, help="substances named per draft")
+    parser.add_argument("--repeat", type=int, default=50)
+    main(parser.parse_args())
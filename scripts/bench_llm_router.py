@@ -0,0 +1,88 @@
+"""Measure LLM router tail latency offline against fake backends.
+
+Usage:
+    PYTHONPATH=app python scripts/bench_llm_router.py --calls 500 --hedge-delay 0.2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from core.fake_llm import FakeLLMClient, lognormal_latency
+from core.llm import BaseLLMClient
+from core.router import LLMRouter
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(client: BaseLLMClient, calls: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one_call(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.ainvoke(f"call-{i}")
+            except Exception:  # noqa: BLE001
+                return
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one_call(i) for i in range(calls)))
+    return latencies
+
+
+def make_backends(args: argparse.Namespace) -> list[BaseLLMClient]:
+    return [
+        FakeLLMClient(
+            "primary",
+            latency=lognormal_latency(args.median, args.sigma),
+            error_rate=args.error_rate,
+            seed=1,
+        ),
+        FakeLLMClient(
+            "secondary",
+            latency=lognormal_latency(args.median, args.sigma),
+            error_rate=args.error_rate,
+            seed=2,
+        ),
+    ]
+
+
+def report(name: str, latencies: list[float], calls: int) -> None:
+    print(
+        f"{name:>10}: ok={len(latencies)}/{calls} "
+        f"p50={statistics.median(latencies) * 1000:.0f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:.0f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    single = make_backends(args)[0]
+    report("single", await measure(single, args.calls, args.concurrency), args.calls)
+
+    router = LLMRouter(
+        make_backends(args),
+        hedge_min_delay=args.hedge_delay,
+        failure_threshold=args.failure_threshold,
+        reset_timeout=5.0,
+    )
+    report("router", await measure(router, args.calls, args.concurrency), args.calls)
+    print(f"router stats: {router.stats_snapshot()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--median", type=float, default=0.05, help="median latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.8, help="lognormal shape")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--hedge-delay", type=float, default=0.05)
+    parser.add_argument("--failure-threshold", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""Benchmark of prompt assembly for one medical turn.
+
+Builds the system prompt and node prompt for the ~9 LLM calls of a medical turn, the way nodes
+did before (profile serialized and template re-parsed per call) and through `agent.prompts`
+(precompiled templates, profile block memoized per profile version).
+
+Usage:
+    PYTHONPATH=app python scripts/bench_prompts.py --turns 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from agent.prompts import PROFILE_BLOCKS, ProfileBlockCache, load_template
+from agent.utils import load_prompt
+from config.state import UserProfile
+
+# Prompt files of the LLM calls in one medical turn
+TURN_CALLS = [
+    "1_input_guardrail.md",
+    "2_ensure_details.md",
+    "4_allopathy_agent.md",
+    "4_tcm_kampo_agent.md",
+    "4_ayurveda_agent.md",
+    "4_lifestyle_agent.md",
+    "5_synthesis.md",
+    "6_contraindication_check.md",
+    "response_generator.md",
+]
+USER_INPUT = "I have had a headache for three days"
+
+
+def make_profile(user: int) -> UserProfile:
+    return UserProfile(
+        user_id=f"user-{user}",
+        biometrics={"age": 30 + user % 40, "gender": "female", "weight": 62.5},
+        diet={"dietary_preferences": ["vegetarian"], "dietary_restrictions": ["gluten"]},
+        medical_history={"medications": ["levothyroxine"], "medical_conditions": ["asthma"]},
+        lifestyle={"activities": ["yoga", "walking"], "sleep_patterns": ["6 hours"]},
+    )
+
+
+def legacy_turn(
+    profile: UserProfile, templates: dict[str, tuple[str, set[str]]], system: str
+) -> int:
+    size = 0
+    for filename in TURN_CALLS:
+        text, fields = templates[filename]
+        profile_json = profile.model_dump_json(indent=2, exclude_none=True)
+        system_prompt = system.format(user_profile=profile_json)
+        values = dict.fromkeys(fields, USER_INPUT)
+        values.update(user_profile=profile)
+        size += len(system_prompt) + len(text.format(**values))
+    return size
+
+
+def assembled_turn(profile: UserProfile, cache: ProfileBlockCache) -> int:
+    size = 0
+    system = load_template("system_prompt.md")
+    for filename in TURN_CALLS:
+        block = cache.render(profile)
+        system_prompt = system.render(user_profile=block)
+        template = load_template(filename)
+        values = dict.fromkeys(template.fields, USER_INPUT)
+        values.update(user_profile=block)
+        size += len(system_prompt) + len(template.render(**values))
+    return size
+
+
+def main(args: argparse.Namespace) -> None:
+    templates = {
+        filename: (load_prompt(filename), set(load_template(filename).fields))
+        for filename in TURN_CALLS
+    }
+    system = load_prompt("system_prompt.md")
+    profiles = [make_profile(user) for user in range(args.turns)]
+    cache = ProfileBlockCache()
+
+    results = {}
+    for label, turn in (
+        ("legacy", lambda p: legacy_turn(p, templates, system)),
+        ("assembled", lambda p: assembled_turn(p, cache)),
+    ):
+        samples = []
+        for profile in profiles:
+            started = time.perf_counter()
+            turn(profile)
+            samples.append(time.perf_counter() - started)
+        results[label] = samples
+        print(
+            f"{label:<10} per turn: mean={statistics.mean(samples) * 1e6:.1f}us "
+            f"p50={statistics.median(samples) * 1e6:.1f}us"
+        )
+
+    speedup = statistics.mean(results["legacy"]) / statistics.mean(results["assembled"])
+    print(f"speedup: {speedup:.1f}x, profile block cache {cache.stats_snapshot()}")
+
+    system_template = load_template("system_prompt.md")
+    first, second = (
+        system_template.render(user_profile=PROFILE_BLOCKS.render(p)) for p in profiles[:2]
+    )
+    shared = len(system_template.static_prefix)
+    assert first[:shared] == second[:shared]
+    print(f"static system prefix: {shared} chars shared by every call and user")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=2000, help="turns, one profile each")
+    main(parser.parse_args())
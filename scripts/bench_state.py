@@ -0,0 +1,118 @@
+"""Microbenchmark of per-turn CPU cost as the conversation history grows.
+
+For each history size a session is seeded with that many messages and driven through
+`Orchestrator.run` against a zero-latency scripted LLM, each measured turn in a fresh session
+carrying the same history. History compaction is disabled so the size holds. The CPU time per
+turn is reported next to the cost of the state handoff and encoding steps at that size, each
+against the deep-copy / stdlib equivalent it replaces.
+
+Usage:
+    PYTHONPATH=app python scripts/bench_state.py
+    PYTHONPATH=app python scripts/bench_state.py --sizes 0 100 1000 5000 --turns 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from agent.orchestration import Orchestrator, graph_input, state_from_graph
+from config.settings import settings
+from config.state import SessionState, UserProfile
+from core.codec import dumps, loads
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+USER_INPUT = "I have had a headache for three days"
+
+
+def seeded_state(messages: int, session_id: str = "bench-state") -> SessionState:
+    history = [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message {i} about sleep, diet and the headaches I keep getting. " * 4,
+        }
+        for i in range(messages)
+    ]
+    return SessionState(
+        session_id=session_id,
+        user_id="bench-user",
+        conversation_history=history,
+        message_count=messages,
+        user_profile=UserProfile(user_id="bench-user"),
+    )
+
+
+def cost_ms(fn: Callable[[], Any], number: int = 50) -> float:
+    return timeit.timeit(fn, number=number) / number * 1000
+
+
+def step_costs(state: SessionState) -> dict[str, tuple[float, float]]:
+    """Per-step cost in ms at this history size, as (current, replaced)."""
+    values = dict(state)
+    history = state.conversation_history
+    return {
+        "graph input": (cost_ms(lambda: graph_input(state)), cost_ms(lambda: state.model_dump())),
+        "graph output": (
+            cost_ms(lambda: state_from_graph(values)),
+            cost_ms(lambda: SessionState(**values)),
+        ),
+        "message log": (cost_ms(lambda: dumps(history)), cost_ms(lambda: json.dumps(history))),
+        "load history": (
+            cost_ms(lambda: loads(dumps(history))),
+            cost_ms(lambda: json.loads(json.dumps(history))),
+        ),
+    }
+
+
+async def turn_cpu(messages: int, turns: int) -> float:
+    """Mean CPU seconds per turn of a session carrying `messages` messages."""
+    postgres_client = InMemoryPostgresClient()
+    orchestrator = Orchestrator(ScriptedLLMClient(), postgres_client)
+    # Warm up prompts, the graph and the selector outside the measured turns
+    await postgres_client.add_state(seeded_state(messages))
+    await orchestrator.run("bench-state", "bench-user", USER_INPUT)
+
+    cpu = 0.0
+    for turn in range(turns):
+        # A fresh session per turn, so each starts from the seeded history
+        session_id = f"bench-state-{turn}"
+        await postgres_client.add_state(seeded_state(messages, session_id))
+        started = time.process_time()
+        await orchestrator.run(session_id, "bench-user", USER_INPUT)
+        cpu += time.process_time() - started
+    await orchestrator.profile_jobs.drain(settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    return cpu / turns
+
+
+def main(args: argparse.Namespace) -> None:
+    # Keeping every message recent disables compaction without summing the history's tokens
+    settings.HISTORY_KEEP_RECENT_MESSAGES = max(args.sizes) + 2
+    settings.HISTORY_LOAD_MAX_MESSAGES = max(args.sizes) + 2
+
+    header = f"{'messages':>9}{'cpu/turn ms':>13}"
+    steps = list(step_costs(seeded_state(0)))
+    for step in steps:
+        header += f"{step:>24}"
+    print(header)
+    print(f"{'':>22}" + f"{'now / before ms':>24}" * len(steps))
+    for messages in args.sizes:
+        cpu = asyncio.run(turn_cpu(messages, args.turns))
+        row = f"{messages:>9}{cpu * 1000:>13.2f}"
+        for current, replaced in step_costs(seeded_state(messages)).values():
+            row += f"{f'{current:.3f} / {replaced:.3f}':>24}"
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[0, 20, 100, 500, 2000], help="history sizes"
+    )
+    parser.add_argument("--turns", type=int, default=20, help="measured turns per size")
+    logging.disable(logging.WARNING)
+    main(parser.parse_args())
@@ -0,0 +1,84 @@
+"""Replay recorded orchestrator runs offline, without live LLMs.
+
+Runs recorded with `RECORDING_DIR` set are re-driven through a fresh orchestrator whose LLM
+calls are answered from the recordings. `--time-scale 1` keeps the recorded arrival times and
+LLM latencies, smaller values compress them and 0 replays as fast as possible, which leaves
+only orchestration, serialization and storage overhead.
+
+Usage:
+    PYTHONPATH=app python scripts/replay_runs.py recordings/ --time-scale 0
+    PYTHONPATH=app python scripts/replay_runs.py recordings/runs-20261017.jsonl.gz --postgres \\
+        --cprofile replay.prof
+"""
+
+import argparse
+import asyncio
+import cProfile
+import logging
+import statistics
+import time
+from typing import Any
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.recording import ReplayLLMClient, load_recordings, replay_runs
+from memory.in_memory import InMemoryPostgresClient
+from memory.postgres import PostgresClient
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def main(args: argparse.Namespace) -> None:
+    recordings = load_recordings(args.paths)
+    if not recordings:
+        print("no recordings found")
+        return
+    # The replay must not record itself
+    settings.RECORDING_DIR = None
+    llm_client = ReplayLLMClient(recordings, time_scale=args.time_scale)
+    postgres_client: Any = PostgresClient() if args.postgres else InMemoryPostgresClient()
+    if args.postgres:
+        await postgres_client.migrate()
+    orchestrator = Orchestrator(llm_client=llm_client, postgres_client=postgres_client)
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    results = await replay_runs(orchestrator, recordings, time_scale=args.time_scale)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+    elapsed = time.perf_counter() - started
+    await orchestrator.profile_jobs.drain(settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+
+    latencies = [result.duration for result in results]
+    recorded = [recording.duration for recording in recordings]
+    failed = [result for result in results if result.error]
+    print(f"runs={len(results)} sessions={len({r.session_id for r in recordings})}")
+    print(f"throughput: {len(results) / elapsed:.1f} runs/s over {elapsed:.2f}s")
+    print(
+        f"run latency: p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:.1f}ms "
+        f"(recorded p50={statistics.median(recorded) * 1000:.1f}ms)"
+    )
+    print(
+        f"same response: {sum(result.matched for result in results)}/{len(results)}, "
+        f"failed: {len(failed)}"
+    )
+    print(f"replay client: {llm_client.stats.snapshot()}")
+    for result in failed[:5]:
+        print(f"  {result.trace_id}: {result.error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+", help="recording files or directories")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="timing factor, 0 = none")
+    parser.add_argument("--postgres", action="store_true", help="use the local Postgres")
+    parser.add_argument("--cprofile", help="write a cProfile of the replay to this file")
+    logging.disable(logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+import asyncio
+
+from core.background import BackgroundWorkerPool
+from core.metrics import BACKGROUND_JOBS
+
+
+def test_pending_jobs_coalesce_per_key_and_drain():
+    ran = []
+    release = asyncio.Event()
+
+    def job(name, wait=False):
+        async def run():
+            if wait:
+                await release.wait()
+            ran.append(name)
+
+        return run
+
+    async def scenario():
+        pool = BackgroundWorkerPool("test_coalesce", max_workers=1)
+        await pool.submit("alice", job("alice-1", wait=True))
+        await asyncio.sleep(0)  # alice-1 is now running
+        for turn in range(2, 5):
+            await pool.submit("alice", job(f"alice-{turn}"))
+        await pool.submit("bob", job("bob-1"))
+        release.set()
+        assert await pool.drain(timeout=1)
+        assert not await pool.submit("bob", job("bob-2"))
+        return pool
+
+    pool = asyncio.run(scenario())
+
+    assert ran == ["alice-1", "alice-4", "bob-1"]
+    assert not pool.workers
+    assert BACKGROUND_JOBS.value(queue="test_coalesce", outcome="coalesced") == 2
+    assert BACKGROUND_JOBS.value(queue="test_coalesce", outcome="dropped") == 1
+
+
+def test_full_queue_drops_after_submit_timeout():
+    async def scenario():
+        pool = BackgroundWorkerPool("test_full", max_workers=1, max_queued=1, submit_timeout=0.01)
+        blocker = asyncio.Event()
+        await pool.submit("a", blocker.wait)
+        await asyncio.sleep(0)  # a is running, the queue is empty again
+        accepted = [await pool.submit(key, blocker.wait) for key in ("b", "c")]
+        blocker.set()
+        assert await pool.drain(timeout=1)
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, False]
+
+
+def test_job_submitted_while_the_last_worker_exits_still_runs():
+    ran = []
+
+    async def scenario():
+        # No submit timeout, so submitting to a queue with room never yields to the loop
+        pool = BackgroundWorkerPool("test_exit", max_workers=1, submit_timeout=None)
+
+        async def second():
+            ran.append("second")
+
+        async def first():
+            ran.append("first")
+            # Lands after the worker finds the queue empty, before its task is done
+            loop = asyncio.get_running_loop()
+            loop.call_soon(lambda: asyncio.ensure_future(pool.submit("b", second)))
+
+        await pool.submit("a", first)
+        await asyncio.sleep(0.01)
+        assert await pool.drain(timeout=0.5)
+
+    asyncio.run(scenario())
+
+    assert ran == ["first", "second"]
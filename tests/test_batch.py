@@ -0,0 +1,78 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agent.dependencies import get_orchestrator
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient
+from core.scheduler import LLMScheduler
+from memory.in_memory import InMemoryPostgresClient
+from service.routes import router
+
+MEDICAL_TURN = "I have had a headache for three days"
+
+
+class CountingPostgresClient(InMemoryPostgresClient):
+    def __init__(self) -> None:
+        super().__init__()
+        self.single_loads = 0
+        self.bulk_loads = 0
+
+    async def get_state_and_profile(self, session_id, user_id):
+        self.single_loads += 1
+        return await super().get_state_and_profile(session_id, user_id)
+
+    async def get_states_and_profiles(self, session_ids, user_ids):
+        self.bulk_loads += 1
+        return await super().get_states_and_profiles(session_ids, user_ids)
+
+
+def make_client(scheduler=None):
+    llm_client = ScriptedLLMClient()
+    postgres_client = CountingPostgresClient()
+    orchestrator = Orchestrator(
+        scheduler.wrap(llm_client) if scheduler else llm_client, postgres_client
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    return TestClient(app), postgres_client
+
+
+def test_batch_streams_a_line_per_item_and_keeps_session_order():
+    scheduler = LLMScheduler(4, 4, 0, 0, 0)
+    client, postgres_client = make_client(scheduler)
+    items = [
+        {"session_id": "a", "user_id": "u1", "user_input": MEDICAL_TURN},
+        {"session_id": "b", "user_id": "u2", "user_input": "hello"},
+        {"session_id": "a", "user_id": "u1", "user_input": "thanks"},
+        {"session_id": "c", "user_id": "u1", "user_input": MEDICAL_TURN},
+    ]
+
+    response = client.post("/chat/batch", json={"items": items})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    assert all(line["status"] == "ok" for line in lines)
+    session_a = [line["index"] for line in lines if line["session_id"] == "a"]
+    assert session_a == [0, 2]
+    # The second turn of session "a" saw the first one's history
+    by_index = {line["index"]: line["result"] for line in lines}
+    assert len(by_index[2]["conversation_history"]) > len(by_index[0]["conversation_history"])
+    # First turns come from the bulk load; only the follow-up turn loads on its own
+    assert postgres_client.bulk_loads == 1
+    assert postgres_client.single_loads == 1
+    lanes = scheduler.stats_snapshot()
+    assert lanes["batch"]["calls"] > 0
+    assert lanes["interactive"]["calls"] == lanes["critical"]["calls"] == 0
+
+
+def test_batch_rejects_oversized_requests(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 1)
+    client, _ = make_client()
+    item = {"session_id": "s", "user_id": "u", "user_input": "hello"}
+
+    assert client.post("/chat/batch", json={"items": [item, item]}).status_code == 413
@@ -0,0 +1,67 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from core.fake_llm import ScriptedLLMClient
+from memory.checkpointer import BoundedMemorySaver
+from memory.in_memory import InMemoryPostgresClient
+
+
+def make_orchestrator(saver):
+    orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+    orchestrator.use_checkpointer(saver)
+    return orchestrator
+
+
+async def run_turns(orchestrator, turns):
+    for session_id, text in turns:
+        await orchestrator.run(session_id, "user", text)
+    await orchestrator.profile_jobs.drain(timeout=1)
+
+
+def test_keeps_only_the_latest_checkpoint_per_thread():
+    saver = BoundedMemorySaver()
+    orchestrator = make_orchestrator(saver)
+    turns = ["I have had a headache for three days", "hi there", "thanks a lot"]
+
+    asyncio.run(run_turns(orchestrator, [("s", text) for text in turns]))
+
+    assert len(saver.storage["s"][""]) == 1
+    (latest,) = saver.storage["s"][""]
+    versions = saver.get_tuple({"configurable": {"thread_id": "s"}}).checkpoint["channel_versions"]
+    assert len(saver.blobs) == len(versions)
+    assert all(key[2] in versions for key in saver.blobs)
+    assert all(key[2] == latest for key in saver.writes)
+
+
+def test_evicts_least_recently_used_threads_beyond_the_bound():
+    saver = BoundedMemorySaver(max_threads=2)
+    orchestrator = make_orchestrator(saver)
+
+    asyncio.run(run_turns(orchestrator, [("a", "hi"), ("b", "hi"), ("a", "hello"), ("c", "hi")]))
+
+    assert set(saver.storage) == {"a", "c"}
+    assert {key[0] for key in saver.blobs} == {"a", "c"}
+    assert saver.get_tuple({"configurable": {"thread_id": "b"}}) is None
+    assert "b" not in saver.storage
+
+
+def test_evicts_idle_threads_after_ttl():
+    saver = BoundedMemorySaver(ttl_seconds=0)
+    orchestrator = make_orchestrator(saver)
+
+    asyncio.run(run_turns(orchestrator, [("a", "hi"), ("b", "hi")]))
+
+    assert set(saver.storage) == {"b"}
+    assert saver.thread_count == 1
+
+
+def test_nodes_write_only_the_fields_they_change():
+    saver = BoundedMemorySaver(keep_latest_only=False)
+    orchestrator = make_orchestrator(saver)
+
+    asyncio.run(run_turns(orchestrator, [("s", "I have had a headache for three days")]))
+
+    written = [write[1] for writes in saver.writes.values() for write in writes.values()]
+    # The turn's input and the response node's history update; other nodes leave it alone
+    assert written.count("conversation_history") == 2
+    assert written.count("user_profile") == 1
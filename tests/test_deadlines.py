@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient, constant_latency
+from core.metrics import DEGRADED_RESPONSES, SPECIALIST_TIMEOUTS
+from memory.in_memory import InMemoryPostgresClient
+
+MEDICAL_TURN = "I have had a headache for three days"
+
+
+def run_turn(llm_client, text=MEDICAL_TURN):
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+
+    async def scenario():
+        result = await orchestrator.run("session", "user", text)
+        await orchestrator.profile_jobs.drain(timeout=1)
+        return result
+
+    started = time.perf_counter()
+    result = asyncio.run(scenario())
+    return result, time.perf_counter() - started
+
+
+def test_slow_specialist_is_dropped_and_synthesis_proceeds(monkeypatch):
+    monkeypatch.setattr(settings, "SPECIALIST_TIMEOUTS", {"tcm_kampo_agent": 0.05})
+    prompts = []
+
+    def synthesis(prompt):
+        prompts.append(prompt)
+        return "Combined advice without TCM."
+
+    llm_client = ScriptedLLMClient(
+        responses={"5_synthesis.md": synthesis},
+        latencies={"4_tcm_kampo_agent.md": constant_latency(2.0)},
+    )
+    timeouts_before = SPECIALIST_TIMEOUTS.value(specialist="tcm_kampo_agent")
+    degraded_before = DEGRADED_RESPONSES.value()
+
+    result, elapsed = run_turn(llm_client)
+
+    assert elapsed < 1.0
+    assert result["dropped_perspectives"] == ["tcm_kampo_agent"]
+    assert result["tcm_advice"] == ""
+    assert result["allopathy_advice"].startswith("Allopathy")
+    assert "**TCM/Kampo response:** Unavailable" in prompts[0]
+    assert SPECIALIST_TIMEOUTS.value(specialist="tcm_kampo_agent") == timeouts_before + 1
+    assert DEGRADED_RESPONSES.value() == degraded_before + 1
+
+
+def test_turn_deadline_caps_every_specialist(monkeypatch):
+    monkeypatch.setattr(settings, "TURN_DEADLINE_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "DEADLINE_RESERVE_SECONDS", 0.2)
+    slow = constant_latency(2.0)
+    llm_client = ScriptedLLMClient(
+        latencies={
+            prompt: slow
+            for prompt in (
+                "4_allopathy_agent.md",
+                "4_tcm_kampo_agent.md",
+                "4_ayurveda_agent.md",
+                "4_lifestyle_agent.md",
+            )
+        }
+    )
+
+    result, elapsed = run_turn(llm_client)
+
+    assert elapsed < 1.0
+    assert len(result["dropped_perspectives"]) == 4
+    assert "5_synthesis.md" not in llm_client.calls_by_prompt
+    assert result["response"]
@@ -0,0 +1,40 @@
+from agent.history import HistoryManager, estimate_message_tokens
+from config.state import SessionState
+from core.tokens import estimate_tokens
+
+
+def make_state(turns: int) -> SessionState:
+    state = SessionState(session_id="s")
+    for i in range(turns):
+        state.conversation_history.append({"role": "user", "content": f"Question {i}. " * 20})
+        state.conversation_history.append({"role": "assistant", "content": f"Answer {i}. " * 20})
+    return state
+
+
+def test_estimate_tokens_counts_words_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hi, there!") == 4
+    assert estimate_tokens("internationalization") == 4
+
+
+def test_window_keeps_most_recent_messages_within_budget():
+    state = make_state(10)
+    manager = HistoryManager(max_tokens=10_000, keep_recent_messages=4, summary_max_tokens=100)
+
+    window = manager.window(state, token_budget=200)
+
+    assert window
+    assert window[-1] == state.conversation_history[-1]
+    assert sum(estimate_message_tokens(m) for m in window) <= 200
+
+
+def test_compact_folds_old_turns_into_summary():
+    state = make_state(20)
+    manager = HistoryManager(max_tokens=500, keep_recent_messages=4, summary_max_tokens=100)
+
+    manager.compact(state)
+
+    assert len(state.conversation_history) == 4
+    assert state.history_summary.endswith("assistant: Answer 17.")
+    assert estimate_tokens(state.history_summary) <= 100
+    assert manager.window(state, token_budget=1000)[0]["role"] == "system"
@@ -0,0 +1,96 @@
+import asyncio
+
+from agent.interactions import Interaction, InteractionIndex, default_interaction_index
+from agent.orchestration import Orchestrator
+from config.state import MedicalHistory, UserProfile
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+
+def profile(**medical_history):
+    return UserProfile(user_id="user", medical_history=MedicalHistory(**medical_history))
+
+
+def test_synonyms_and_groups_resolve_to_indexed_pairs():
+    index = InteractionIndex(
+        [Interaction("anticoagulant", "Ginkgo", "major", "bleeding")],
+        synonyms={"warfarin": ["Coumadin"], "ginkgo": ["ginkgo biloba"]},
+        groups={"anticoagulant": ["warfarin"]},
+    )
+
+    (match,) = index.check("Take Ginkgo-Biloba daily.", profile(medications=["coumadin 5mg"]))
+
+    assert (match.substance, match.other, match.interaction.severity) == (
+        "ginkgo",
+        "warfarin",
+        "major",
+    )
+    assert index.check("Take ginkgo daily.", profile(medications=["metformin"])) == []
+
+
+def test_default_table_orders_matches_by_severity():
+    matches = default_interaction_index().check(
+        "Ginger tea and Advil for the pain.", profile(medications=["Warfarin"])
+    )
+
+    assert [m.describe() for m in matches] == [
+        "ibuprofen + warfarin (major): increased bleeding risk",
+        "ginger + warfarin (moderate): may increase bleeding risk",
+    ]
+
+
+def run_turn(medications, **llm_options):
+    orchestrator = Orchestrator(ScriptedLLMClient(**llm_options), InMemoryPostgresClient())
+
+    async def scenario():
+        await orchestrator.postgres_client.save_user_profile(
+            profile(medications=medications) if medications else UserProfile(user_id="user")
+        )
+        result = await orchestrator.run("session", "user", "I have had a headache for three days")
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+        return result
+
+    return asyncio.run(scenario()), orchestrator.llm_client
+
+
+def test_contraindication_llm_call_skipped_when_nothing_could_interact():
+    # A draft naming no substance, for a user with nothing on record
+    result, llm_client = run_turn(
+        medications=None, responses={"5_synthesis.md": "Combined advice: rest and sleep."}
+    )
+
+    assert not result["has_contraindications"]
+    assert "6_contraindication_check.md" not in llm_client.calls_by_prompt
+
+
+def test_contraindication_llm_call_runs_for_medications_missing_from_the_table():
+    result, llm_client = run_turn(
+        medications=["lisinopril"],
+        responses={"5_synthesis.md": "Combined advice: a potassium supplement."},
+    )
+
+    assert llm_client.calls_by_prompt["6_contraindication_check.md"] == 1
+    assert not result["has_contraindications"]
+
+
+def test_contraindication_llm_call_gets_only_matched_pairs():
+    prompts = []
+    llm_client = ScriptedLLMClient(
+        responses={"6_contraindication_check.md": lambda p: prompts.append(p) or "not json"}
+    )
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+
+    async def scenario():
+        await orchestrator.postgres_client.save_user_profile(profile(medications=["warfarin"]))
+        result = await orchestrator.run("session", "user", "I have had a headache for three days")
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert "- ginger + warfarin (moderate)" in prompts[0]
+    # Unparseable LLM output falls back to the indexed matches, which trigger the adjustment
+    assert result["contraindication_details"].startswith("- ginger + warfarin")
+    assert llm_client.calls_by_prompt["7_adjustment.md"] == 1
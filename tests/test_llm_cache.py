@@ -0,0 +1,60 @@
+import asyncio
+
+from core.cache import CachedLLMClient, InMemoryLRUCache, cache_key
+from core.llm import BaseLLMClient
+
+
+class CountingClient(BaseLLMClient):
+    def __init__(self):
+        self.model_name = "test-model"
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return f"response-{self.calls}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_is_canonical():
+    first = [{"role": "user", "content": "hi"}]
+    second = [{"content": "hi", "role": "user"}]
+    assert cache_key("m", first) == cache_key("m", second)
+    assert cache_key("m", first) != cache_key("other", first)
+
+
+def test_repeated_messages_hit_memory_tier():
+    client = CountingClient()
+    cached = CachedLLMClient(client, [InMemoryLRUCache(max_size=8, ttl_seconds=60)])
+    messages = [{"role": "user", "content": "hello"}]
+
+    first = asyncio.run(cached.ainvoke(messages))
+    second = asyncio.run(cached.ainvoke(messages))
+
+    assert first == second
+    assert client.calls == 1
+    assert cached.stats()["memory"] == {"hits": 1, "misses": 1, "evictions": 0, "errors": 0}
+
+
+def test_lru_evicts_by_size_and_ttl():
+    clock = FakeClock()
+    cache = InMemoryLRUCache(max_size=2, ttl_seconds=10, clock=clock)
+
+    async def scenario():
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        await cache.get("a")
+        await cache.set("c", "3")  # evicts "b", the least recently used
+        assert await cache.get("b") is None
+        clock.now = 11
+        assert await cache.get("a") is None
+
+    asyncio.run(scenario())
+    assert cache.stats.evictions == 2
+    assert len(cache) == 1
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from core.fake_llm import FakeLLMClient, constant_latency
+from core.metrics import LLM_CIRCUIT_OPEN
+from core.router import CircuitBreaker, LLMRouter, NoBackendAvailableError
+
+
+def make_router(*clients, failure_threshold=3):
+    return LLMRouter(
+        list(clients), hedge_min_delay=0.01, failure_threshold=failure_threshold, reset_timeout=60
+    )
+
+
+def test_hedged_request_wins_when_primary_is_slow():
+    slow = FakeLLMClient("slow", response="slow", latency=constant_latency(0.5))
+    fast = FakeLLMClient("fast", response="fast", latency=constant_latency(0.0))
+    router = make_router(slow, fast)
+
+    assert asyncio.run(router.ainvoke("hi")) == "fast"
+    assert router.stats.hedges == 1
+    assert router.stats.hedge_wins == 1
+
+
+def test_cancelled_hedge_loser_still_reports_its_latency():
+    slow = FakeLLMClient("slow", response="slow", latency=constant_latency(0.5))
+    fast = FakeLLMClient("fast", response="fast", latency=constant_latency(0.0))
+    router = make_router(slow, fast)
+
+    asyncio.run(router.ainvoke("hi"))
+
+    # It ran for at least the hedge delay before it was cancelled
+    assert router.stats_snapshot()["backends"]["slow"]["ewma_latency"] >= 0.01
+
+
+def test_failover_to_next_backend_on_error():
+    broken = FakeLLMClient("broken", error_rate=1.0)
+    healthy = FakeLLMClient("healthy", response="ok")
+    router = make_router(broken, healthy)
+
+    assert asyncio.run(router.ainvoke("hi")) == "ok"
+    assert broken.calls == 1
+    assert router.stats.failovers == 1
+
+
+def test_circuit_opens_after_repeated_failures():
+    broken = FakeLLMClient("broken", error_rate=1.0)
+    router = make_router(broken, failure_threshold=2)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(NoBackendAvailableError):
+                await router.ainvoke("hi")
+
+    asyncio.run(scenario())
+    assert broken.calls == 2
+    assert router.stats_snapshot()["backends"]["broken"]["circuit"] == "open"
+    assert LLM_CIRCUIT_OPEN.value(backend="broken") == 1
+
+
+def test_raises_when_every_backend_fails():
+    router = make_router(FakeLLMClient("a", error_rate=1.0), FakeLLMClient("b", error_rate=1.0))
+    with pytest.raises(NoBackendAvailableError):
+        asyncio.run(router.ainvoke("hi"))
+
+
+def test_circuit_breaker_half_open_allows_single_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 10
+    assert breaker.acquire()
+    assert not breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == "closed"
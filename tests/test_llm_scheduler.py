@@ -0,0 +1,98 @@
+import asyncio
+
+from core.fake_llm import FakeLLMClient, constant_latency
+from core.scheduler import LLMScheduler, Priority, PriorityLimiter, TokenBucket, priority_scope
+
+
+def make_scheduler(**overrides):
+    options = {
+        "max_concurrency": 1,
+        "provider_max_concurrency": 1,
+        "requests_per_minute": 0,
+        "tokens_per_minute": 0,
+        "expected_completion_tokens": 0,
+    }
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+def test_limiter_serves_higher_priority_first():
+    limiter = PriorityLimiter(1)
+    order = []
+
+    async def worker(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        limiter.release()
+
+    async def scenario():
+        await limiter.acquire(Priority.INTERACTIVE)
+        tasks = [
+            asyncio.create_task(worker("background", Priority.BACKGROUND)),
+            asyncio.create_task(worker("interactive", Priority.INTERACTIVE)),
+            asyncio.create_task(worker("critical", Priority.CRITICAL)),
+        ]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["critical", "interactive", "background"]
+    assert limiter.active == 0
+
+
+def test_scheduled_client_records_queue_wait_per_lane():
+    scheduler = make_scheduler()
+    client = scheduler.wrap(FakeLLMClient(response="ok", latency=constant_latency(0.01)))
+
+    async def call(priority):
+        with priority_scope(priority):
+            return await client.ainvoke("hi")
+
+    async def scenario():
+        return await asyncio.gather(call(Priority.BACKGROUND), call(Priority.CRITICAL))
+
+    assert asyncio.run(scenario()) == ["ok", "ok"]
+    stats = scheduler.stats_snapshot()
+    assert stats["background"]["calls"] == 1
+    assert stats["critical"]["calls"] == 1
+    assert stats["critical"]["max_wait_seconds"] > 0
+    assert all(lane["queued"] == 0 for lane in stats.values())
+
+
+def test_token_bucket_paces_requests(monkeypatch):
+    now = [0.0]
+    bucket = TokenBucket(per_minute=60, clock=lambda: now[0])
+    bucket.tokens = 0
+
+    async def fake_sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    asyncio.run(bucket.acquire(2))
+    assert now[0] == 2.0
+
+
+def test_call_waiting_on_rate_budget_holds_no_concurrency_slot():
+    scheduler = make_scheduler(requests_per_minute=60)
+    paced = scheduler.wrap(FakeLLMClient("paced", response="paced"))
+    other = scheduler.wrap(FakeLLMClient("other", response="other"))
+    # The paced provider has spent its budget and must wait a second for the next request
+    scheduler.lane("paced").requests.tokens = 0
+    finished = []
+
+    async def call(client, priority):
+        with priority_scope(priority):
+            finished.append(await client.ainvoke("hi"))
+
+    async def scenario():
+        background = asyncio.create_task(call(paced, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(call(other, Priority.CRITICAL), timeout=0.5)
+        background.cancel()
+        await asyncio.gather(background, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert finished == ["other"]
+    assert scheduler.global_limiter.active == 0
@@ -0,0 +1,48 @@
+import asyncio
+
+from core.fake_llm import FakeLLMClient, constant_latency
+from core.singleflight import SingleFlightLLMClient
+
+
+def test_concurrent_identical_calls_share_one_provider_call():
+    backend = FakeLLMClient(response="ok", latency=constant_latency(0.01))
+    client = SingleFlightLLMClient(backend)
+
+    async def scenario():
+        return await asyncio.gather(*(client.ainvoke("same prompt") for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 5
+    assert backend.calls == 1
+    assert client.stats.coalesced == 4
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    backend = FakeLLMClient(response="ok", latency=constant_latency(0.02))
+    client = SingleFlightLLMClient(backend)
+
+    async def scenario():
+        first = asyncio.create_task(client.ainvoke("prompt"))
+        second = asyncio.create_task(client.ainvoke("prompt"))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ("ok", True)
+    assert backend.calls == 1
+    assert client.stats.abandoned == 0
+
+
+def test_call_is_cancelled_when_last_waiter_leaves():
+    backend = FakeLLMClient(response="ok", latency=constant_latency(1.0))
+    client = SingleFlightLLMClient(backend)
+
+    async def scenario():
+        waiter = asyncio.create_task(client.ainvoke("prompt"))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert client.stats.abandoned == 1
+    assert client._flights == {}
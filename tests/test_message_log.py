@@ -0,0 +1,43 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from config.state import SessionState
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+from memory.postgres import unsaved_messages
+
+MEDICAL_TURN = "I have had a headache for three days"
+
+
+def test_only_messages_added_since_the_last_save_are_unsaved():
+    state = SessionState(session_id="s", message_count=6, saved_message_count=4)
+    state.conversation_history = [{"role": "user", "content": str(i)} for i in range(3, 7)]
+
+    assert unsaved_messages(state) == [
+        (5, {"role": "user", "content": "5"}),
+        (6, {"role": "user", "content": "6"}),
+    ]
+    state.saved_message_count = 6
+    assert unsaved_messages(state) == []
+
+
+def test_turns_append_to_the_message_log_and_reload_the_unfolded_tail(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_MAX_TOKENS", 150)
+    monkeypatch.setattr(settings, "HISTORY_KEEP_RECENT_MESSAGES", 2)
+    postgres_client = InMemoryPostgresClient()
+    orchestrator = Orchestrator(ScriptedLLMClient(), postgres_client)
+
+    async def scenario():
+        results = [await orchestrator.run("s", "u", MEDICAL_TURN) for _ in range(3)]
+        await orchestrator.profile_jobs.drain(timeout=1)
+        return results, await postgres_client.get_state("s")
+
+    results, loaded = asyncio.run(scenario())
+
+    log = postgres_client.messages["s"]
+    assert [seq for seq, _ in log] == list(range(1, results[-1]["message_count"] + 1))
+    assert loaded.history_summary
+    assert loaded.conversation_history == results[-1]["conversation_history"]
+    assert loaded.saved_message_count == loaded.message_count
+    assert "conversation_history" not in postgres_client.states["s"]
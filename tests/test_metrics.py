@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from agent.dependencies import get_orchestrator
+from agent.orchestration import Orchestrator
+from core.fake_llm import ScriptedLLMClient
+from core.llm import LLMClient
+from core.metrics import LLM_COMPLETION_TOKENS, LLM_DURATION, NODE_DURATION, MetricsRegistry
+from core.tracing import current_node, current_trace_id, node_scope
+from memory.in_memory import InMemoryPostgresClient
+from service.routes import router
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    calls.inc(route='/chat "x"')
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+
+    assert registry.render() == (
+        "# HELP calls_total Calls.\n# TYPE calls_total counter\n"
+        'calls_total{route="/chat \\"x\\""} 1\n'
+        "# HELP latency_seconds Latency.\n# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 3.55\n"
+        "latency_seconds_count 3\n"
+    )
+
+
+class TracingLLMClient(ScriptedLLMClient):
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    async def ainvoke(self, messages):
+        self.seen.append((current_trace_id(), current_node()))
+        return await super().ainvoke(messages)
+
+
+def test_run_propagates_trace_id_and_times_every_node():
+    llm_client = TracingLLMClient()
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+    guardrail_runs = NODE_DURATION.count(node="input_guardrail")
+
+    async def scenario():
+        await orchestrator.run("s", "u", "I have had a headache for three days", trace_id="t-1")
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+
+    asyncio.run(scenario())
+
+    assert NODE_DURATION.count(node="input_guardrail") == guardrail_runs + 1
+    assert {trace_id for trace_id, _ in llm_client.seen} == {"t-1"}
+    # Graph calls are attributed to their node; the background extraction runs outside the graph
+    nodes = {node for _, node in llm_client.seen}
+    assert {"input_guardrail", "allopathy_agent", "response_generator", None} <= nodes
+
+
+def test_llm_client_records_duration_and_estimated_tokens():
+    client = LLMClient.__new__(LLMClient)
+    client.model_name, client.provider = "fake-model", "groq"
+    client.model = FakeListChatModel(responses=["take some rest"])
+
+    async def call():
+        with node_scope("general_agent"):
+            return await client.ainvoke([{"role": "user", "content": "hello"}])
+
+    assert asyncio.run(call()) == "take some rest"
+    labels = {"model": "fake-model", "node": "general_agent"}
+    assert LLM_DURATION.count(**labels) == 1
+    assert LLM_COMPLETION_TOKENS.series[("fake-model", "general_agent")].sum == 3
+
+
+def test_chat_echoes_trace_header_and_metrics_endpoint_exposes_nodes():
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_orchestrator] = lambda: Orchestrator(
+        ScriptedLLMClient(), InMemoryPostgresClient()
+    )
+    client = TestClient(app)
+
+    response = client.post(
+        "/chat",
+        json={"session_id": "s", "user_id": "u", "user_input": "hello"},
+        headers={"X-Trace-ID": "caller-trace"},
+    )
+    metrics = client.get("/metrics")
+
+    assert response.headers["X-Trace-ID"] == "caller-trace"
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'graph_node_duration_seconds_count{node="general_agent"}' in metrics.text
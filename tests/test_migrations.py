@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from agent.orchestration import Orchestrator
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+from memory.migrations import MIGRATIONS, Migration, apply_migrations
+
+
+class FakeConnection:
+    """Records statements and keeps `schema_migrations` rows in memory."""
+
+    def __init__(self):
+        self.statements = []
+        self.versions = set()
+
+    async def execute(self, query, params=None):
+        self.statements.append(query.strip())
+        if query.startswith("INSERT INTO schema_migrations"):
+            self.versions.add(params["version"])
+
+    @asynccontextmanager
+    async def cursor(self):
+        connection = self
+
+        class Cursor:
+            async def execute(self, query, params=None):
+                pass
+
+            async def fetchall(self):
+                return [{"version": version} for version in connection.versions]
+
+        yield Cursor()
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+def test_pending_migrations_are_applied_once_in_order():
+    conn = FakeConnection()
+    extra = Migration(99, "later", ("SELECT 99",))
+
+    first = asyncio.run(apply_migrations(conn, (extra, *MIGRATIONS)))
+    second = asyncio.run(apply_migrations(conn, (extra, *MIGRATIONS)))
+
+    assert first == [*(m.version for m in MIGRATIONS), 99]
+    assert second == []
+    assert conn.statements.count("SELECT 99") == 1
+    assert conn.statements[-1].startswith("SELECT pg_advisory_unlock")
+
+
+def test_turn_loads_state_and_profile_in_one_fetch():
+    postgres_client = InMemoryPostgresClient()
+    fetches = []
+    combined = postgres_client.get_state_and_profile
+
+    async def get_state_and_profile(session_id, user_id):
+        fetches.append((session_id, user_id))
+        return await combined(session_id, user_id)
+
+    postgres_client.get_state_and_profile = get_state_and_profile
+    orchestrator = Orchestrator(ScriptedLLMClient(), postgres_client)
+
+    state = asyncio.run(orchestrator.prepare_state("session", "user", "hi there"))
+
+    assert fetches == [("session", "user")]
+    assert state.user_profile.user_id == "user"
+    assert state.user_input == "hi there"
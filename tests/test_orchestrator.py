@@ -0,0 +1,42 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+
+def make_orchestrator(**llm_options):
+    return Orchestrator(ScriptedLLMClient(**llm_options), InMemoryPostgresClient())
+
+
+async def run_and_drain(orchestrator, *turns):
+    results = [await orchestrator.run("session", "user", turn) for turn in turns]
+    # Wait for the fire-and-forget profile extraction
+    background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    await asyncio.gather(*background)
+    return results
+
+
+def test_medical_turn_runs_full_pipeline():
+    orchestrator = make_orchestrator()
+
+    (result,) = asyncio.run(run_and_drain(orchestrator, "I have had a headache for three days"))
+
+    assert result["response"].startswith("Here is your personalised plan")
+    assert result["allopathy_advice"].startswith("Allopathy")
+    assert result["synthesized_response"].startswith("Combined advice")
+    calls = orchestrator.llm_client.calls_by_prompt
+    assert calls["4_tcm_kampo_agent.md"] == calls["response_generator.md"] == 1
+
+
+def test_general_turn_skips_specialists_and_persists_state():
+    orchestrator = make_orchestrator()
+
+    (result,) = asyncio.run(run_and_drain(orchestrator, "hi there"))
+
+    assert result["response"] == "Hello! How can I help you today?"
+    assert "4_allopathy_agent.md" not in orchestrator.llm_client.calls_by_prompt
+    assert "session" in orchestrator.postgres_client.states
+    # Greetings carry no profile facts, so extraction is gated off and nothing is written
+    assert "user" not in orchestrator.postgres_client.profiles
+    assert "3_profile_extractor.md" not in orchestrator.llm_client.calls_by_prompt
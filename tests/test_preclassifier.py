@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from agent.orchestration import Orchestrator
+from agent.preclassifier import Preclassifier, Verdict
+from core.fake_llm import ScriptedLLMClient
+from core.matcher import PhraseMatch, PhraseMatcher
+from memory.in_memory import InMemoryPostgresClient
+
+
+def test_matcher_finds_overlapping_phrases_on_word_boundaries():
+    matcher = PhraseMatcher({"he": "a", "she": "b", "hers": "c", "chest pain": "d"})
+
+    assert matcher.find("She has chest pain, hers") == [
+        PhraseMatch(0, 3, "b"),
+        PhraseMatch(8, 18, "d"),
+        PhraseMatch(20, 24, "c"),
+    ]
+    assert matcher.find("ushers the chest painting") == []
+
+
+@pytest.mark.parametrize(
+    "text, verdict",
+    [
+        ("hi", Verdict.SMALLTALK),
+        ("Thank you so much!", Verdict.SMALLTALK),
+        ("I have crushing chest pain", Verdict.EMERGENCY),
+        ("I can’t breathe", Verdict.EMERGENCY),
+        ("no chest pain, just a cough", None),
+        ("I had a heart attack last year", None),
+        ("thanks, my head still hurts", None),
+        ("hi, what should I eat for dinner", None),
+    ],
+)
+def test_preclassifier_settles_only_clear_cases(text, verdict):
+    assert Preclassifier().classify(text) is verdict
+
+
+def test_smalltalk_skips_guardrail_call_and_is_counted():
+    orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+
+    async def scenario():
+        results = [await orchestrator.run("session", "user", t) for t in ("hello", "my knee hurts")]
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+        return results
+
+    hello, knee = asyncio.run(scenario())
+
+    assert hello["response"] == "Hello! How can I help you today?"
+    assert knee["is_medical"]
+    assert orchestrator.llm_client.calls_by_prompt["1_input_guardrail.md"] == 1
+    assert orchestrator.preclassifier.stats_snapshot() == {
+        "calls": 2,
+        "emergency": 0,
+        "smalltalk": 1,
+        "deferred": 1,
+        "bypass_rate": 0.5,
+    }
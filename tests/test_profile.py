@@ -0,0 +1,60 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from agent.profile import ProfileGate, apply_profile_patch, profile_patch
+from config.state import Biometrics, UserProfile
+from core.fake_llm import ScriptedLLMClient
+from core.metrics import PROFILE_EXTRACTIONS
+from memory.in_memory import InMemoryPostgresClient
+
+
+def test_gate_lets_profile_facts_through_and_skips_the_rest():
+    gate = ProfileGate()
+
+    assert gate.should_extract("I'm 45 and I take metformin")
+    assert gate.should_extract("I am vegetarian and live in Pune")
+    assert gate.should_extract("I was diagnosed with asthma as a kid")
+    assert not gate.should_extract("thanks, that helps")
+    assert not gate.should_extract("what else can I try for it?")
+
+
+def test_patch_keeps_only_changed_fields_and_shares_unchanged_sections():
+    profile = UserProfile(user_id="u", name="Ada", biometrics=Biometrics(age=40, height=170))
+
+    patch = profile_patch(
+        profile,
+        {
+            "name": "Ada",
+            "biometrics": {"age": "41", "height": 170, "weight": None},
+            "diet": {"dietary_preferences": []},
+            "medical_history": {"medications": ["metformin"], "unknown": 1},
+            "favourite_colour": "blue",
+        },
+    )
+    updated = apply_profile_patch(profile, patch)
+
+    assert patch == {"biometrics": {"age": 41}, "medical_history": {"medications": ["metformin"]}}
+    assert updated.biometrics.height == 170 and updated.biometrics.age == 41
+    assert updated.diet is profile.diet
+    assert apply_profile_patch(profile, {}) is profile
+
+
+def test_gated_extraction_writes_only_the_patch():
+    skipped_before = PROFILE_EXTRACTIONS.value(outcome="skipped")
+
+    async def scenario():
+        orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+        await orchestrator.postgres_client.save_user_profile(
+            UserProfile(user_id="user", name="Ada", biometrics=Biometrics(height=170))
+        )
+        for turn in ("thanks!", "I'm 35 and I get headaches when I skip meals"):
+            await orchestrator.run("session", "user", turn)
+        await orchestrator.profile_jobs.drain(timeout=1)
+        return orchestrator
+
+    orchestrator = asyncio.run(scenario())
+
+    assert orchestrator.llm_client.calls_by_prompt["3_profile_extractor.md"] == 1
+    assert PROFILE_EXTRACTIONS.value(outcome="skipped") == skipped_before + 1
+    profile = asyncio.run(orchestrator.postgres_client.get_user_profile("user"))
+    assert (profile.name, profile.biometrics.age, profile.biometrics.height) == ("Ada", 35, 170)
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import pstats
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import SecretStr
+
+from agent.dependencies import get_orchestrator
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+from service.routes import router
+
+
+def make_orchestrator(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    return Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+
+
+def test_profiled_run_saves_cprofile_and_task_timeline(monkeypatch, tmp_path):
+    orchestrator = make_orchestrator(monkeypatch, tmp_path)
+
+    asyncio.run(orchestrator.run("s", "u", "I have had a headache for three days", "req-1", True))
+
+    stats = pstats.Stats(str(tmp_path / "req-1.prof"))
+    assert any(name == "parse_json_response" for _, _, name in stats.stats)
+    timeline = json.loads((tmp_path / "req-1.trace.json").read_text())
+    spans = {(event["cat"], event["name"]) for event in timeline["traceEvents"]}
+    assert {("node", "synthesis_node"), ("run", "orchestrator.run")} <= spans
+    assert any(category == "task" for category, _ in spans)
+
+
+def test_armed_session_profiles_only_the_requested_runs(monkeypatch, tmp_path):
+    orchestrator = make_orchestrator(monkeypatch, tmp_path)
+    orchestrator.profiler.arm("s")
+
+    async def scenario():
+        await orchestrator.run("s", "u", "hello", trace_id="first")
+        await orchestrator.run("s", "u", "hello", trace_id="second")
+
+    asyncio.run(scenario())
+
+    assert orchestrator.profiler.list_profiles() == ["first"]
+
+
+def test_admin_endpoints_require_the_admin_token(monkeypatch, tmp_path):
+    orchestrator = make_orchestrator(monkeypatch, tmp_path)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    client = TestClient(app)
+    body = {"session_id": "s", "user_id": "u", "user_input": "hello"}
+
+    assert client.get("/admin/profiles").status_code == 404
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", SecretStr("secret"))
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+    # Without the admin token the profiling header is ignored
+    client.post("/chat", json=body, headers={"X-Profile": "1", "X-Trace-ID": "anon"})
+    admin = {"X-Admin-Token": "secret"}
+    client.post("/chat", json=body, headers={**admin, "X-Profile": "1", "X-Trace-ID": "mine"})
+
+    assert client.get("/admin/profiles", headers=admin).json() == {"profiles": ["mine"]}
+    timeline = client.get("/admin/profiles/mine/timeline", headers=admin)
+    assert timeline.json()["otherData"] == {"trace_id": "mine"}
+    assert client.get("/admin/profiles/anon/cprofile", headers=admin).status_code == 404
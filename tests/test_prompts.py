@@ -0,0 +1,35 @@
+import pytest
+
+from agent.prompts import NO_PROFILE, PROMPTS_DIR, ProfileBlockCache, PromptTemplate
+from config.state import UserProfile
+
+
+@pytest.mark.parametrize("path", sorted(PROMPTS_DIR.glob("*.md")), ids=lambda p: p.name)
+def test_every_prompt_precompiles_and_renders_like_str_format(path):
+    text = path.read_text()
+    template = PromptTemplate(text, path.name)
+    values = {field: f"<{field}>" for field in template.fields}
+
+    assert template.render(**values) == text.format(**values)
+
+
+def test_system_prompt_keeps_profile_after_static_prefix():
+    template = PromptTemplate.load("system_prompt.md")
+    cache = ProfileBlockCache()
+    first = template.render(user_profile=cache.render(UserProfile(user_id="a")))
+    second = template.render(user_profile=cache.render(UserProfile(user_id="b", name="Bo")))
+
+    assert template.fields == {"user_profile"}
+    assert first.startswith(template.static_prefix) and second.startswith(template.static_prefix)
+    assert '"user_id": "a"' in first[len(template.static_prefix) :]
+
+
+def test_profile_block_is_memoized_per_profile_version():
+    cache = ProfileBlockCache()
+    profile = UserProfile(user_id="user")
+
+    assert cache.render(profile) is cache.render(profile)
+    updated = profile.model_copy(update={"name": "Ada"})
+    assert '"Ada"' in cache.render(updated)
+    assert cache.render(None) == NO_PROFILE
+    assert cache.stats_snapshot() == {"hits": 1, "misses": 2}
@@ -0,0 +1,62 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient
+from core.recording import ReplayLLMClient, load_recordings, replay_runs
+from memory.in_memory import InMemoryPostgresClient
+
+TURNS = [
+    ("s1", "I have had a headache for three days"),
+    ("s2", "hello"),
+    ("s1", "It gets worse in the evening, what else can I do?"),
+]
+
+
+def record_turns(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RECORDING_DIR", str(tmp_path))
+    orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+
+    async def scenario():
+        for session_id, text in TURNS:
+            await orchestrator.run(session_id, "user", text)
+        await orchestrator.profile_jobs.drain(timeout=1)
+
+    asyncio.run(scenario())
+    monkeypatch.setattr(settings, "RECORDING_DIR", None)
+
+
+def test_runs_are_recorded_with_their_calls_and_states(monkeypatch, tmp_path):
+    record_turns(monkeypatch, tmp_path)
+
+    recordings = load_recordings([tmp_path])
+
+    assert [(r.session_id, r.user_input) for r in recordings] == TURNS
+    medical = recordings[0]
+    nodes = {call.node for call in medical.calls}
+    assert {"input_guardrail", "allopathy_agent", "synthesis_node"} <= nodes
+    # Background profile extraction is not part of the run
+    assert all("3_profile_extractor" not in str(call.request) for call in medical.calls)
+    assert medical.initial_state["user_input"] == TURNS[0][1]
+    assert medical.final_state["response"]
+    assert recordings[2].initial_state["conversation_history"]
+
+
+def test_replay_reproduces_the_recorded_responses_offline(monkeypatch, tmp_path):
+    record_turns(monkeypatch, tmp_path)
+    recordings = load_recordings([tmp_path])
+    llm_client = ReplayLLMClient(recordings, time_scale=0)
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+
+    async def scenario():
+        results = await replay_runs(orchestrator, recordings, time_scale=0)
+        await orchestrator.profile_jobs.drain(timeout=1)
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert len(results) == 3
+    assert all(result.matched and result.error is None for result in results)
+    stats = llm_client.stats.snapshot()
+    assert stats["calls"] == sum(len(r.calls) for r in recordings)
+    assert stats["mismatched"] == stats["missing"] == 0
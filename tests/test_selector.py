@@ -0,0 +1,74 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from agent.selector import SpecialistSelector
+from config.state import Preferences, UserProfile
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+ALL = ["allopathy_agent", "tcm_kampo_agent", "ayurveda_agent", "lifestyle_agent"]
+
+
+def test_selector_narrows_wellbeing_questions_and_keeps_symptoms_broad():
+    selector = SpecialistSelector()
+
+    assert selector.choose("How much water should I drink every day?") == ["lifestyle_agent"]
+    assert selector.choose("I have had a headache for three days") == ALL
+    assert selector.choose("How do I balance my vata?") == ["ayurveda_agent"]
+    assert selector.choose("What does ayurveda say about sleep?") == [
+        "ayurveda_agent",
+        "lifestyle_agent",
+    ]
+    assert selector.choose("Tell me about my test results") == ALL
+
+
+def test_selector_honours_opt_outs_and_profile_preferences():
+    selector = SpecialistSelector()
+    profile = UserProfile(
+        user_id="u",
+        preferences=Preferences(excluded_traditions=["TCM"], preferred_traditions=["Ayurveda"]),
+    )
+
+    assert selector.choose("No ayurveda please, I have a cough") == [
+        "allopathy_agent",
+        "tcm_kampo_agent",
+        "lifestyle_agent",
+    ]
+    assert selector.choose("Only western medicine: I have a fever") == ["allopathy_agent"]
+    assert selector.choose("I have a fever", profile) == [
+        "allopathy_agent",
+        "ayurveda_agent",
+        "lifestyle_agent",
+    ]
+    assert selector.choose("How much water should I drink?", profile) == [
+        "ayurveda_agent",
+        "lifestyle_agent",
+    ]
+
+
+def test_wellbeing_question_consults_only_the_lifestyle_specialist():
+    prompts = []
+
+    def synthesis(prompt):
+        prompts.append(prompt)
+        return "Drink about two litres a day."
+
+    llm_client = ScriptedLLMClient(responses={"5_synthesis.md": synthesis})
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+
+    async def scenario():
+        result = await orchestrator.run("session", "user", "How much water should I drink daily?")
+        await orchestrator.profile_jobs.drain(timeout=1)
+        return result
+
+    result = asyncio.run(scenario())
+
+    specialist_calls = {
+        prompt: calls for prompt, calls in llm_client.calls_by_prompt.items() if "_agent" in prompt
+    }
+    assert specialist_calls == {"4_lifestyle_agent.md": 1}
+    assert result["selected_specialists"] == ["lifestyle_agent"]
+    assert result["dropped_perspectives"] == []
+    assert result["allopathy_advice"] == ""
+    assert "**Allopathy response:** Not consulted" in prompts[0]
+    assert orchestrator.specialist_selector.stats_snapshot()["skipped"] == 3
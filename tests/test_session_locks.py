@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient, constant_latency
+from memory.in_memory import InMemoryPostgresClient
+from memory.locks import SessionBusyError, SessionLocks
+
+
+def test_concurrent_turns_of_one_session_across_workers_are_serialized():
+    # Two orchestrators over one store stand in for two workers behind a load balancer
+    store = InMemoryPostgresClient()
+    workers = [
+        Orchestrator(ScriptedLLMClient(latency=constant_latency(0.01)), store) for _ in range(2)
+    ]
+    turns = [f"hello number {n}" for n in range(6)]
+
+    async def scenario():
+        await asyncio.gather(
+            *(workers[n % 2].run("session", "user", text) for n, text in enumerate(turns))
+        )
+        for worker in workers:
+            await worker.profile_jobs.drain(timeout=1)
+
+    asyncio.run(scenario())
+
+    state = asyncio.run(store.get_state("session"))
+    user_messages = [m["content"] for m in state.conversation_history if m["role"] == "user"]
+    assert sorted(user_messages) == sorted(turns)
+    assert not store.leases
+
+
+def test_busy_session_times_out_without_blocking_others():
+    locks = SessionLocks(InMemoryPostgresClient(), wait_timeout=0.05)
+
+    async def scenario():
+        async with locks.hold("a"):
+            async with locks.hold("b"):
+                pass
+            with pytest.raises(SessionBusyError):
+                async with locks.hold("a"):
+                    pass
+        async with locks.hold("a"):
+            pass
+
+    asyncio.run(scenario())
+    assert not locks._local
+
+
+def test_turns_interleave_without_locks(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_LOCK_ENABLED", False)
+    store = InMemoryPostgresClient()
+    orchestrator = Orchestrator(ScriptedLLMClient(latency=constant_latency(0.01)), store)
+
+    async def scenario():
+        await asyncio.gather(
+            *(orchestrator.run("s", "user", f"hello number {n}") for n in range(4))
+        )
+        await orchestrator.profile_jobs.drain(timeout=1)
+
+    asyncio.run(scenario())
+
+    state = asyncio.run(store.get_state("s"))
+    assert sum(m["role"] == "user" for m in state.conversation_history) < 4
@@ -0,0 +1,45 @@
+import asyncio
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+
+def run_turn(orchestrator, user_input):
+    async def scenario():
+        result = await orchestrator.run("session", "user", user_input)
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+        return result
+
+    return asyncio.run(scenario())
+
+
+def test_speculative_specialists_commit_on_medical_path(monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_SPECIALISTS", True)
+    llm_client = ScriptedLLMClient()
+    orchestrator = Orchestrator(llm_client, InMemoryPostgresClient())
+
+    result = run_turn(orchestrator, "I have had a headache for three days")
+
+    assert result["allopathy_advice"].startswith("Allopathy")
+    assert llm_client.calls_by_prompt["4_allopathy_agent.md"] == 1
+    assert orchestrator.speculation_stats.snapshot() == {
+        "started": 4,
+        "committed": 4,
+        "wasted": 0,
+        "failed": 0,
+        "wasted_rate": 0.0,
+    }
+
+
+def test_speculative_specialists_are_cancelled_off_the_medical_path(monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_SPECIALISTS", True)
+    orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+
+    result = run_turn(orchestrator, "hi")
+
+    assert result["allopathy_advice"] == ""
+    assert orchestrator.speculation_stats.wasted == 4
+    assert orchestrator.speculation_stats.committed == 0
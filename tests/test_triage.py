@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from agent.orchestration import Orchestrator
+from config.settings import settings
+from core.fake_llm import CLARIFYING_QUESTION, ScriptedLLMClient
+from memory.in_memory import InMemoryPostgresClient
+
+TRIAGE_FIELDS = ("is_emergency", "is_medical", "has_sufficient_details", "response")
+
+CONVERSATIONS = [
+    ["hi there"],
+    ["I have had a headache for three days"],
+    ["my head hurts", "I am 35 and I take ibuprofen for back pain"],
+    ["thanks", "I have chest pain and my left arm is numb"],
+]
+
+
+def run_conversation(monkeypatch, fused, turns):
+    monkeypatch.setattr(settings, "FUSED_TRIAGE", fused)
+    orchestrator = Orchestrator(ScriptedLLMClient(), InMemoryPostgresClient())
+
+    async def scenario():
+        results = [await orchestrator.run("session", "user", turn) for turn in turns]
+        background = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.gather(*background)
+        return results
+
+    results = asyncio.run(scenario())
+    return [{field: r[field] for field in TRIAGE_FIELDS} for r in results], orchestrator
+
+
+@pytest.mark.parametrize("turns", CONVERSATIONS)
+def test_fused_triage_matches_two_call_path(monkeypatch, turns):
+    two_call, _ = run_conversation(monkeypatch, False, turns)
+    fused, orchestrator = run_conversation(monkeypatch, True, turns)
+
+    assert fused == two_call
+    assert "1_input_guardrail.md" not in orchestrator.llm_client.calls_by_prompt
+    assert "2_ensure_details.md" not in orchestrator.llm_client.calls_by_prompt
+
+
+def test_fused_triage_saves_a_call_per_medical_turn(monkeypatch):
+    turns = ["my head hurts", "I have had a headache for three days"]
+    two_call, baseline = run_conversation(monkeypatch, False, turns)
+    fused, orchestrator = run_conversation(monkeypatch, True, turns)
+
+    assert fused[0]["response"] == CLARIFYING_QUESTION
+    assert orchestrator.llm_client.calls == baseline.llm_client.calls - len(turns)